@@ -129,6 +129,12 @@ fi
 # Remove the submitter code
 rm -r $PACKAGEDIR/deadline/*_submitter
 
+# Bundle the modules the KeyShot client imports into one precompiled archive next to
+# keyshot_client.py, which the adaptor points the client at
+python $SCRIPTDIR/deps_bundle.py \
+    --client-bundle $PACKAGEDIR/deadline/keyshot_adaptor/KeyShotClient/keyshot_client_deps.zip \
+    --search-path $PACKAGEDIR
+
 # Remove the bin dir if there is one
 if [ -d $PACKAGEDIR/bin ]; then
     rm -r $PACKAGEDIR/bin
@@ -2,18 +2,31 @@
 
 from __future__ import annotations
 
+import argparse
 import re
 import shutil
 import subprocess
+import sys
+import zipfile
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Any
+from typing import Any, Optional
 
-from _project import Dependency, get_dependencies, get_pip_platform, get_project_dict
+from _project import (
+    Dependency,
+    get_dependencies,
+    get_git_root,
+    get_pip_platform,
+    get_project_dict,
+)
 
 SUPPORTED_PYTHON_VERSIONS = ["3.9", "3.10", "3.11"]
 SUPPORTED_PLATFORMS = ["Windows", "Linux", "Darwin"]
 NATIVE_DEPENDENCIES = ["xxhash"]
+# The pure Python packages keyshot_client.py imports inside KeyShot. pywin32 is not included since
+# its native modules cannot be imported from a zip.
+CLIENT_BUNDLE_PACKAGES = ["openjd/adaptor_runtime_client", "deadline/keyshot_adaptor"]
+CLIENT_BUNDLE_EXCLUDES = ["KeyShotAdaptor", "__pycache__", "*.pyc", "*.pyi", "py.typed"]
 
 
 def _get_package_version_regex(package: str) -> re.Pattern:
@@ -128,5 +141,82 @@ def build_deps_bundle() -> None:
         _copy_zip_to_destination(zip_path)
 
 
+def _find_package(package: str, search_paths: list[Path]) -> Path:
+    for search_path in search_paths:
+        package_path = search_path / package
+        if package_path.is_dir():
+            return package_path
+    raise Exception(f"Could not find {package} in {[str(path) for path in search_paths]}")
+
+
+def _zip_client_bundle(bundle_dir: Path, zip_path: Path) -> None:
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    # Stored rather than compressed so nothing is inflated at import time. Directories get their
+    # own entries since zipimport needs them to find the openjd and deadline namespace packages.
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED) as bundle:
+        for path in sorted(bundle_dir.rglob("*")):
+            bundle.write(path, path.relative_to(bundle_dir).as_posix())
+
+
+def build_client_bundle(
+    zip_path: Path, python: str = sys.executable, search_paths: Optional[list[Path]] = None
+) -> None:
+    """
+    Builds the zip archive of precompiled modules that keyshot_client.py imports inside KeyShot.
+    The adaptor points the client at the archive when it is installed next to keyshot_client.py.
+
+    The bytecode is only used by a KeyShot whose embedded Python has the same version as the
+    interpreter that compiled it. Otherwise the client compiles the sources in the archive.
+    """
+    if search_paths is None:
+        search_paths = [get_git_root() / "src", *(Path(path) for path in sys.path if path)]
+    with TemporaryDirectory() as working_directory:
+        bundle_dir = Path(working_directory) / "client_bundle"
+        for package in CLIENT_BUNDLE_PACKAGES:
+            shutil.copytree(
+                _find_package(package, search_paths),
+                bundle_dir / package,
+                ignore=shutil.ignore_patterns(*CLIENT_BUNDLE_EXCLUDES),
+            )
+        # zipimport only looks for bytecode next to the source, and bytecode with an unchecked
+        # hash is used no matter what timestamps the archive holds
+        compileall_args = [
+            python,
+            "-m",
+            "compileall",
+            "-q",
+            "-b",
+            "--invalidation-mode",
+            "unchecked-hash",
+            str(bundle_dir),
+        ]
+        subprocess.run(compileall_args, check=True)
+        _zip_client_bundle(bundle_dir, zip_path)
+    print(f"Wrote the KeyShot client bundle {zip_path}")
+
+
 if __name__ == "__main__":
-    build_deps_bundle()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--client-bundle",
+        type=Path,
+        help="Build the KeyShot client bundle at this path instead of the submitter bundle.",
+    )
+    parser.add_argument(
+        "--python",
+        default=sys.executable,
+        help="The interpreter that compiles the client bundle. Use the Python version KeyShot "
+        "embeds.",
+    )
+    parser.add_argument(
+        "--search-path",
+        action="append",
+        type=Path,
+        help="A directory the client bundle packages are copied from. Can be given more than "
+        "once. Defaults to the source tree and then sys.path.",
+    )
+    args = parser.parse_args()
+    if args.client_bundle:
+        build_client_bundle(args.client_bundle, args.python, args.search_path)
+    else:
+        build_deps_bundle()
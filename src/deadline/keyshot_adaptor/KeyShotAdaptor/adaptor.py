@@ -2,16 +2,15 @@
 from __future__ import annotations
 
 import logging
+import math
 import os
 import re
 import sys
 import threading
 import time
 from functools import wraps
-from typing import Callable
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
 
-from deadline.client.api import TelemetryClient, get_deadline_cloud_library_telemetry_client
-from openjd.adaptor_runtime._version import version as openjd_adaptor_version
 from openjd.adaptor_runtime.adaptors import Adaptor, AdaptorDataValidators, SemanticVersion
 from openjd.adaptor_runtime.adaptors.configuration import AdaptorConfiguration
 from openjd.adaptor_runtime.app_handlers import RegexCallback, RegexHandler
@@ -21,6 +20,13 @@ from openjd.adaptor_runtime_client import Action
 
 from .._version import version as adaptor_version
 
+if TYPE_CHECKING:
+    from deadline.client.api import TelemetryClient
+
+    from .budget import KeyShotRenderBudget
+    from .instances import KeyShotFrameScheduler, KeyShotInstance
+    from .pool import KeyShotPoolLease
+
 _logger = logging.getLogger(__name__)
 
 
@@ -28,21 +34,682 @@ class KeyShotNotRunningError(Exception):
     """Error that is raised when attempting to use KeyShot while it is not running"""
 
 
-_FIRST_KEYSHOT_ACTIONS = ["scene_file", "output_file_path", "output_format"]
+class KeyShotRenderHungError(Exception):
+    """Error that is raised when a KeyShot render goes over the limits of the render watchdog"""
+
+
+class KeyShotRenderCanceledError(Exception):
+    """Error that is raised when the render of a task is canceled before it completes"""
+
+
+class KeyShotRenderError(RuntimeError):
+    """Error that is raised when KeyShot reports an error while rendering"""
+
+
+_FIRST_KEYSHOT_ACTIONS = [
+    "scene_file",
+    "output_file_path",
+    "output_format",
+    "frame_render_mode",
+    "render_threads",
+    "render_options",
+]
+
+# Sent in order before every render. The scene and outputs can change between the tasks of a
+# session, and KeyShot skips reopening a scene that is already loaded.
+_KEYSHOT_RUN_KEYS = ["scene_file", "output_file_path", "output_format", "frames"]
+
+# The longest time one call to dequeue_action waits for an action to be queued. The adaptor server
+# keeps calling dequeue_action inside its /action handler until it returns an action, so KeyShot's
+# request is held open (a long-poll) and answered as soon as an action is queued.
+_ACTION_WAIT_SECONDS = 60
+
+# A single frame ("7") or a frame range with an optional step ("1-10", "1-10:2") as used in
+# OpenJD range expressions.
+_FRAME_RANGE_REGEX = re.compile(r"^\s*(-?\d+)\s*(?:-\s*(-?\d+)\s*(?::\s*(\d+)\s*)?)?$")
+
+
+def _batch_action(actions: list[Action]) -> Action:
+    """
+    Combines actions into a single batch action that KeyShot performs in order in one exchange
+    with the adaptor server
+
+    Args:
+        actions (list[Action]): The actions to perform.
+
+    Returns:
+        Action: The batch action.
+    """
+    return Action(
+        "batch", {"actions": [{"name": action.name, "args": action.args} for action in actions]}
+    )
+
+
+def _parse_frames(frames: int | str | list[int]) -> list[int]:
+    """
+    Expands the frames of a task into the list of frames to render.
+
+    Args:
+        frames (int | str | list[int]): A single frame, a list of frames or an OpenJD range
+            expression such as "1-5,8,10-20:2".
+
+    Raises:
+        ValueError: If the frames are not a valid range expression.
+
+    Returns:
+        list[int]: The frames to render, in order.
+    """
+    if isinstance(frames, int):
+        return [frames]
+    if isinstance(frames, list):
+        return [int(frame) for frame in frames]
+
+    parsed_frames: list[int] = []
+    for part in frames.split(","):
+        match = _FRAME_RANGE_REGEX.match(part)
+        if not match:
+            raise ValueError(f"Invalid frame range '{part}' in frames '{frames}'")
+        start, end, step = match.groups()
+        if end is None:
+            parsed_frames.append(int(start))
+            continue
+        if int(end) < int(start) or (step is not None and int(step) == 0):
+            raise ValueError(f"Invalid frame range '{part}' in frames '{frames}'")
+        parsed_frames.extend(range(int(start), int(end) + 1, int(step or 1)))
+    return parsed_frames
+
+
+# The archive of precompiled client dependencies that scripts/deps_bundle.py installs next to
+# keyshot_client.py
+_KEYSHOT_CLIENT_BUNDLE_NAME = "keyshot_client_deps.zip"
+
+
+def _get_keyshot_client_path() -> str:
+    """
+    Obtains the keyshot_client.py path. The client is installed alongside the adaptor, so it is
+    looked for there first and then by searching directories in sys.path.
+
+    Raises:
+        FileNotFoundError: If the keyshot_client.py file could not be found.
+
+    Returns:
+        str: The path to the keyshot_client.py file.
+    """
+    installed_path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "KeyShotClient",
+        "keyshot_client.py",
+    )
+    if os.path.isfile(installed_path):
+        return installed_path
+    for dir_ in sys.path:
+        path = os.path.join(
+            dir_, "deadline", "keyshot_adaptor", "KeyShotClient", "keyshot_client.py"
+        )
+        if os.path.isfile(path):
+            return path
+    raise FileNotFoundError(
+        "Could not find keyshot_client.py. Check that the "
+        "KeyShotClient package is in one of the "
+        f"following directories: {sys.path[1:]}"
+    )
+
+
+def _get_keyshot_client_variables(keyshot_client_path: str, server_path: str) -> dict[str, str]:
+    """
+    Returns the environment variables keyshot_client.py is run with: the server path its client
+    connects to, and the DEADLINE_KEYSHOT_CLIENT_BUNDLE that tells it where its dependency bundle
+    is. A bundle set by the worker environment is kept.
+
+    Args:
+        keyshot_client_path (str): The path to the keyshot_client.py file.
+        server_path (str): The path of the adaptor server the client connects to.
+
+    Returns:
+        dict[str, str]: The environment variables.
+    """
+    variables = {"KEYSHOT_ADAPTOR_SERVER_PATH": server_path}
+    bundle_path = os.path.join(os.path.dirname(keyshot_client_path), _KEYSHOT_CLIENT_BUNDLE_NAME)
+    if "DEADLINE_KEYSHOT_CLIENT_BUNDLE" not in os.environ and os.path.isfile(bundle_path):
+        variables["DEADLINE_KEYSHOT_CLIENT_BUNDLE"] = bundle_path
+    return variables
+
+
+# Run by KeyShot in place of keyshot_client.py. It only uses what keyshot_client.py itself uses
+# before its dependencies are loaded, so it runs in KeyShot's limited Python.
+_KEYSHOT_LAUNCH_SCRIPT = """\
+# Written by the KeyShot adaptor to run keyshot_client.py with environment variables of its own
+import os
+
+try:
+    os.remove({script_path!r})
+except OSError:
+    pass
+os.environ.update({variables!r})
+with open({keyshot_client_path!r}, encoding="utf-8") as f:
+    code = compile(f.read(), {keyshot_client_path!r}, "exec")
+exec(code, {{"__name__": "__main__", "__file__": {keyshot_client_path!r}}})
+"""
+
+
+def _write_keyshot_launch_script(keyshot_client_path: str, variables: dict[str, str]) -> str:
+    """
+    Writes a script for KeyShot to run that sets the given environment variables in KeyShot and
+    then runs keyshot_client.py. The script removes itself once KeyShot runs it.
+
+    Args:
+        keyshot_client_path (str): The path to the keyshot_client.py file.
+        variables (dict[str, str]): The environment variables to set.
+
+    Returns:
+        str: The path to the script.
+    """
+    import tempfile
+
+    fd, script_path = tempfile.mkstemp(prefix="keyshot_launch_", suffix=".py")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(
+            _KEYSHOT_LAUNCH_SCRIPT.format(
+                script_path=script_path,
+                variables=variables,
+                keyshot_client_path=keyshot_client_path,
+            )
+        )
+    return script_path
+
+
+class _ForwardingHandler(logging.Handler):
+    """
+    Logging handler that logs the records it handles to another logger, as if they were logged to
+    that logger directly
+    """
+
+    def __init__(self, logger: logging.Logger) -> None:
+        super().__init__()
+        self._logger = logger
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._logger.isEnabledFor(record.levelno):
+            # A copy, since the logger's filters may change the record before the next handler
+            self._logger.handle(logging.makeLogRecord(record.__dict__))
+
+
+class _KeyShotSubprocess(LoggingSubprocess):
+    """
+    LoggingSubprocess that runs keyshot_client.py in headless KeyShot. LoggingSubprocess launches
+    its process with the environment of the adaptor, which is shared by the KeyShots that a session
+    or a pool launches, so KeyShot runs a launch script that sets the client's environment
+    variables before it runs the client.
+    """
+
+    def __init__(
+        self,
+        *,
+        keyshot_client_path: str,
+        server_path: str,
+        logger: logging.Logger = _logger,
+        output_handler: logging.Handler | None = None,
+    ) -> None:
+        """
+        Args:
+            keyshot_client_path (str): The path to the keyshot_client.py file.
+            server_path (str): The path of the adaptor server the client connects to.
+            logger (logging.Logger, optional): The logger KeyShot's output is logged to. Defaults
+                to the logger of this module.
+            output_handler (logging.Handler | None, optional): Handles every line of KeyShot's
+                output. Defaults to None.
+        """
+        self._launch_script = _write_keyshot_launch_script(
+            keyshot_client_path, _get_keyshot_client_variables(keyshot_client_path, server_path)
+        )
+        # The output is logged through a logger of this process only. Unlike the loggers that
+        # LoggingSubprocess creates for its handlers, it is not registered with logging, so it is
+        # freed along with the process instead of living as long as the pool.
+        output_logger = logging.Logger(f"{logger.name}.keyshot")
+        output_logger.propagate = False
+        output_logger.addHandler(_ForwardingHandler(logger))
+        if output_handler is not None:
+            output_logger.addHandler(output_handler)
+        try:
+            super().__init__(args=_get_keyshot_args(self._launch_script), logger=output_logger)
+        except Exception:
+            self._remove_launch_script()
+            raise
+
+    def wait(self) -> None:
+        """
+        Waits for KeyShot to exit and removes its launch script if KeyShot did not
+        """
+        super().wait()
+        self._remove_launch_script()
+
+    def _remove_launch_script(self) -> None:
+        try:
+            os.remove(self._launch_script)
+        except OSError:
+            pass
+
+
+def _get_keyshot_args(script_path: str) -> list[str]:
+    """
+    Returns the command line that launches headless KeyShot running the given script.
+
+    Args:
+        script_path (str): The path to the script KeyShot runs.
+
+    Returns:
+        list[str]: The KeyShot command line.
+    """
+    # KeyShot has a bug where it must be started with an absolute path
+    # or the render will hang (on macOS at least). The worker env can set
+    # this varirable to override the path
+    keyshot_exe_env = os.getenv("DEADLINE_KEYSHOT_EXE", "")
+    args = []
+    if not keyshot_exe_env:
+        if sys.platform == "win32":
+            keyshot_exe = "keyshot_headless.exe"
+            args.append(keyshot_exe)
+        else:
+            keyshot_exe = "keyshot"
+            args.append(keyshot_exe)
+            args.append("-headless")
+    else:
+        keyshot_exe = keyshot_exe_env
+        args.append(keyshot_exe)
+
+    args.append("-progress")
+    args.append("-floating_feature")
+    args.append("keyshot2")
+    args.append("-script")
+    args.append(script_path)
+    return args
+
+
+class KeyShotActionsQueue(ActionsQueue):
+    """
+    ActionsQueue that notifies a condition whenever actions are enqueued or dequeued so that the
+    adaptor can wait for the queue to drain without polling.
+
+    The client asks for its next action as soon as it has performed the last one, so the queue also
+    tracks when the client finished each action. on_action_performed is called with the action,
+    the time it waited for the client to ask for it and the time the client spent performing it.
+
+    The adaptor server answers the client's request for an action by calling dequeue_action every
+    10 ms until it returns one. With wait_seconds set, dequeue_action instead waits for an action to
+    be enqueued, so the client receives an action as soon as it is queued and the server stays
+    asleep while there is nothing to do.
+    """
+
+    def __init__(
+        self,
+        condition: threading.Condition,
+        on_action_performed: Callable[[Action, float, float], None] | None = None,
+        wait_seconds: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            condition (threading.Condition): Notified whenever actions are enqueued or dequeued.
+            on_action_performed (Callable[[Action, float, float], None] | None, optional): Called
+                once the client performed an action. Defaults to None.
+            wait_seconds (float, optional): The longest time dequeue_action waits for an action
+                when the queue is empty. Defaults to 0.0, which returns None at once.
+        """
+        super().__init__()
+        self._condition = condition
+        self._on_action_performed = on_action_performed
+        self._wait_seconds = wait_seconds
+        self._enqueued_at: dict[int, float] = {}
+        # The action the client is performing, when it was enqueued and when it was delivered
+        self._delivered: tuple[Action, float, float] | None = None
+        # When the client last finished an action, or first asked for one
+        self._idle_since: float | None = None
+        self.first_request_at: float | None = None
+        # The server answers one request at a time and keeps asking for an action until it has
+        # one, so the request of a client that exited or was forgotten while it waited is answered
+        # with a close action. Otherwise it would hold up the server, and take the first action
+        # meant for the client that replaces it.
+        self._request_waiting = False
+        self._request_forgotten = False
+
+    def enqueue_action(self, a: Action, front: bool = False) -> None:
+        with self._condition:
+            super().enqueue_action(a, front=front)
+            self._enqueued_at[id(a)] = time.monotonic()
+            self._condition.notify_all()
+
+    def dequeue_action(self) -> Optional[Action]:
+        with self._condition:
+            if self._request_forgotten:
+                self._request_forgotten = False
+                return Action("close")
+            self._request_waiting = True
+            now = time.monotonic()
+            if self.first_request_at is None:
+                self.first_request_at = now
+            if self._delivered is not None:
+                # The client asks for another action once it finished performing the last one
+                performed, enqueued_at, delivered_at = self._delivered
+                self._delivered = None
+                if self._on_action_performed is not None:
+                    latency = delivered_at - max(enqueued_at, self._idle_since or enqueued_at)
+                    self._on_action_performed(performed, latency, now - delivered_at)
+                self._idle_since = now
+                self._condition.notify_all()
+            elif self._idle_since is None:
+                self._idle_since = now
+            if self._wait_seconds > 0:
+                self._condition.wait_for(
+                    lambda: len(self) > 0 or self._request_forgotten, timeout=self._wait_seconds
+                )
+                if self._request_forgotten:
+                    self._request_forgotten = False
+                    return Action("close")
+            action = super().dequeue_action()
+            if action is not None:
+                self._request_waiting = False
+                now = time.monotonic()
+                self._delivered = (action, self._enqueued_at.pop(id(action), now), now)
+                self._condition.notify_all()
+            return action
+
+    def forget_client(self) -> None:
+        """
+        Drops the queued actions, forgets the action the client was performing and ends its
+        request for an action, for when the client exited and a new one will be started in its
+        place
+        """
+        with self._condition:
+            self._actions_queue.clear()
+            self._enqueued_at.clear()
+            self._delivered = None
+            self._idle_since = None
+            self.first_request_at = None
+        self.release_waiting_request()
+
+    def release_waiting_request(self) -> None:
+        """
+        Answers the client's request for an action with a close action if it is waiting for one,
+        for when the client exited or the server is shutting down
+        """
+        with self._condition:
+            self._request_forgotten = self._request_forgotten or self._request_waiting
+            self._request_waiting = False
+            self._condition.notify_all()
+
+    @property
+    def is_idle(self) -> bool:
+        """
+        Whether the queue is empty and the client finished performing every action it was given
+        """
+        with self._condition:
+            return len(self._actions_queue) == 0 and self._delivered is None
+
+    def __contains__(self, a: Action) -> bool:
+        with self._condition:
+            return a in self._actions_queue
+
+
+class KeyShotRegexCallback(RegexCallback):
+    """
+    RegexCallback that also lists literal strings, at least one of which is part of every line
+    that its regexes match. KeyShotOutputHandler uses the literals to skip the regexes for lines
+    that cannot match.
+    """
+
+    literals: tuple[str, ...]
+    ignore_case: bool
+
+    def __init__(
+        self,
+        regex_list: Sequence[re.Pattern[str]],
+        callback: Callable[[re.Match], None],
+        literals: Sequence[str],
+        ignore_case: bool = False,
+        exit_if_matched: bool = False,
+        only_run_if_first_matched: bool = False,
+    ) -> None:
+        """
+        Initializes a KeyShotRegexCallback
+
+        Args:
+            regex_list (Sequence[re.Pattern[str]]): A sequence of regex patterns which will invoke
+                the callback if any single regex matches a logged string.
+            callback (Callable[[re.Match], None]): A callable which takes the re.Match object of
+                the pattern that matched as the only argument.
+            literals (Sequence[str]): Strings of which at least one is in every matching line.
+            ignore_case (bool, optional): Whether the literals are matched case insensitively.
+                Defaults to False.
+            exit_if_matched (bool, optional): See RegexCallback. Defaults to False.
+            only_run_if_first_matched (bool, optional): See RegexCallback. Defaults to False.
+        """
+        super().__init__(regex_list, callback, exit_if_matched, only_run_if_first_matched)
+        self.literals = tuple(literal.lower() if ignore_case else literal for literal in literals)
+        self.ignore_case = ignore_case
+
+
+class KeyShotOutputHandler(RegexHandler):
+    """
+    RegexHandler that dispatches each line of KeyShot output in a single pass instead of searching
+    it with the regexes of every callback. Lines that contain none of the callbacks' literals are
+    dropped by a substring check. The remaining lines are scanned once with an alternation of all
+    the literals, and only the callbacks whose literals were found search the line with their
+    regexes. Callbacks are still called in order and with the same matches as RegexHandler.
+    """
+
+    def __init__(
+        self,
+        regex_callbacks: Sequence[RegexCallback],
+        level: int = logging.NOTSET,
+        on_output: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """
+        Args:
+            regex_callbacks (Sequence[RegexCallback]): The callbacks to dispatch lines to.
+            level (int, optional): The level of the handler. Defaults to logging.NOTSET.
+            on_output (Optional[Callable[[str], None]], optional): Called with every line before it
+                is dispatched. Defaults to None.
+        """
+        super().__init__(regex_callbacks, level)
+        self._on_output = on_output
+        # Callbacks without literals cannot be prefiltered and search every line
+        self._always_search = [
+            index
+            for index, regex_callback in enumerate(self.regex_callbacks)
+            if not isinstance(regex_callback, KeyShotRegexCallback)
+        ]
+        literal_callbacks = [
+            (index, regex_callback)
+            for index, regex_callback in enumerate(self.regex_callbacks)
+            if isinstance(regex_callback, KeyShotRegexCallback)
+        ]
+        self._literals = tuple(
+            literal
+            for _, regex_callback in literal_callbacks
+            if not regex_callback.ignore_case
+            for literal in regex_callback.literals
+        )
+        self._ignore_case_literals = tuple(
+            literal
+            for _, regex_callback in literal_callbacks
+            if regex_callback.ignore_case
+            for literal in regex_callback.literals
+        )
+        # A zero width lookahead so that literals which overlap in a line are all found
+        alternatives = []
+        for index, regex_callback in literal_callbacks:
+            pattern = "|".join(re.escape(literal) for literal in regex_callback.literals)
+            if regex_callback.ignore_case:
+                pattern = f"(?i:{pattern})"
+            alternatives.append(f"(?P<callback{index}>{pattern})")
+        self._dispatch_regex = (
+            re.compile(f"(?=(?:{'|'.join(alternatives)}))") if alternatives else None
+        )
+
+    def _might_match(self, msg: str) -> bool:
+        """
+        Returns whether any of the literals is in the message
+        """
+        for literal in self._literals:
+            if literal in msg:
+                return True
+        if self._ignore_case_literals:
+            lower_msg = msg.lower()
+            for literal in self._ignore_case_literals:
+                if literal in lower_msg:
+                    return True
+        return False
+
+    def _get_candidates(self, msg: str) -> list[int]:
+        """
+        Returns the indices of the callbacks whose regexes could match the message, in order
+        """
+        if self._dispatch_regex is None or not self._might_match(msg):
+            return self._always_search
+        candidates = set(self._always_search)
+        for match in self._dispatch_regex.finditer(msg):
+            candidates.add(int(match.lastgroup[len("callback") :]))  # type: ignore[index]
+        return sorted(candidates)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Calls the callbacks whose regexes match the logged line
+
+        Args:
+            record (logging.LogRecord): The log record of the logged string
+        """
+        msg = record.msg
+        if self._on_output is not None:
+            self._on_output(msg)
+        matched = False
+        for index in self._get_candidates(msg):
+            regex_callback = self.regex_callbacks[index]
+            if matched and regex_callback.only_run_if_first_matched:
+                continue
+            if match := regex_callback.get_match(msg):
+                regex_callback.callback(match)
+            if match and regex_callback.exit_if_matched:
+                break
+            matched = matched or match is not None
+
+
+class KeyShotProgressReporter:
+    """
+    Reports render progress from a background thread so that the thread reading KeyShot's output
+    never waits on the status sink. Only the latest progress is kept. It is reported at most once
+    per interval, and only once it has changed by at least min_change percent since the last
+    report. flush reports a value immediately, regardless of either limit.
+    """
+
+    def __init__(
+        self, report: Callable[[float], None], interval: float = 1.0, min_change: float = 1.0
+    ) -> None:
+        """
+        Args:
+            report (Callable[[float], None]): Called with the progress to report.
+            interval (float, optional): The minimum time (in seconds) between reports.
+                Defaults to 1.0.
+            min_change (float, optional): The minimum change (in percent) worth reporting.
+                Defaults to 1.0.
+        """
+        self._report = report
+        self._interval = interval
+        self._min_change = min_change
+        self._condition = threading.Condition()
+        # Held while reporting so that a flush can never be followed by an older value
+        self._report_lock = threading.Lock()
+        self._latest: float | None = None
+        self._last_reported: float | None = None
+        self._last_report_time = float("-inf")
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Starts the thread that reports progress
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="KeyShotProgressReporter", daemon=True
+            )
+            self._thread.start()
 
-_KEYSHOT_RUN_KEYS = {"frame"}
+    def stop(self) -> None:
+        """
+        Stops the reporting thread. Progress that has not been reported yet is dropped.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def update(self, progress: float) -> None:
+        """
+        Records the latest progress for the reporting thread without waiting for it to be reported
+
+        Args:
+            progress (float): The progress in percent.
+        """
+        with self._condition:
+            self._latest = progress
+            self._condition.notify_all()
+
+    def flush(self, progress: float) -> None:
+        """
+        Reports progress immediately, replacing any progress waiting to be reported
+
+        Args:
+            progress (float): The progress in percent.
+        """
+        with self._report_lock:
+            with self._condition:
+                self._latest = None
+            self._report_now(progress)
+
+    def _report_now(self, progress: float) -> None:
+        self._report(progress)
+        self._last_reported = progress
+        self._last_report_time = time.monotonic()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or self._latest is not None)
+                if self._stopped:
+                    return
+                delay = self._last_report_time + self._interval - time.monotonic()
+                if delay > 0:
+                    # Let further updates coalesce until the next report is allowed
+                    self._condition.wait_for(lambda: self._stopped, timeout=delay)
+                    continue
+
+            with self._report_lock:
+                with self._condition:
+                    progress, self._latest = self._latest, None
+                if progress is not None and (
+                    self._last_reported is None
+                    or abs(progress - self._last_reported) >= self._min_change
+                ):
+                    self._report_now(progress)
 
 
 def _check_for_exception(func: Callable) -> Callable:
     """
-    Decorator that checks if an exception has been caught before calling the
-    decorated function
+    Decorator for callbacks that run on the thread reading KeyShot's output. The decorated
+    function is skipped once an exception has been caught, and an exception it raises is caught,
+    so that the exception is raised by the task waiting on KeyShot instead of the reader thread.
     """
 
     @wraps(func)
     def wrapped_func(self, *args, **kwargs):
-        if not self._has_exception:  # Raises if there is an exception  # pragma: no branch
+        if self._exc_info is not None:
+            return None
+        try:
             return func(self, *args, **kwargs)
+        except Exception as e:
+            self._exc_info = e
+            self._notify_state_changed()
+            return None
 
     return wrapped_func
 
@@ -59,8 +726,9 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
 
     _server: AdaptorServer | None = None
     _server_thread: threading.Thread | None = None
-    _keyshot_client: LoggingSubprocess | None = None
-    _action_queue = ActionsQueue()
+    _server_path: str = ""
+    _keyshot_client: LoggingSubprocess | KeyShotPoolLease | None = None
+    _keyshot_monitor_thread: threading.Thread | None = None
     _is_rendering: bool = False
     # If a thread raises an exception we will update this to raise in the main thread
     _exc_info: Exception | None = None
@@ -74,22 +742,101 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
     # Will be optionally changed after the scene is set.
     _expected_outputs: int = 1  # Total number of renders to perform.
     _produced_outputs: int = 0  # Counter for tracking number of complete renders.
+    # When a sequence is rendered in one batch the completed frames are only reported at the end,
+    # so frame boundaries are detected from the per-frame progress restarting instead.
+    _progressed_outputs: int = 0  # Number of frames whose progress has been reported.
+    # KeyShot goes on to the next frame after it reports an error, so the frames that were
+    # rendered before the first error of a task are counted when the error is reported.
+    _outputs_before_error: int | None = None
+    _last_frame_progress: int = 0  # Last progress percentage reported for the current frame.
+    # When the last progress line was seen. KeyShot writes the image after the render reaches 100%.
+    _last_progress_at: float | None = None
+    # Number of actions sent in batches whose results KeyShot has not reported yet
+    _pending_batch_results: int = 0
+    # Whether the render of the current task was canceled
+    _render_canceled: bool = False
+    # Whether KeyShot confirmed that it aborted the render of the current task
+    _render_aborted: bool = False
+
+    def __init__(
+        self,
+        init_data: dict,
+        *,
+        output_prefix: str = "",
+        progress_reporter: Optional[KeyShotProgressReporter] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            init_data (dict): The init data of the session.
+            output_prefix (str, optional): Put before each line of KeyShot output that is logged.
+                Defaults to "".
+            progress_reporter (Optional[KeyShotProgressReporter], optional): Reports the progress
+                of the renders. Defaults to one that reports to the worker agent at the interval
+                set in the init data.
+        """
+        # Imported here and not at module level, since the short lived "daemon run" and "daemon
+        # stop" frontends import this module but never create the adaptor
+        import tempfile
+        import uuid
+
+        from .output_log import KeyShotOutputLog
+        from .telemetry import KeyShotTelemetry
+        from .timings import KeyShotTimings
+        from .watchdog import KeyShotRenderWatchdog
+
+        super().__init__(init_data, **kwargs)
+        # Notified whenever the adaptor's state changes (actions dequeued, render completed,
+        # KeyShot exited, an error was caught) so waits wake up immediately instead of polling.
+        self._state_changed = threading.Condition()
+        self._server_ready = threading.Event()
+        self._timings = KeyShotTimings(self.init_data.get("timings_file"))
+        self._output_log = KeyShotOutputLog(
+            self.init_data.get("log_verbosity"),
+            max_lines=self.init_data.get("output_log_max_lines", 10000),
+            prefix=output_prefix,
+        )
+        self._action_queue = KeyShotActionsQueue(
+            self._state_changed,
+            on_action_performed=self._handle_action_performed,
+            wait_seconds=_ACTION_WAIT_SECONDS,
+        )
+        # Looked up when the first event is recorded, so that the telemetry client is built on the
+        # telemetry thread instead of during session start
+        self._telemetry = KeyShotTelemetry(lambda: self._get_deadline_telemetry_client())
+        self._progress_reporter = progress_reporter or KeyShotProgressReporter(
+            lambda progress: self.update_status(progress=progress),
+            interval=self.init_data.get("progress_report_interval", 1.0),
+            min_change=self.init_data.get("progress_report_min_change", 1.0),
+        )
+        # The KeyShot instances of a session that runs several, which render its frames in place
+        # of a KeyShot of its own, and the progress of the frame each of them is rendering
+        self._instances: list[KeyShotInstance] = []
+        self._instances_lock = threading.Lock()
+        self._instance_progress: list[float] = []
+        self._instance_frames_done = 0
+        # Shares out the frames of the task the instances are rendering, stopped on cancel
+        self._frame_scheduler: Optional[KeyShotFrameScheduler] = None
+        # Created to abort the render of a task, which KeyShot checks for before each frame since it
+        # does not ask for actions while it renders
+        self._abort_file = os.path.join(tempfile.gettempdir(), f"keyshot_abort_{uuid.uuid4().hex}")
+        # When the session started, until the time to its first render is recorded
+        self._session_started_at: Optional[float] = None
+        # Built when the session starts, once the init data is validated
+        self._render_budget: Optional[KeyShotRenderBudget] = None
+        watchdog_config = self.init_data.get("render_watchdog", {})
+        self._watchdog = KeyShotRenderWatchdog(
+            stall_timeout=watchdog_config.get("stall_timeout_seconds"),
+            frame_timeout=watchdog_config.get("frame_timeout_seconds"),
+            median_frame_time_multiplier=watchdog_config.get("median_frame_time_multiplier"),
+            min_timeout=watchdog_config.get("min_timeout_seconds", 60.0),
+            on_change=self._notify_state_changed,
+        )
 
     @property
     def integration_data_interface_version(self) -> SemanticVersion:
         return SemanticVersion(major=0, minor=1)
 
-    @staticmethod
-    def _get_timer(timeout: int | float) -> Callable[[], bool]:
-        """
-        Given a timeout length, returns a lambda which returns False until the timeout occurs.
-
-        Args:
-            timeout (int): The amount of time (in seconds) to wait before timing out.
-        """
-        timeout_time = time.time() + timeout
-        return lambda: time.time() >= timeout_time
-
     @property
     def _has_exception(self) -> bool:
         """Property which checks the private _exc_info property for an exception
@@ -130,11 +877,36 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             value (bool): A boolean indicating if KeyShot is rendering.
         """
         self._is_rendering = value
+        self._notify_state_changed()
+
+    def _notify_state_changed(self) -> None:
+        """
+        Wakes up any thread waiting in _wait_for_state so it re-evaluates its condition.
+        """
+        with self._state_changed:
+            self._state_changed.notify_all()
+
+    def _wait_for_state(
+        self, predicate: Callable[[], bool], timeout: int | float | None = None
+    ) -> bool:
+        """
+        Blocks until the predicate returns True or the timeout expires. The predicate is
+        re-evaluated each time the adaptor state changes.
+
+        Args:
+            predicate (Callable[[], bool]): The condition to wait for.
+            timeout (int | float | None): The maximum time (in seconds) to wait. None waits forever.
+
+        Returns:
+            bool: The last value returned by the predicate, False if the wait timed out.
+        """
+        with self._state_changed:
+            return self._state_changed.wait_for(predicate, timeout=timeout)
 
     def _wait_for_server(self) -> str:
         """
-        Performs a busy wait for the server path that the adaptor server is running on, then
-        returns it.
+        Waits for the adaptor server to signal that it is ready, then returns the server path that
+        it is running on.
 
         Raises:
             RuntimeError: If the server does not finish initializing
@@ -142,9 +914,7 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         Returns:
             str: The server path where the adaptor server is running.
         """
-        is_timed_out = self._get_timer(self._SERVER_START_TIMEOUT_SECONDS)
-        while (self._server is None or self._server.server_path is None) and not is_timed_out():
-            time.sleep(0.01)
+        self._server_ready.wait(timeout=self._SERVER_START_TIMEOUT_SECONDS)
 
         if self._server is not None and self._server.server_path is not None:
             return self._server.server_path
@@ -158,21 +928,21 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         Starts a server with the given ActionsQueue, attaches the server to the adaptor and serves
         forever in a blocking call.
         """
+        start = time.monotonic()
         self._server = AdaptorServer(self._action_queue, self)
+        self._timings.add("server_start", time.monotonic() - start)
+        self._server_ready.set()
         self._server.serve_forever()
 
     def _start_keyshot_server_thread(self) -> None:
         """
-        Starts the KeyShot adaptor server in a thread.
-        Sets the environment variable "KEYSHOT_ADAPTOR_SERVER_PATH" to
-        the server path where the server is running after the server has
-        finished starting.
+        Starts the KeyShot adaptor server in a thread, without waiting for it to be ready. The
+        initialization actions are queued while the server starts.
         """
         self._server_thread = threading.Thread(
             target=self._start_keyshot_server, name="KeyShotAdaptorServerThread"
         )
         self._server_thread.start()
-        os.environ["KEYSHOT_ADAPTOR_SERVER_PATH"] = self._wait_for_server()
 
     @property
     def validators(self) -> AdaptorDataValidators:
@@ -190,9 +960,11 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             list[RegexCallback]: List of Regex Callbacks to add
         """
         if not self._regex_callbacks:
-            callback_list = []
+            callback_list: list[RegexCallback] = []
 
             completed_regexes = [re.compile(".*Finished Rendering.*")]
+            render_started_regexes = [re.compile("Starting Render of ([0-9]+) frame")]
+            render_aborted_regexes = [re.compile("KeyShotClient: Render aborted")]
             progress_regexes = [re.compile(".*Rendering: ([0-9]+)%.*")]
             error_regexes = [re.compile(".*Error: .*|.*\\[Error\\].*", re.IGNORECASE)]
             video_output_error_regexes = [
@@ -200,17 +972,69 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
                     ".*You cannot use EXR, TIFF 32 or PSD for the frames when encoding a movie!.*"
                 )
             ]
+            batch_result_regexes = [
+                re.compile(
+                    "KeyShotClient: Batch action [0-9]+/[0-9]+ (\\S+) (succeeded|failed|skipped)"
+                    "(?: in ([0-9.]+)s)?(?:: (.*))?"
+                )
+            ]
             # Capture the major minor patch version.
             version_regexes = [re.compile("KeyShotClient: KeyShot Version ([0-9]+.[0-9]+.[0-9]+)")]
 
-            callback_list.append(RegexCallback(completed_regexes, self._handle_complete))
-            callback_list.append(RegexCallback(progress_regexes, self._handle_progress))
+            callback_list.append(
+                KeyShotRegexCallback(
+                    completed_regexes, self._handle_complete, literals=["Finished Rendering"]
+                )
+            )
+            callback_list.append(
+                KeyShotRegexCallback(
+                    progress_regexes, self._handle_progress, literals=["Rendering: "]
+                )
+            )
+            callback_list.append(
+                KeyShotRegexCallback(
+                    render_started_regexes,
+                    self._handle_render_started,
+                    literals=["Starting Render of"],
+                )
+            )
+            callback_list.append(
+                KeyShotRegexCallback(
+                    render_aborted_regexes,
+                    self._handle_render_aborted,
+                    literals=["KeyShotClient: Render aborted"],
+                )
+            )
             if self.init_data.get("strict_error_checking", False):
-                callback_list.append(RegexCallback(error_regexes, self._handle_error))
+                callback_list.append(
+                    KeyShotRegexCallback(
+                        error_regexes,
+                        self._handle_error,
+                        literals=["Error: ", "[Error]"],
+                        ignore_case=True,
+                    )
+                )
             callback_list.append(
-                RegexCallback(video_output_error_regexes, self._handle_video_encode_error)
+                KeyShotRegexCallback(
+                    video_output_error_regexes,
+                    self._handle_video_encode_error,
+                    literals=["You cannot use EXR, TIFF 32 or PSD"],
+                )
+            )
+            callback_list.append(
+                KeyShotRegexCallback(
+                    batch_result_regexes,
+                    self._handle_batch_result,
+                    literals=["KeyShotClient: Batch action"],
+                )
+            )
+            callback_list.append(
+                KeyShotRegexCallback(
+                    version_regexes,
+                    self._handle_version,
+                    literals=["KeyShotClient: KeyShot Version"],
+                )
             )
-            callback_list.append(RegexCallback(version_regexes, self._handle_version))
 
             self._regex_callbacks = callback_list
         return self._regex_callbacks
@@ -226,8 +1050,52 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             match (re.Match): The match object from the regex pattern that was matched in the
                               message.
         """
+        if self._last_progress_at is not None:
+            self._timings.add("write", time.monotonic() - self._last_progress_at)
+            self._last_progress_at = None
+        self._produced_outputs += 1
+        self._watchdog.frames_done(max(self._produced_outputs, self._progressed_outputs))
+        if self._produced_outputs < self._expected_outputs:
+            # More frames of the chunk are still to be rendered
+            self._progress_reporter.update(100 * self._produced_outputs / self._expected_outputs)
+            return
+        self._progress_reporter.flush(100)
+        self._watchdog.stop()
+        self._keyshot_is_rendering = False
+
+    def _handle_render_aborted(self, match: re.Match) -> None:
+        """
+        Callback for stdout that indicates KeyShot aborted the render of a task that was canceled.
+
+        Args:
+            match (re.Match): The match object from the regex pattern that was matched in the
+                              message.
+        """
+        self._render_aborted = True
+        self._watchdog.stop()
         self._keyshot_is_rendering = False
-        self.update_status(progress=100)
+
+    def _handle_render_started(self, match: re.Match) -> None:
+        """
+        Callback for stdout that indicates KeyShot started rendering the frames of a task, after
+        loading the scene. Starts the render watchdog.
+        Args:
+            match (re.Match): The match object from the regex pattern that was matched in the
+                              message.
+        """
+        self._watchdog.start(int(match.group(1)))
+        self._record_time_to_first_render()
+
+    def _record_time_to_first_render(self) -> None:
+        """
+        Records the time from the start of the session to the start of its first render in the
+        timings of the task, once per session.
+        """
+        started_at = self._session_started_at
+        if started_at is None:
+            return
+        self._session_started_at = None
+        self._timings.add("time_to_first_render", time.monotonic() - started_at)
 
     @_check_for_exception
     def _handle_progress(self, match: re.Match) -> None:
@@ -242,8 +1110,20 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         percent = parts[-1]
         if percent.endswith("%"):
             percent = percent[0:-1]
-        progress = int(percent)
-        self.update_status(progress=progress)
+        frame_progress = int(percent)
+        self._last_progress_at = time.monotonic()
+        if frame_progress < self._last_frame_progress:
+            # Progress restarted, so KeyShot moved on to the next frame of the chunk
+            self._progressed_outputs += 1
+            self._watchdog.frames_done(max(self._produced_outputs, self._progressed_outputs))
+        self._last_frame_progress = frame_progress
+
+        # Combine the progress of the current frame with the frames already rendered in the chunk
+        completed_outputs = min(
+            max(self._produced_outputs, self._progressed_outputs), self._expected_outputs - 1
+        )
+        progress = (completed_outputs * 100 + frame_progress) / self._expected_outputs
+        self._progress_reporter.update(progress)
 
     def _handle_error(self, match: re.Match) -> None:
         """
@@ -253,9 +1133,12 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
                               message
 
         Raises:
-            RuntimeError: Always raises a runtime error to halt the adaptor.
+            KeyShotRenderError: Always raises a render error to halt the adaptor.
         """
-        self._exc_info = RuntimeError(f"KeyShot Encountered an Error: {match.group(0)}")
+        if self._outputs_before_error is None:
+            self._outputs_before_error = self._produced_outputs
+        self._exc_info = KeyShotRenderError(f"KeyShot Encountered an Error: {match.group(0)}")
+        self._notify_state_changed()
 
     def _handle_video_encode_error(self, match: re.Match) -> None:
         """
@@ -276,6 +1159,123 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             "in KeyShot under Render->Animation->Video Output before submitting.\n"
             "To resolve please uncheck Video Output before submitting again."
         )
+        self._notify_state_changed()
+
+    def _handle_action_performed(self, action: Action, latency: float, performed: float) -> None:
+        """
+        Called by the action queue once KeyShot has performed an action, to record its timings.
+
+        Args:
+            action (Action): The action KeyShot performed.
+            latency (float): The time between the action being available and KeyShot receiving it.
+            performed (float): The time KeyShot spent performing the action.
+        """
+        self._timings.add("action_delivery", latency)
+        if action.name == "batch":
+            # KeyShot reports the time of each action of a batch in its output
+            return
+        self._record_action_time(action.name, performed)
+
+    def _record_action_time(self, name: str, seconds: float) -> None:
+        """
+        Records the time KeyShot spent performing an action.
+
+        Args:
+            name (str): The name of the action.
+            seconds (float): The time KeyShot spent performing the action.
+        """
+        if name == "start_render":
+            # The image write time was measured from KeyShot's output while it rendered
+            self._timings.add("render", seconds - self._timings.get("write"))
+        else:
+            self._timings.add_action(name, seconds)
+
+    def _handle_batch_result(self, match: re.Match) -> None:
+        """
+        Callback for stdout that reports the result of one of the actions of a batch. Records the
+        time of actions that succeeded and the error of an action that failed.
+        Args:
+            match (re.Match): The match object from the regex pattern that was matched in the
+                              message.
+        """
+        name, result, seconds, error = match.groups()
+        if result == "succeeded" and seconds is not None:
+            self._record_action_time(name, float(seconds))
+        elif result == "failed" and self._exc_info is None:
+            self._exc_info = RuntimeError(f"KeyShot failed to perform the {name} action: {error}")
+        with self._state_changed:
+            self._pending_batch_results = max(0, self._pending_batch_results - 1)
+            self._state_changed.notify_all()
+
+    def _enqueue_batch(self, actions: list[Action]) -> None:
+        """
+        Enqueues actions as a single batch action, and counts the results KeyShot will report for
+        them.
+
+        Args:
+            actions (list[Action]): The actions to perform.
+        """
+        if not actions:
+            return
+        with self._state_changed:
+            self._pending_batch_results += len(actions)
+            self._action_queue.enqueue_action(_batch_action(actions))
+
+    @property
+    def _keyshot_is_done(self) -> bool:
+        """
+        Whether KeyShot performed every action it was given and reported the results of every
+        action it was sent in a batch
+        """
+        return self._action_queue.is_idle and self._pending_batch_results == 0
+
+    def _write_timings(self, kind: str) -> None:
+        """
+        Logs a one line summary of the current session or task timings and appends them to the
+        timings file.
+
+        Args:
+            kind (str): What the timings are of, for the log line.
+        """
+        _logger.info(f"KeyShot {kind} timings: {self._timings.summary()}")
+        try:
+            self._timings.write()
+        except OSError as e:
+            _logger.warning(f"Could not write the KeyShot timings file: {e}")
+
+    def _write_keyshot_output(self) -> None:
+        """
+        Writes the recent KeyShot output kept by the output log, including the lines left out of
+        the task log, to the output log file so that a failure can be investigated.
+        """
+        import tempfile
+
+        path = self.init_data.get("output_log_file") or os.path.join(
+            tempfile.gettempdir(), f"keyshot_output_{os.getpid()}.log"
+        )
+        try:
+            lines = self._output_log.write(path)
+        except OSError as e:
+            _logger.warning(f"Could not write the KeyShot output to {path}: {e}")
+            return
+        _logger.info(f"Wrote the last {lines} line(s) of KeyShot output to {path}")
+
+    def _record_task_telemetry(self, frames: int, succeeded: bool) -> None:
+        """
+        Records a performance summary of the task that just ran as a telemetry event
+        """
+        self._telemetry.record(
+            "com.amazon.rum.deadline.adaptor.runtime.task",
+            {
+                "frames": frames,
+                "succeeded": succeeded,
+                "total_seconds": round(self._timings.get("total"), 3),
+                "scene_load_seconds": round(self._timings.get_action("scene_file"), 3),
+                "render_seconds": round(self._timings.get("render"), 3),
+                "write_seconds": round(self._timings.get("write"), 3),
+                "retries": self._timings.get_count("retries"),
+            },
+        )
 
     def _handle_version(self, match: re.Match) -> None:
         """
@@ -295,56 +1295,102 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         Returns:
             str: The path to the keyshot_client.py file.
         """
-        for dir_ in sys.path:
-            path = os.path.join(
-                dir_, "deadline", "keyshot_adaptor", "KeyShotClient", "keyshot_client.py"
-            )
-            if os.path.isfile(path):
-                return path
-        raise FileNotFoundError(
-            "Could not find keyshot_client.py. Check that the "
-            "KeyShotClient package is in one of the "
-            f"following directories: {sys.path[1:]}"
-        )
+        return _get_keyshot_client_path()
 
     def _start_keyshot_client(self) -> None:
         """
-        Starts the keyshot client by launching KeyShot with the keyshot_client.py file.
+        Starts the keyshot client by leasing a warm KeyShot from the host's KeyShot pool if one is
+        configured, or by launching KeyShot with the keyshot_client.py file.
 
         Raises:
             FileNotFoundError: If the keyshot_client.py file or the scene file could not be found.
         """
-        # KeyShot has a bug where it must be started with an absolute path
-        # or the render will hang (on macOS at least). The worker env can set
-        # this varirable to override the path
-        keyshot_exe_env = os.getenv("DEADLINE_KEYSHOT_EXE", "")
-        args = []
-        if not keyshot_exe_env:
-            if sys.platform == "win32":
-                keyshot_exe = "keyshot_headless.exe"
-                args.append(keyshot_exe)
-            else:
-                keyshot_exe = "keyshot"
-                args.append(keyshot_exe)
-                args.append("-headless")
-        else:
-            keyshot_exe = keyshot_exe_env
-            args.append(keyshot_exe)
+        regexhandler = KeyShotOutputHandler(
+            self._get_regex_callbacks(), on_output=self._watchdog.output
+        )
 
-        regexhandler = RegexHandler(self._get_regex_callbacks())
+        self._keyshot_client = self._lease_keyshot_client(regexhandler)
+        if self._keyshot_client is None:
+            self._keyshot_client = _KeyShotSubprocess(
+                keyshot_client_path=self._get_keyshot_client_path(),
+                server_path=self._server_path,
+                logger=self._output_log.logger,
+                output_handler=regexhandler,
+            )
+            scheduling_settings = self._get_scheduling_settings()
+            if scheduling_settings:
+                from .process_scheduling import apply_process_scheduling
+
+                apply_process_scheduling(self._keyshot_client.pid, scheduling_settings)
+        self._keyshot_monitor_thread = threading.Thread(
+            target=self._monitor_keyshot_client,
+            args=(self._keyshot_client,),
+            name="KeyShotMonitorThread",
+            daemon=True,
+        )
+        self._keyshot_monitor_thread.start()
 
-        keyshot_client_path = self._get_keyshot_client_path()
-        args.append("-progress")
-        args.append("-floating_feature")
-        args.append("keyshot2")
-        args.append("-script")
-        args.append(keyshot_client_path)
+    def _get_scheduling_settings(self) -> dict:
+        """
+        Returns the CPU affinity and priorities to launch KeyShot with. The keyshot_scheduling
+        settings of the adaptor configuration apply to every job on the host, and the job's init
+        data can override them one by one.
+        """
+        return {
+            **self.config.config.get("keyshot_scheduling", {}),
+            **self.init_data.get("keyshot_scheduling", {}),
+        }
 
-        self._keyshot_client = LoggingSubprocess(
-            args=args,
-            stdout_handler=regexhandler,
-            stderr_handler=regexhandler,
-        )
+    def _lease_keyshot_client(self, regexhandler: RegexHandler) -> KeyShotPoolLease | None:
+        """
+        Leases an already running KeyShot from the host's KeyShot pool when the worker environment
+        sets DEADLINE_KEYSHOT_POOL_CONNECTION_FILE.
+
+        Args:
+            regexhandler (RegexHandler): The handler to pass the leased KeyShot's output to.
+
+        Returns:
+            KeyShotPoolLease | None: The lease, or None if no pool is configured or available.
+        """
+        pool_connection_file = os.getenv("DEADLINE_KEYSHOT_POOL_CONNECTION_FILE", "")
+        if not pool_connection_file:
+            return None
+
+        from .pool import KeyShotPoolLease, KeyShotPoolUnavailableError
+
+        try:
+            lease = KeyShotPoolLease(
+                pool_connection_file,
+                self._server_path,
+                output_handler=regexhandler,
+                logger=self._output_log.logger,
+            )
+        except (OSError, KeyShotPoolUnavailableError) as e:
+            _logger.warning(
+                f"Could not lease KeyShot from the KeyShot pool, launching KeyShot: {e}"
+            )
+            return None
+        _logger.info(f"Leased warm KeyShot process {lease.pid} from the KeyShot pool")
+        return lease
+
+    def _monitor_keyshot_client(self, keyshot_client: LoggingSubprocess | KeyShotPoolLease) -> None:
+        """
+        Blocks until the KeyShot process exits, or its lease ends, and then releases the request
+        its client left waiting for an action and notifies any waiting threads.
+
+        Args:
+            keyshot_client (LoggingSubprocess | KeyShotPoolLease): The KeyShot process to monitor.
+        """
+        if isinstance(keyshot_client, LoggingSubprocess):
+            # Also waits for the threads that read KeyShot's output, so that once this thread ends
+            # every line KeyShot wrote has been handled. KeyShot does not read its stdin, which
+            # this closes.
+            keyshot_client.wait()
+        else:
+            keyshot_client.wait_for_exit()
+        if keyshot_client is self._keyshot_client:
+            self._action_queue.release_waiting_request()
+        self._notify_state_changed()
 
     def on_start(self) -> None:
         """
@@ -354,70 +1400,584 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         Raises:
             jsonschema.ValidationError: When init_data fails validation against the adaptor schema.
             jsonschema.SchemaError: When the adaptor schema itself is nonvalid.
+            ValueError: If the finish-by time or the frames of render_budget are not valid.
             RuntimeError: If KeyShot did not complete initialization actions due to an exception
             TimeoutError: If KeyShot did not complete initialization actions due to timing out.
             FileNotFoundError: If the keyshot_client.py file could not be found.
             KeyError: If a configuration for the given platform and version does not exist.
         """
+        start = time.monotonic()
+        self._session_started_at = start
         self.validators.init_data.validate(self.init_data)
+        self._render_budget = self._get_render_budget()
         self.update_status(progress=0, status_message="Initializing KeyShot")
-        self._start_keyshot_server_thread()
-        self._populate_action_queue()
-        self._start_keyshot_client()
-
-        is_timed_out = self._get_timer(self._KEYSHOT_START_TIMEOUT_SECONDS)
-        while self._keyshot_is_running and not self._has_exception and len(self._action_queue) > 0:
-            if is_timed_out():
-                raise TimeoutError(
-                    "KeyShot did not complete initialization actions in "
-                    f"{self._KEYSHOT_START_TIMEOUT_SECONDS} seconds and failed to start."
+        succeeded = False
+        try:
+            self._telemetry.start()
+            self._progress_reporter.start()
+            instances = self.init_data.get("keyshot_instances", 1)
+            if instances > 1:
+                with self._timings.time("instances_start"):
+                    self._start_instances(instances)
+            else:
+                self._start_keyshot_server_thread()
+                self._initialize_keyshot()
+
+            self._telemetry.record("com.amazon.rum.deadline.adaptor.runtime.start", {})
+
+            if not self._keyshot_is_done:
+                raise RuntimeError(
+                    "KeyShot encountered an error and was not able to complete initialization "
+                    "actions."
                 )
+            succeeded = True
+        finally:
+            self._timings.add("total", time.monotonic() - start)
+            self._write_timings("session start")
+            self._output_log.flush()
+            if not succeeded:
+                self._write_keyshot_output()
+
+    def _initialize_keyshot(self) -> None:
+        """
+        Starts KeyShot with the initialization actions from the init data queued, and waits until
+        it performed them, exited or failed. The actions are queued while the adaptor server starts,
+        and KeyShot is launched as soon as the server is ready.
 
-            time.sleep(0.1)  # busy wait for keyshot to finish initialization
+        Raises:
+            TimeoutError: If KeyShot did not complete initialization actions in time.
+            FileNotFoundError: If the keyshot_client.py file could not be found.
+            RuntimeError: If the adaptor server does not finish initializing.
+        """
+        self._populate_action_queue()
+        if not self._server_path:
+            with self._timings.time("server_wait"):
+                self._server_path = self._wait_for_server()
+        with self._timings.time("process_spawn"):
+            self._start_keyshot_client()
+        spawned_at = time.monotonic()
+
+        initialized = self._wait_for_state(
+            lambda: not self._keyshot_is_running or self._has_exception or self._keyshot_is_done,
+            timeout=self._KEYSHOT_START_TIMEOUT_SECONDS,
+        )
+        if self._action_queue.first_request_at is not None:
+            self._timings.add(
+                "client_handshake", max(0.0, self._action_queue.first_request_at - spawned_at)
+            )
+        if not initialized:
+            raise TimeoutError(
+                "KeyShot did not complete initialization actions in "
+                f"{self._KEYSHOT_START_TIMEOUT_SECONDS} seconds and failed to start."
+            )
+
+    def _restart_keyshot_if_over_memory_limit(self) -> None:
+        """
+        Restarts KeyShot when its resident memory is over keyshot_memory_limit_mb from the init
+        data. KeyShot's memory can grow over the tasks of a long session until the host swaps.
+        """
+        limit_mb = self.init_data.get("keyshot_memory_limit_mb")
+        if not limit_mb or self._keyshot_client is None:
+            return
+        from .process_memory import get_process_rss
 
-        self._get_deadline_telemetry_client().record_event(
-            event_type="com.amazon.rum.deadline.adaptor.runtime.start", event_details={}
+        rss = get_process_rss(self._keyshot_client.pid)
+        if rss is None:
+            return
+        rss_mb = rss / (1024 * 1024)
+        _logger.debug(f"KeyShot is using {rss_mb:.0f} MB of memory")
+        if rss_mb <= limit_mb:
+            return
+        _logger.info(
+            f"Restarting KeyShot because it is using {rss_mb:.0f} MB of memory, which is over the "
+            f"limit of {limit_mb} MB"
         )
+        with self._timings.time("keyshot_restart"):
+            self._restart_keyshot()
+        _logger.info(f"Restarted KeyShot in {self._timings.get('keyshot_restart'):.3f}s")
+
+    def _wait_for_keyshot_output(self) -> None:
+        """
+        Waits until the output KeyShot wrote before it exited has been handled, so that the frames
+        it finished are counted.
+        """
+        if isinstance(self._keyshot_client, LoggingSubprocess) and self._keyshot_monitor_thread:
+            self._keyshot_monitor_thread.join(timeout=self._KEYSHOT_END_TIMEOUT_SECONDS)
+
+    def _restart_keyshot(self, close: bool = True) -> None:
+        """
+        Closes KeyShot and starts it again with the initialization actions from the init data.
+        The tasks send the rest of their settings, including their scene, with every render.
 
-        if len(self._action_queue) > 0:
+        Args:
+            close (bool, optional): Whether KeyShot is asked to close. A KeyShot that stopped
+                responding is terminated straight away instead. Defaults to True.
+
+        Raises:
+            RuntimeError: If KeyShot did not complete initialization actions.
+            TimeoutError: If KeyShot did not complete initialization actions in time.
+        """
+        keyshot_client = self._keyshot_client
+        if keyshot_client is not None and not close:
+            keyshot_client.terminate(grace_time_s=0)
+        elif keyshot_client is not None:
+            # Closed rather than handed back, so a leased KeyShot is replaced by the pool
+            self._action_queue.enqueue_action(Action("close"), front=True)
+            if not self._wait_for_state(
+                lambda: not self._keyshot_is_running, timeout=self._KEYSHOT_END_TIMEOUT_SECONDS
+            ):
+                _logger.warning("KeyShot did not close to be restarted. Terminating.")
+                keyshot_client.terminate()
+        if keyshot_client is not None and not isinstance(keyshot_client, LoggingSubprocess):
+            keyshot_client.release()
+        if self._keyshot_monitor_thread is not None:
+            self._keyshot_monitor_thread.join(timeout=self._KEYSHOT_END_TIMEOUT_SECONDS)
+
+        with self._state_changed:
+            self._action_queue.forget_client()
+            self._pending_batch_results = 0
+        self._initialize_keyshot()
+        if not self._keyshot_is_done:
             raise RuntimeError(
-                "KeyShot encountered an error and was not able to complete initialization actions."
+                "KeyShot encountered an error and was not able to complete initialization "
+                "actions after it was restarted."
             )
 
     def on_run(self, run_data: dict) -> None:
         """
-        This starts a render in KeyShot for the given frame, scene and layer(s) and
-        performs a busy wait until the render completes.
+        This starts a render in KeyShot for the given frame or chunk of frames, scene and
+        layer(s) and waits until the render of every frame completes.
+
+        Raises:
+            jsonschema.ValidationError: When run_data fails validation against the adaptor schema.
+            ValueError: If the frames in run_data are not a valid frame range expression, or if
+                neither init_data nor run_data give a scene file.
+            KeyShotNotRunningError: If KeyShot is not running or exits during the render.
+            KeyShotRenderHungError: If the render goes over the limits of the render watchdog.
+            KeyShotRenderCanceledError: If the render is canceled.
+            TimeoutError: If KeyShot is restarted and does not start in time.
+            RuntimeError: If KeyShot is restarted and fails to start.
         """
 
-        if not self._keyshot_is_running:
+        if not self._instances and not self._keyshot_is_running:
             raise KeyShotNotRunningError("Cannot render because KeyShot is not running.")
 
-        run_data["frame"] = int(run_data["frame"])
+        if "frame" in run_data:
+            run_data["frame"] = int(run_data["frame"])
         self.validators.run_data.validate(run_data)
-        self._is_rendering = True
+        if "scene_file" not in run_data and "scene_file" not in self.init_data:
+            raise ValueError("A scene_file must be given in either the init data or the run data.")
+        run_data["frames"] = _parse_frames(run_data.pop("frame", run_data.get("frames")))
+
+        self._expected_outputs = len(run_data["frames"])
+
+        self._timings.start_task()
+        start = time.monotonic()
+        succeeded = False
+        self._render_canceled = False
+        self._remove_abort_file()
+        try:
+            if self._instances:
+                self._render_on_instances(run_data)
+            else:
+                self._render_on_keyshot(run_data)
+            succeeded = self._exc_info is None
+        finally:
+            self._watchdog.stop()
+            self._remove_abort_file()
+            self._timings.add("total", time.monotonic() - start)
+            self._write_timings("task")
+            self._record_task_telemetry(len(run_data["frames"]), succeeded)
+            self._output_log.flush()
+            if not succeeded:
+                self._write_keyshot_output()
+
+    def _render_on_keyshot(self, run_data: dict) -> None:
+        """
+        Renders the frames of a task on the session's KeyShot. When KeyShot exits or reports an
+        error during the render, and render_retry in the init data allows it, KeyShot is restarted
+        after a backoff and the frames that were not rendered are rendered again.
 
-        for name in _KEYSHOT_RUN_KEYS:
-            if name in run_data:
-                self._action_queue.enqueue_action(Action(name, {name: run_data[name]}))
+        Args:
+            run_data (dict): The run data of the task, with its frames parsed.
 
-        self._action_queue.enqueue_action(Action("start_render", {"frame": run_data["frame"]}))
+        Raises:
+            KeyShotNotRunningError: If KeyShot exits during the render more often than retried.
+            KeyShotRenderError: If KeyShot reports an error more often than retried.
+            KeyShotRenderCanceledError: If the render is canceled, including during a backoff.
+        """
+        retry = self.init_data.get("render_retry", {})
+        max_retries = retry.get("max_retries", 0)
+        frames = run_data["frames"]
+        for attempt in range(max_retries + 1):
+            try:
+                self._render_frames_on_keyshot({**run_data, "frames": frames})
+                return
+            except (KeyShotNotRunningError, KeyShotRenderError) as e:
+                if attempt == max_retries:
+                    raise
+                error = e
+            if not self._keyshot_is_running:
+                self._wait_for_keyshot_output()
+            rendered = self._produced_outputs
+            if self._outputs_before_error is not None:
+                rendered = self._outputs_before_error
+            frames = frames[rendered:]
+            if not frames:
+                # Every frame was rendered before KeyShot failed
+                raise error
+            backoff = min(
+                retry.get("backoff_seconds", 5.0) * 2**attempt,
+                retry.get("max_backoff_seconds", 60.0),
+            )
+            _logger.warning(
+                f"{error} Restarting KeyShot to render the {len(frames)} frame(s) left, starting "
+                f"with frame {frames[0]}, in {backoff:g}s (retry {attempt + 1} of {max_retries})"
+            )
+            self._timings.count("retries")
+            with self._timings.time("retry_backoff"):
+                if self._wait_for_state(lambda: self._render_canceled, timeout=backoff):
+                    raise KeyShotRenderCanceledError(
+                        "The render was canceled before it was retried."
+                    )
+            with self._state_changed:
+                self._exc_info = None
+                self._outputs_before_error = None
+            with self._timings.time("keyshot_restart"):
+                self._restart_keyshot(close=False)
+            self._expected_outputs = len(frames)
+
+    def _render_frames_on_keyshot(self, run_data: dict) -> None:
+        """
+        Renders the frames of a task on the session's KeyShot once and waits until KeyShot has
+        performed every action of the task.
+
+        Args:
+            run_data (dict): The run data of the task, with its frames parsed.
 
-        while self._keyshot_is_rendering and not self._has_exception:
-            time.sleep(0.1)  # busy wait so that on_cleanup is not called
+        Raises:
+            KeyShotNotRunningError: If KeyShot exits during the render.
+        """
+        start = time.monotonic()
+        self._restart_keyshot_if_over_memory_limit()
+
+        # Sent as one batch so that KeyShot receives the whole task in a single exchange
+        actions = [
+            Action(name, {name: run_data[name]}) for name in _KEYSHOT_RUN_KEYS if name in run_data
+        ]
+        budget = self._render_budget
+        frame_time_limit = 0.0
+        if budget is not None:
+            frame_time_limit = self._get_frame_time_limit(budget, len(run_data["frames"]))
+            render_options = {
+                **self.init_data.get("render_options", {}),
+                "render_mode": "MAX_TIME",
+                "max_time_seconds": frame_time_limit,
+            }
+            actions.append(Action("render_options", {"render_options": render_options}))
+        actions.append(
+            Action("start_render", {"frames": run_data["frames"], "abort_file": self._abort_file})
+        )
+        self._render(actions)
+        # KeyShot returns from start_render once the last image is written
+        self._wait_for_state(
+            lambda: not self._keyshot_is_running or self._has_exception or self._keyshot_is_done
+        )
+
+        if self._render_canceled:
+            if self._keyshot_is_running:
+                raise KeyShotRenderCanceledError(
+                    "The render was canceled. KeyShot was kept running for the next task."
+                )
+            raise KeyShotRenderCanceledError("The render was canceled and KeyShot was stopped.")
 
-        if not self._keyshot_is_running and self._keyshot_client:  # Client will always exist here.
-            #  This is always an error case because the KeyShot Client should still be running and
-            #  waiting for the next command. If the thread finished, then we cannot continue
+        # Client will always exist here.
+        if not self._keyshot_is_running and self._keyshot_client:
+            #  This is always an error case because the KeyShot Client should still be running
+            #  and waiting for the next command. If the thread finished, then we cannot continue
             exit_code = self._keyshot_client.returncode
             raise KeyShotNotRunningError(
-                "KeyShot exited early and did not render successfully, please check render logs. "
-                f"Exit code {exit_code}"
+                "KeyShot exited early and did not render successfully, please check render "
+                f"logs. Exit code {exit_code}"
+            )
+        if budget is not None:
+            budget.frames_rendered(
+                len(run_data["frames"]), time.monotonic() - start, frame_time_limit
+            )
+
+    def _get_render_budget(self) -> Optional[KeyShotRenderBudget]:
+        """
+        Returns the render budget of render_budget from the init data, or None if it does not set a
+        finish-by time. The frames of the job are assumed to be shared out evenly among the
+        workers that render it at once.
+
+        Raises:
+            ValueError: If the finish-by time or the frames of the job are not valid.
+        """
+        budget = self.init_data.get("render_budget", {})
+        if not budget.get("finish_by"):
+            return None
+        from .budget import KeyShotRenderBudget, parse_finish_by
+
+        finish_by = parse_finish_by(budget["finish_by"])
+        job_frames = len(_parse_frames(budget["frames"])) * budget.get("scenes", 1)
+        frames = math.ceil(job_frames / budget.get("workers", 1))
+        _logger.info(
+            f"Rendering {frames} of the {job_frames} frame(s) of the job by "
+            f"{budget['finish_by']}"
+        )
+        return KeyShotRenderBudget(
+            finish_by, frames, min_frame_seconds=budget.get("min_frame_seconds", 1.0)
+        )
+
+    def _get_frame_time_limit(self, budget: KeyShotRenderBudget, frames: int) -> float:
+        """
+        Returns the render time limit of the frames of the task about to start, and logs it
+
+        Args:
+            budget (KeyShotRenderBudget): The render budget of the session.
+            frames (int): The number of frames of the task.
+        """
+        limit = budget.frame_time_limit(frames)
+        seconds_left = budget.seconds_left
+        if seconds_left <= 0:
+            _logger.warning(
+                f"The finish-by time has passed. Rendering each frame for the minimum of {limit:g}s"
+            )
+        else:
+            _logger.info(
+                f"Rendering each frame for {limit:g}s to render "
+                f"{budget.frames_left(frames)} frame(s) in the {seconds_left:.0f}s "
+                "left until the finish-by time"
+            )
+        return limit
+
+    def _start_instances(self, count: int) -> None:
+        """
+        Starts the KeyShot instances of a session that runs several, side by side.
+
+        Args:
+            count (int): The number of instances.
+
+        Raises:
+            Exception: The first exception raised by an instance while it started.
+        """
+        # Imported here since the instances module imports this one
+        from .instances import KeyShotInstance, get_instance_init_data
+
+        scheduling = self._get_scheduling_settings()
+        self._instance_progress = [0.0] * count
+        self._instances = [
+            KeyShotInstance(
+                get_instance_init_data(self.init_data, scheduling, index, count),
+                index,
+                self._handle_instance_progress,
+                self.config,
+                path_mapping_data=self._path_mapping_data,
+            )
+            for index in range(count)
+        ]
+        _logger.info(f"Starting {count} KeyShot instances")
+        self._run_on_instances(lambda instance: instance.on_start())
+        self._keyshot_version = self._instances[0]._keyshot_version
+
+    def _run_on_instances(self, func: Callable[[KeyShotInstance], None]) -> None:
+        """
+        Calls a function with each KeyShot instance, each in a thread of its own, and waits for
+        all of the calls to return.
+
+        Args:
+            func (Callable[[KeyShotInstance], None]): The function to call.
+
+        Raises:
+            Exception: The first exception raised by any of the calls.
+        """
+        errors: list[Exception] = []
+
+        def run(instance: KeyShotInstance) -> None:
+            try:
+                func(instance)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(
+                target=run, args=(instance,), name=f"KeyShotInstance{instance.index + 1}"
+            )
+            for instance in self._instances
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _render_on_instances(self, run_data: dict) -> None:
+        """
+        Renders the frames of a task on the session's KeyShot instances, one frame at a time,
+        sharing the frames out among them by work stealing.
+
+        Args:
+            run_data (dict): The run data of the task, with its frames parsed.
+
+        Raises:
+            Exception: The first exception raised by an instance while it rendered a frame. The
+                other instances finish the frame they are rendering and stop.
+            KeyShotRenderCanceledError: If the render is canceled. The instances stop before their
+                next frame and are kept running for the next task.
+        """
+        from .instances import KeyShotFrameScheduler
+
+        frames = run_data["frames"]
+        scheduler = KeyShotFrameScheduler(frames, len(self._instances))
+        self._frame_scheduler = scheduler
+        frame_run_data = {name: value for name, value in run_data.items() if name != "frames"}
+        rendered = [0] * len(self._instances)
+        with self._instances_lock:
+            self._instance_frames_done = 0
+            self._instance_progress = [0.0] * len(self._instances)
+
+        def render(instance: KeyShotInstance) -> None:
+            try:
+                while (
+                    not self._render_canceled
+                    and (frame := scheduler.next_frame(instance.index)) is not None
+                ):
+                    previous_task = instance._timings.task
+                    try:
+                        instance.on_run({**frame_run_data, "frame": frame})
+                    finally:
+                        task = instance._timings.task
+                        if task is not None and task is not previous_task:
+                            # The session measures its own total and time to first render
+                            self._timings.merge(
+                                {
+                                    name: value
+                                    for name, value in task.items()
+                                    if name not in ("total", "time_to_first_render")
+                                }
+                            )
+                    rendered[instance.index] += 1
+                    with self._instances_lock:
+                        self._instance_frames_done += 1
+                        self._instance_progress[instance.index] = 0.0
+            except Exception:
+                scheduler.stop()
+                raise
+
+        try:
+            self._run_on_instances(render)
+        finally:
+            self._frame_scheduler = None
+        if self._render_canceled:
+            raise KeyShotRenderCanceledError(
+                "The render was canceled. The KeyShot instances were kept running for the next "
+                "task."
+            )
+        self._progress_reporter.flush(100)
+        _logger.info(
+            f"Rendered {len(frames)} frame(s) on {len(self._instances)} KeyShot instances, "
+            f"{'/'.join(str(count) for count in rendered)} frame(s) each. "
+            f"{scheduler.stolen_frames} frame(s) were stolen from another instance."
+        )
+
+    def _handle_instance_progress(self, index: int, progress: float) -> None:
+        """
+        Called by a KeyShot instance with the progress of the frame it is rendering, to report the
+        combined progress of the task.
+
+        Args:
+            index (int): The index of the instance.
+            progress (float): The progress of the frame the instance is rendering.
+        """
+        with self._instances_lock:
+            self._instance_progress[index] = progress
+            self._record_time_to_first_render()
+            combined = (
+                100 * self._instance_frames_done + sum(self._instance_progress)
+            ) / self._expected_outputs
+        self._progress_reporter.update(min(combined, 100.0))
+
+    def _render(self, actions: list[Action]) -> None:
+        """
+        Sends the actions of a task to KeyShot and waits until KeyShot finishes rendering, exits
+        or fails. When the render watchdog finds that the render hung, KeyShot is stopped early
+        and, if on_hang is "restart", restarted to render the task once more.
+
+        Args:
+            actions (list[Action]): The actions of the task, ending with start_render.
+
+        Raises:
+            KeyShotRenderHungError: If the render hung and KeyShot was not restarted, or the render
+                hung again after KeyShot was restarted.
+        """
+        restarted = False
+        while True:
+            self._produced_outputs = 0
+            self._outputs_before_error = None
+            self._progressed_outputs = 0
+            self._last_frame_progress = 0
+            self._last_progress_at = None
+            self._render_aborted = False
+            self._is_rendering = True
+            self._enqueue_batch(actions)
+
+            hang = self._wait_for_render()
+            if hang is None:
+                return
+            _logger.error(f"The KeyShot render hung. {hang}")
+            on_hang = self.init_data.get("render_watchdog", {}).get("on_hang", "fail")
+            if restarted or on_hang != "restart":
+                if self._keyshot_client is not None:
+                    self._keyshot_client.terminate(grace_time_s=0)
+                raise KeyShotRenderHungError(f"The KeyShot render hung. {hang}")
+            with self._timings.time("keyshot_restart"):
+                self._restart_keyshot(close=False)
+            _logger.info(
+                f"Restarted KeyShot in {self._timings.get('keyshot_restart'):.3f}s to render the "
+                "task again"
             )
+            restarted = True
+
+    def _wait_for_render(self) -> str | None:
+        """
+        Waits until KeyShot finishes rendering, exits or fails, or the render watchdog finds that
+        the render hung. The watchdog is only checked when the render could have gone over one of
+        its limits, and the wait starts over when the render starts or a frame completes.
+
+        Returns:
+            str | None: How the render hung, or None if it did not.
+        """
+        while True:
+            revision = self._watchdog.revision
+            if self._wait_for_state(
+                lambda: not self._keyshot_is_rendering
+                or self._has_exception
+                or self._watchdog.revision != revision,
+                timeout=self._watchdog.seconds_until_check(),
+            ):
+                if self._watchdog.revision == revision:
+                    return None
+                continue
+            hang = self._watchdog.check()
+            if hang is not None:
+                return hang
 
     def on_stop(self) -> None:
         """ """
-        self._action_queue.enqueue_action(Action("close"), front=True)
+        for instance in self._instances:
+            instance.on_stop()
+        self._action_queue.enqueue_action(self._get_close_action(), front=True)
+
+    def _get_close_action(self) -> Action:
+        """
+        Returns the action that ends the session in KeyShot. A launched KeyShot is closed, while a
+        KeyShot leased from the KeyShot pool is handed back to the pool.
+        """
+        if self._keyshot_client is None or isinstance(self._keyshot_client, LoggingSubprocess):
+            return Action("close")
+        return self._keyshot_client.return_action
 
     def on_cleanup(self):
         """
@@ -425,10 +1985,26 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
         """
         self._performing_cleanup = True
 
-        self._action_queue.enqueue_action(Action("close"), front=True)
-        is_timed_out = self._get_timer(self._KEYSHOT_END_TIMEOUT_SECONDS)
-        while self._keyshot_is_running and not is_timed_out():
-            time.sleep(0.1)
+        if self._instances:
+            try:
+                self._run_on_instances(lambda instance: instance.on_cleanup())
+            except Exception as e:
+                _logger.error(f"Failed to clean up a KeyShot instance: {e}")
+
+        close_action = self._get_close_action()
+        self._action_queue.enqueue_action(close_action, front=True)
+        if self._keyshot_client is not None and not isinstance(
+            self._keyshot_client, LoggingSubprocess
+        ):
+            # Wait for the leased KeyShot to reconnect to its pool before ending the lease
+            self._wait_for_state(
+                lambda: not self._keyshot_is_running or close_action not in self._action_queue,
+                timeout=self._KEYSHOT_END_TIMEOUT_SECONDS,
+            )
+            self._keyshot_client.release()
+        self._wait_for_state(
+            lambda: not self._keyshot_is_running, timeout=self._KEYSHOT_END_TIMEOUT_SECONDS
+        )
         if self._keyshot_is_running and self._keyshot_client:
             _logger.error(
                 "KeyShot did not complete cleanup actions and failed to gracefully shutdown. "
@@ -436,6 +2012,11 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             )
             self._keyshot_client.terminate()
 
+        if self._server_thread and self._server_thread.is_alive():
+            # The server is still starting when the session failed before KeyShot was launched
+            self._server_ready.wait(timeout=self._SERVER_START_TIMEOUT_SECONDS)
+        # The server cannot shut down while it waits for an action for a client that is gone
+        self._action_queue.release_waiting_request()
         if self._server:
             self._server.shutdown()
 
@@ -444,34 +2025,100 @@ class KeyShotAdaptor(Adaptor[AdaptorConfiguration]):
             if self._server_thread.is_alive():
                 _logger.error("Failed to shutdown the KeyShot Adaptor server.")
 
+        self._remove_abort_file()
+        self._output_log.flush()
+        self._progress_reporter.stop()
+        self._telemetry.stop()
         self._performing_cleanup = False
 
     def on_cancel(self):
         """
-        Cancels the current render if KeyShot is rendering.
+        Cancels the current render if KeyShot is rendering. KeyShot is asked to abort the render
+        before its next frame, so that it stays running with the scene loaded for the next task.
+        It is terminated if it does not abort the render within cancel_timeout_seconds of the init
+        data, if it renders the frames of the task as one sequence, or if it is not rendering a
+        task. A session that runs several KeyShot instances stops handing out frames, and cancels
+        the instances that are rendering.
         """
         _logger.info("CANCEL REQUESTED")
+        # Also stops a task that is waiting to retry its render
+        with self._state_changed:
+            self._render_canceled = True
+            self._state_changed.notify_all()
+        if self._instances:
+            scheduler = self._frame_scheduler
+            if scheduler is not None:
+                scheduler.stop()
+            # The instances that are between frames are left running for the next task
+            self._run_on_instances(
+                lambda instance: instance.on_cancel() if instance._is_rendering else None
+            )
+            return
         if not self._keyshot_client or not self._keyshot_is_running:
             _logger.info("Nothing to cancel because KeyShot is not running")
             return
 
+        timeout = self.init_data.get("cancel_timeout_seconds", 30)
+        # A sequence renders in one call, so KeyShot cannot abort it before its next frame
+        sequence = (
+            self.init_data.get("frame_render_mode") == "SEQUENCE" and self._expected_outputs > 1
+        )
+        if self._is_rendering and timeout > 0 and not sequence:
+            start = time.monotonic()
+            with open(self._abort_file, "w"):
+                pass
+            if self._wait_for_state(lambda: not self._keyshot_is_rendering, timeout=timeout):
+                if self._render_aborted:
+                    _logger.info(
+                        f"KeyShot aborted the render {time.monotonic() - start:.3f}s after the "
+                        "cancel and was kept running"
+                    )
+                else:
+                    _logger.info(
+                        f"KeyShot finished the render {time.monotonic() - start:.3f}s after the "
+                        "cancel, before it checked for the abort, and was kept running"
+                    )
+                return
+            _logger.warning(
+                f"KeyShot did not abort the render within {timeout}s of the cancel. Terminating."
+            )
+        elif self._is_rendering and sequence:
+            _logger.info("KeyShot is rendering the task as one sequence. Terminating.")
         self._keyshot_client.terminate(grace_time_s=0)
 
+    def _remove_abort_file(self) -> None:
+        """
+        Removes the file that aborts the render, so that the next task renders
+        """
+        try:
+            os.remove(self._abort_file)
+        except FileNotFoundError:
+            pass
+
     def _populate_action_queue(self) -> None:
         """
         Populates the adaptor server's action queue with actions from the init_data that the KeyShot
         Client will request and perform. The action must be present in the _FIRST_KEYSHOT_ACTIONS
-        set to be added to the action queue.
+        set to be added to the action queue. The actions are sent as a single batch.
         """
-        for name in _FIRST_KEYSHOT_ACTIONS:
-            if name in self.init_data:
-                self._action_queue.enqueue_action(Action(name, {name: self.init_data[name]}))
+        self._enqueue_batch(
+            [
+                Action(name, {name: self.init_data[name]})
+                for name in _FIRST_KEYSHOT_ACTIONS
+                if name in self.init_data
+            ]
+        )
 
     def _get_deadline_telemetry_client(self):
         """
         Wrapper around the Deadline Client Library telemetry client, in order to set package-specific information
         """
         if not self._telemetry_client:
+            # Imported here since the Deadline client library pulls in boto3, which would slow down
+            # every adaptor process, including the short lived "daemon run" and "daemon stop" ones.
+            from deadline.client.api import get_deadline_cloud_library_telemetry_client
+            from openjd.adaptor_runtime._version import version as openjd_adaptor_version
+
             self._telemetry_client = get_deadline_cloud_library_telemetry_client()
             self._telemetry_client.update_common_details(
                 {
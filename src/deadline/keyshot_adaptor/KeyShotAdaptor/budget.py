@@ -0,0 +1,110 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Spreads a wall-clock budget over the frames of a session, so that a job with a delivery time
+renders each frame for as long as the time left allows instead of for a fixed number of samples.
+
+The time limit of each frame is the time left until the deadline shared out over the frames the
+session has left to render, less the time a frame takes beyond its render time limit (opening the
+scene, writing the image and so on), as measured on the frames rendered so far.
+"""
+from __future__ import annotations
+
+import math
+import statistics
+import time
+from datetime import datetime
+from typing import Callable
+
+
+def parse_finish_by(finish_by: str) -> float:
+    """
+    Parses a finish-by time in ISO 8601 format, such as "2024-05-01T18:00:00+00:00". Times without
+    a time zone are in the local time zone of the host.
+
+    Args:
+        finish_by (str): The finish-by time.
+
+    Raises:
+        ValueError: If the time is not valid.
+
+    Returns:
+        float: The finish-by time as a POSIX timestamp.
+    """
+    # datetime.fromisoformat only accepts a "Z" suffix from Python 3.11
+    if finish_by.endswith(("Z", "z")):
+        finish_by = f"{finish_by[:-1]}+00:00"
+    return datetime.fromisoformat(finish_by).timestamp()
+
+
+class KeyShotRenderBudget:
+    """
+    Works out the render time limit of the frames of each task of a session from the time left
+    until the deadline, the frames left to render and the frame times seen so far.
+    """
+
+    def __init__(
+        self,
+        finish_by: float,
+        frames: int,
+        min_frame_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Args:
+            finish_by (float): The POSIX timestamp every frame must be rendered by.
+            frames (int): The number of frames the session is expected to render.
+            min_frame_seconds (float, optional): The shortest render time limit of a frame, which
+                applies once the deadline can no longer be met. Defaults to 1.0.
+            clock (Callable[[], float], optional): Returns the current POSIX timestamp. Defaults to
+                time.time.
+        """
+        self._finish_by = finish_by
+        self._frames = frames
+        self._min_frame_seconds = min_frame_seconds
+        self._clock = clock
+        self._frames_rendered = 0
+        self._frame_overheads: list[float] = []
+
+    @property
+    def seconds_left(self) -> float:
+        """The time left until the deadline, which is negative once it has passed"""
+        return self._finish_by - self._clock()
+
+    def frames_left(self, frames: int) -> int:
+        """
+        Returns the number of frames the session is expected to have left to render, including
+        those of the task about to start
+
+        Args:
+            frames (int): The number of frames of the task about to start.
+        """
+        return max(self._frames - self._frames_rendered, frames)
+
+    def frame_time_limit(self, frames: int) -> float:
+        """
+        Returns the render time limit of the frames of the task about to start
+
+        Args:
+            frames (int): The number of frames of the task.
+
+        Returns:
+            float: The limit in seconds.
+        """
+        overhead = statistics.median(self._frame_overheads) if self._frame_overheads else 0.0
+        limit = self.seconds_left / self.frames_left(frames) - overhead
+        return max(self._min_frame_seconds, math.floor(limit))
+
+    def frames_rendered(self, frames: int, seconds: float, limit: float) -> None:
+        """
+        Records the frames of a task that rendered, to measure how long frames take beyond their
+        render time limit
+
+        Args:
+            frames (int): The number of frames of the task.
+            seconds (float): The time the task took.
+            limit (float): The render time limit the frames of the task had.
+        """
+        if frames <= 0:
+            return
+        self._frames_rendered += frames
+        self._frame_overheads.append(max(0.0, seconds / frames - limit))
@@ -0,0 +1,177 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Runs several KeyShot processes in one adaptor session, so that a host with many cores renders
+several small frames at once instead of one frame that does not use all of its cores.
+
+Each KeyShot instance is a KeyShotAdaptor of its own, with its own adaptor server, action queue
+and KeyShot process, that reports its progress to the session instead of to the worker agent. The
+session shares out the frames of each task among the instances with KeyShotFrameScheduler.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Optional
+
+from openjd.adaptor_runtime.adaptors.configuration import AdaptorConfiguration
+
+from .adaptor import KeyShotAdaptor, KeyShotProgressReporter
+from .process_scheduling import get_scheduled_cpus
+
+# Settings of the session that do not apply to its instances
+_SESSION_ONLY_KEYS = ("keyshot_instances", "timings_file")
+
+
+class KeyShotFrameScheduler:
+    """
+    Shares out the frames of a task among KeyShot instances by work stealing. Each instance is
+    given a contiguous block of the frames, which it renders in order, and an instance that runs
+    out of frames takes the last frame of the block with the most frames left. Instances that
+    render faster end up rendering more of the frames, without every frame having to be handed
+    out from a single queue.
+    """
+
+    def __init__(self, frames: list[int], instances: int) -> None:
+        """
+        Args:
+            frames (list[int]): The frames of the task.
+            instances (int): The number of instances that render the frames.
+        """
+        self._lock = threading.Lock()
+        self._blocks = [
+            deque(frames[index * len(frames) // instances : (index + 1) * len(frames) // instances])
+            for index in range(instances)
+        ]
+        self._stopped = False
+        self.stolen_frames = 0
+
+    def next_frame(self, instance: int) -> Optional[int]:
+        """
+        Returns the next frame for an instance to render
+
+        Args:
+            instance (int): The index of the instance.
+
+        Returns:
+            Optional[int]: The frame, or None if no frames are left or the scheduler was stopped.
+        """
+        with self._lock:
+            if self._stopped:
+                return None
+            block = self._blocks[instance]
+            if block:
+                return block.popleft()
+            victim = max(self._blocks, key=len)
+            if not victim:
+                return None
+            self.stolen_frames += 1
+            return victim.pop()
+
+    def stop(self) -> None:
+        """
+        Stops handing out frames, for when the task failed
+        """
+        with self._lock:
+            self._stopped = True
+
+
+def get_instance_init_data(
+    init_data: dict, scheduling: dict[str, Any], index: int, count: int
+) -> dict:
+    """
+    Returns the init data of one of the KeyShot instances of a session. When the session pins
+    KeyShot to a set of CPUs, each instance is pinned to its own share of them. Each instance
+    renders with as many threads as it has CPUs, unless the init data sets render_threads.
+
+    Args:
+        init_data (dict): The init data of the session.
+        scheduling (dict[str, Any]): The scheduling settings of the session.
+        index (int): The index of the instance.
+        count (int): The number of instances.
+
+    Returns:
+        dict: The init data of the instance.
+    """
+    instance_init_data = {
+        name: value for name, value in init_data.items() if name not in _SESSION_ONLY_KEYS
+    }
+    if "render_budget" in init_data:
+        # Each instance renders its own share of the session's frames
+        instance_init_data["render_budget"] = {
+            **init_data["render_budget"],
+            "workers": init_data["render_budget"].get("workers", 1) * count,
+        }
+    if "output_log_file" in init_data:
+        root, ext = os.path.splitext(init_data["output_log_file"])
+        instance_init_data["output_log_file"] = f"{root}_{index + 1}{ext}"
+
+    try:
+        cpus = sorted(get_scheduled_cpus(scheduling) or [])
+    except (OSError, ValueError):
+        # Logged when the settings are applied
+        cpus = []
+    instance_cpus = cpus[index * len(cpus) // count : (index + 1) * len(cpus) // count]
+    if instance_cpus:
+        instance_init_data["keyshot_scheduling"] = {
+            **scheduling,
+            "cpus": ",".join(str(cpu) for cpu in instance_cpus),
+        }
+    instance_init_data.setdefault(
+        "render_threads", len(instance_cpus) or max(1, (os.cpu_count() or 1) // count)
+    )
+    return instance_init_data
+
+
+class _DiscardedTelemetry:
+    """
+    A telemetry sink that drops its events, since the session records telemetry for the whole of
+    each task
+    """
+
+    def record_event(self, event_type: str, event_details: dict[str, Any]) -> None:
+        pass
+
+
+class KeyShotInstance(KeyShotAdaptor):
+    """
+    One of the KeyShot processes of a session that runs several. Renders the frames the session
+    gives it one at a time, and reports its progress to the session.
+    """
+
+    def __init__(
+        self,
+        init_data: dict,
+        index: int,
+        on_progress: Callable[[int, float], None],
+        config: AdaptorConfiguration,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            init_data (dict): The init data of the instance.
+            index (int): The index of the instance in its session.
+            on_progress (Callable[[int, float], None]): Called with the index of the instance and
+                the progress of the frame it is rendering.
+            config (AdaptorConfiguration): The adaptor configuration of the session, which would
+                otherwise be looked up under the name of this class.
+        """
+        super().__init__(
+            init_data,
+            output_prefix=f"[KeyShot {index + 1}] ",
+            # Every update is passed on, since the session reports the combined progress at its
+            # own interval
+            progress_reporter=KeyShotProgressReporter(
+                lambda progress: on_progress(index, progress), interval=0, min_change=0
+            ),
+            **kwargs,
+        )
+        self._config = config
+        self.index = index
+
+    def _write_timings(self, kind: str) -> None:
+        # The session adds the timings of each frame to those of its task, and logs and writes them
+        pass
+
+    def _get_deadline_telemetry_client(self):
+        return _DiscardedTelemetry()
@@ -0,0 +1,173 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Compacts KeyShot's output before it is written to the task log.
+
+Every line of output is kept in a bounded buffer, which is written to a file when a session or task
+fails, while the task log only receives the lines allowed by the verbosity of their category. In
+compact categories a run of lines that differ only in their numbers, such as KeyShot's
+"Rendering: N%" progress, is collapsed into its first and last line.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+# The categories of KeyShot output and how much of each is logged by default
+DEFAULT_LOG_VERBOSITY = {
+    "progress": "compact",
+    "render_options": "compact",
+    "client": "all",
+    "output": "all",
+}
+LOG_VERBOSITIES = ("all", "compact", "none")
+
+_DIGITS_REGEX = re.compile(r"[0-9]+")
+_PROGRESS_REGEX = re.compile(r"Rendering: [0-9]+%")
+
+
+def _get_category(msg: str) -> str:
+    """
+    Returns the category of a line of KeyShot output
+    """
+    if "Rendering: " in msg and _PROGRESS_REGEX.search(msg):
+        return "progress"
+    if "KeyShot Render Options" in msg:
+        return "render_options"
+    if "KeyShotClient: " in msg:
+        return "client"
+    return "output"
+
+
+class KeyShotOutputLog(logging.Filter):
+    """
+    Filters the lines of KeyShot output logged to its logger by the verbosity of their category,
+    and keeps the most recent lines, logged or not, so they can be written to a file on failure.
+    """
+
+    def __init__(
+        self,
+        verbosity: Optional[dict[str, str]] = None,
+        max_lines: int = 10000,
+        compact_interval: float = 60.0,
+        prefix: str = "",
+    ) -> None:
+        """
+        Args:
+            verbosity (Optional[dict[str, str]], optional): How much of each category of output is
+                logged: "all", "compact" or "none". Categories that are not given use
+                DEFAULT_LOG_VERBOSITY. Defaults to None.
+            max_lines (int, optional): The number of most recent lines kept. Defaults to 10000.
+            compact_interval (float, optional): The longest time in seconds that a run of similar
+                lines goes without one of them being logged. Defaults to 60.0.
+            prefix (str, optional): Added to the start of every logged line, to tell apart the
+                output of KeyShots that run side by side. Defaults to "".
+        """
+        super().__init__()
+        self._verbosity = {**DEFAULT_LOG_VERBOSITY, **(verbosity or {})}
+        self._compact_interval = compact_interval
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self._lines: deque[tuple[float, str]] = deque(maxlen=max_lines)
+        # The digit-less form of the last logged line of a compact category, when it was logged,
+        # and the last line of its run that was not logged along with how many were not
+        self._shape: Optional[str] = None
+        self._logged_at = 0.0
+        self._pending: Optional[logging.LogRecord] = None
+        self._collapsed = 0
+        # A logger of its own, so that the filter only sees this session's KeyShot output
+        self.logger = logging.getLogger(f"{__name__}.{uuid.uuid4()}")
+        self.logger.addFilter(self)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Returns whether a line of KeyShot output is logged
+
+        Args:
+            record (logging.LogRecord): The log record of the line.
+        """
+        if getattr(record, "keyshot_compacted", False):
+            return True
+        msg = record.getMessage()
+        with self._lock:
+            self._lines.append((record.created, msg))
+            verbosity = self._verbosity[_get_category(msg)]
+            if verbosity == "none":
+                return False
+            shape = _DIGITS_REGEX.sub("#", msg) if verbosity == "compact" else None
+            if shape is not None and shape == self._shape:
+                if record.created - self._logged_at < self._compact_interval:
+                    self._pending = record
+                    self._collapsed += 1
+                    return False
+                # Log this line in place of the ones collapsed since the last one was logged
+                _set_collapsed(record, self._collapsed)
+                self._pending = None
+                self._collapsed = 0
+            else:
+                self._log_pending()
+            self._shape = shape
+            self._logged_at = record.created
+            self._add_prefix(record)
+            return True
+
+    def flush(self) -> None:
+        """
+        Logs the last line of the current run of similar lines, if it was not logged yet
+        """
+        with self._lock:
+            self._log_pending()
+            self._shape = None
+
+    def write(self, path: str) -> int:
+        """
+        Writes the kept lines of output to a file
+
+        Args:
+            path (str): The file to write to.
+
+        Returns:
+            int: The number of lines written.
+        """
+        with self._lock:
+            lines = list(self._lines)
+        with open(path, "w", encoding="utf-8") as f:
+            for created, msg in lines:
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+                f.write(f"[{timestamp}.{int(created % 1 * 1000):03d}] {msg}\n")
+        return len(lines)
+
+    def _log_pending(self) -> None:
+        """
+        Logs the last line of a run of similar lines, along with how many of them were not logged
+        """
+        record = self._pending
+        if record is None:
+            return
+        _set_collapsed(record, self._collapsed - 1)
+        record.keyshot_compacted = True
+        self._pending = None
+        self._collapsed = 0
+        self._add_prefix(record)
+        self.logger.handle(record)
+
+    def _add_prefix(self, record: logging.LogRecord) -> None:
+        """
+        Adds the prefix to the start of a log record's message
+        """
+        if self._prefix:
+            record.msg = f"{self._prefix}{record.getMessage()}"
+            record.args = None
+
+
+def _set_collapsed(record: logging.LogRecord, collapsed: int) -> None:
+    """
+    Adds how many similar lines were not logged to a log record's message
+    """
+    if collapsed > 0:
+        record.msg = f"{record.getMessage()} [{collapsed} similar line(s) collapsed]"
+        record.args = None
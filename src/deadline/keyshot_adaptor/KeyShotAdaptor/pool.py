@@ -0,0 +1,610 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+A host-local pool of warm headless KeyShot processes.
+
+Launching KeyShot and checking out its license takes tens of seconds. The pool keeps a number of
+KeyShot processes running keyshot_client.py, each connected to an adaptor server owned by the pool,
+and leases them to adaptor sessions on the same host. On lease the client is told to connect to the
+session's adaptor server and KeyShot's output is relayed to the session. On release the client
+reconnects to the pool, which resets the scene, or recycles the process when it does not come back
+or has served its maximum number of leases.
+
+The pool only serves sessions of the user that runs it. Its connection file and socket are private
+to that user, and a leased KeyShot writes its outputs as that user, so sessions of other users are
+refused and launch their own KeyShot. On Windows the file and the named pipe are not private to the
+user, so the pool does not run there and sessions launch their own KeyShot.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import secrets
+import signal
+import socket
+import struct
+import sys
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any
+
+from openjd.adaptor_runtime.app_handlers import RegexHandler
+from openjd.adaptor_runtime.application_ipc import AdaptorServer
+from openjd.adaptor_runtime_client import Action
+
+from .adaptor import (
+    _ACTION_WAIT_SECONDS,
+    KeyShotActionsQueue,
+    _KeyShotSubprocess,
+    _get_keyshot_client_path,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class KeyShotPoolUnavailableError(Exception):
+    """Error that is raised when the KeyShot pool has no warm KeyShot to lease"""
+
+
+_WINDOWS_UNSUPPORTED_MESSAGE = (
+    "The KeyShot pool is not supported on Windows, where its connection file and named pipe are "
+    "not private to the user that runs it"
+)
+
+
+def _check_same_user(connection_file: str) -> None:
+    """
+    Checks that the KeyShot pool that wrote a connection file runs as the current user. On Windows,
+    where the pool does not run, it never does.
+
+    Args:
+        connection_file (str): The connection file written by the KeyShot pool.
+
+    Raises:
+        OSError: If the connection file could not be read.
+        KeyShotPoolUnavailableError: If the pool runs as another user, or on Windows.
+    """
+    if sys.platform == "win32":
+        raise KeyShotPoolUnavailableError(_WINDOWS_UNSUPPORTED_MESSAGE)
+    owner = os.stat(connection_file).st_uid
+    if owner != os.getuid():
+        raise KeyShotPoolUnavailableError(
+            f"The KeyShot pool runs as user {owner}, not as the session's user {os.getuid()}. The "
+            "pool only serves sessions of the user that runs it."
+        )
+
+
+def _is_other_user(connection: Connection) -> bool:
+    """
+    Returns whether the process at the other end of a connection to the pool runs as another user.
+    Always False on platforms that do not report the user of a socket peer, where the private
+    connection file and socket keep other users out.
+
+    Args:
+        connection (Connection): The connection to an adaptor session.
+    """
+    if sys.platform == "win32" or not hasattr(socket, "SO_PEERCRED"):
+        return False
+    with socket.socket(fileno=os.dup(connection.fileno())) as sock:
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", credentials)
+    if uid == os.getuid():
+        return False
+    _logger.warning(f"Refused a lease to user {uid}, the pool runs as user {os.getuid()}")
+    return True
+
+
+class _OutputRelay(RegexHandler):
+    """
+    Logging handler that forwards the output of a warm KeyShot to the session that leased it.
+    """
+
+    def __init__(self) -> None:
+        super().__init__([])
+        self._connection: Connection | None = None
+        self._send_lock = threading.Lock()
+
+    def relay_to(self, connection: Connection | None) -> None:
+        with self._send_lock:
+            self._connection = connection
+
+    def send(self, message: dict[str, Any]) -> None:
+        with self._send_lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.send(message)
+            except (OSError, ValueError):
+                # The session went away, its lease ends when the pool notices
+                self._connection = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.send({"output": record.getMessage()})
+
+
+class _WarmKeyShot:
+    """
+    A KeyShot process owned by the pool together with the adaptor server its client connects to
+    while it is not leased.
+    """
+
+    def __init__(self, condition: threading.Condition) -> None:
+        """
+        Args:
+            condition (threading.Condition): Notified when the client takes an action.
+        """
+        self._condition = condition
+        self.queue = KeyShotActionsQueue(self._condition, wait_seconds=_ACTION_WAIT_SECONDS)
+        self.server = AdaptorServer(self.queue, None)  # type: ignore[arg-type]
+        self._server_thread = threading.Thread(
+            target=self.server.serve_forever, name="KeyShotPoolServerThread", daemon=True
+        )
+        self._server_thread.start()
+
+        self.relay = _OutputRelay()
+        self.leased = False
+        self.lease_count = 0
+        self.retiring = False  # Being recycled, never leased again
+        self.replaced = False  # A replacement has been launched
+        self.process = _KeyShotSubprocess(
+            keyshot_client_path=_get_keyshot_client_path(),
+            server_path=self.server.server_path,
+            output_handler=self.relay,
+        )
+        # The client takes this action as soon as it connects, which marks the KeyShot as warm
+        self.queue.enqueue_action(Action("reset"))
+
+    @property
+    def is_ready(self) -> bool:
+        """True if KeyShot is running, connected to the pool and not leased"""
+        return (
+            not self.leased
+            and not self.retiring
+            and self.process.is_running
+            and len(self.queue) == 0
+        )
+
+    def wait_until_connected(self, timeout: float) -> bool:
+        """
+        Waits for the client to take every action queued by the pool, which means it is connected
+        to the pool's server.
+
+        Args:
+            timeout (float): The maximum time (in seconds) to wait.
+
+        Returns:
+            bool: True if the client is connected to the pool, False otherwise.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self.queue) == 0 or not self.process.is_running, timeout=timeout
+            )
+        return len(self.queue) == 0 and self.process.is_running
+
+    def stop(self, grace_time_s: float) -> None:
+        """
+        Closes KeyShot, terminating it if it does not exit in time, and shuts down its server.
+
+        Args:
+            grace_time_s (float): The time (in seconds) KeyShot is given to exit.
+        """
+        self.queue.enqueue_action(Action("close"), front=True)
+        self.wait_until_connected(timeout=grace_time_s)
+        self.process.terminate(grace_time_s=grace_time_s)
+        # Unblock a request that a killed client may have left waiting for an action
+        self.queue.release_waiting_request()
+        self.server.shutdown()
+
+
+class KeyShotPool:
+    """
+    Keeps warm headless KeyShot processes that adaptor sessions on this host can lease.
+    """
+
+    _LEASE_WAIT_TIMEOUT_SECONDS = 60
+    _LEASE_RETURN_TIMEOUT_SECONDS = 30
+    _KEYSHOT_END_TIMEOUT_SECONDS = 30
+
+    def __init__(self, size: int, max_leases: int = 0) -> None:
+        """
+        Args:
+            size (int): The number of warm KeyShot processes to keep.
+            max_leases (int): Recycle a KeyShot process after this many leases. 0 never recycles.
+        """
+        self._size = size
+        self._max_leases = max_leases
+        self._lock = threading.Lock()
+        self._spawn_lock = threading.Lock()
+        # Notified whenever a KeyShot in the pool may have become ready to lease
+        self._ready_changed = threading.Condition(self._lock)
+        self._warm_keyshots: list[_WarmKeyShot] = []
+        self._listener: Listener | None = None
+        self._connection_file = ""
+        self._shutting_down = threading.Event()
+
+    def start(self, connection_file: str) -> None:
+        """
+        Starts listening for lease requests, launches the warm KeyShot processes and writes the
+        information adaptors need to connect to the pool to the connection file.
+
+        Args:
+            connection_file (str): The path to write the connection information to.
+        """
+        authkey = secrets.token_bytes(32)
+        self._listener = Listener(
+            family="AF_PIPE" if sys.platform == "win32" else "AF_UNIX", authkey=authkey
+        )
+        self._connection_file = connection_file
+        fd = os.open(connection_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"address": self._listener.address, "authkey": authkey.hex()}, f)
+
+        for _ in range(self._size):
+            self._spawn()
+
+        threading.Thread(
+            target=self._accept_leases, name="KeyShotPoolListenerThread", daemon=True
+        ).start()
+
+    def shutdown(self) -> None:
+        """
+        Stops accepting leases and closes every KeyShot process in the pool.
+        """
+        self._shutting_down.set()
+        if self._listener is not None:
+            self._listener.close()
+        # Waits for a launch in progress, which then is in the list, and later launches are skipped
+        with self._spawn_lock, self._lock:
+            warm_keyshots = list(self._warm_keyshots)
+        for warm_keyshot in warm_keyshots:
+            warm_keyshot.stop(grace_time_s=self._KEYSHOT_END_TIMEOUT_SECONDS)
+        if self._connection_file and os.path.exists(self._connection_file):
+            os.remove(self._connection_file)
+
+    def _spawn(self, replacing: _WarmKeyShot | None = None) -> None:
+        """
+        Launches a KeyShot process for the pool and monitors it so it is replaced when it exits.
+
+        Args:
+            replacing (_WarmKeyShot | None): The KeyShot process the new one replaces, if any.
+        """
+        with self._lock:
+            if replacing is not None:
+                if replacing.replaced:
+                    return
+                replacing.replaced = True
+
+        # Launches are serialized so that shutdown can wait for the one in progress
+        with self._spawn_lock:
+            # A replacement launched during shutdown would never be closed
+            if self._shutting_down.is_set():
+                return
+            warm_keyshot = _WarmKeyShot(self._ready_changed)
+            with self._ready_changed:
+                if replacing in self._warm_keyshots:
+                    self._warm_keyshots[self._warm_keyshots.index(replacing)] = warm_keyshot
+                else:
+                    self._warm_keyshots.append(warm_keyshot)
+                self._ready_changed.notify_all()
+        _logger.info(f"Launched warm KeyShot process {warm_keyshot.process.pid}")
+        threading.Thread(
+            target=self._monitor,
+            args=(warm_keyshot,),
+            name="KeyShotPoolMonitorThread",
+            daemon=True,
+        ).start()
+
+    def _monitor(self, warm_keyshot: _WarmKeyShot) -> None:
+        """
+        Waits for a KeyShot process to exit, tells the session leasing it, and replaces it.
+
+        Args:
+            warm_keyshot (_WarmKeyShot): The KeyShot process to monitor.
+        """
+        warm_keyshot.process.wait()
+        warm_keyshot.queue.release_waiting_request()
+        warm_keyshot.relay.send({"exited": warm_keyshot.process.returncode})
+        _logger.info(
+            f"KeyShot process {warm_keyshot.process.pid} exited with code "
+            f"{warm_keyshot.process.returncode}"
+        )
+        with self._ready_changed:
+            self._ready_changed.notify_all()
+        if not self._shutting_down.is_set():
+            self._spawn(replacing=warm_keyshot)
+
+    def _accept_leases(self) -> None:
+        """
+        Accepts connections from adaptor sessions and serves each of them in its own thread.
+        """
+        while not self._shutting_down.is_set() and self._listener is not None:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                # The listener was closed or the client failed to authenticate
+                continue
+            threading.Thread(
+                target=self._serve_lease,
+                args=(connection,),
+                name="KeyShotPoolLeaseThread",
+                daemon=True,
+            ).start()
+
+    def _acquire(self) -> _WarmKeyShot | None:
+        """
+        Marks the first ready KeyShot process as leased and returns it. If no KeyShot is ready but
+        some are still starting or being reset, waits for one of them since that is still faster
+        than launching a new KeyShot.
+
+        Returns:
+            _WarmKeyShot | None: The leased KeyShot, or None if every KeyShot is leased.
+        """
+
+        def ready_or_all_leased() -> bool:
+            return any(warm_keyshot.is_ready for warm_keyshot in self._warm_keyshots) or all(
+                warm_keyshot.leased for warm_keyshot in self._warm_keyshots
+            )
+
+        with self._ready_changed:
+            self._ready_changed.wait_for(
+                ready_or_all_leased, timeout=self._LEASE_WAIT_TIMEOUT_SECONDS
+            )
+            for warm_keyshot in self._warm_keyshots:
+                if warm_keyshot.is_ready:
+                    warm_keyshot.leased = True
+                    warm_keyshot.lease_count += 1
+                    return warm_keyshot
+        return None
+
+    def _serve_lease(self, connection: Connection) -> None:
+        """
+        Leases a KeyShot process to an adaptor session and waits for the session to end the lease.
+
+        Args:
+            connection (Connection): The connection to the adaptor session.
+        """
+        try:
+            request = connection.recv()
+        except (EOFError, OSError):
+            connection.close()
+            return
+
+        if _is_other_user(connection):
+            connection.send({"status": "wrong_user"})
+            connection.close()
+            return
+
+        warm_keyshot = self._acquire() if request.get("request") == "lease" else None
+        if warm_keyshot is None:
+            connection.send({"status": "unavailable"})
+            connection.close()
+            return
+
+        # The response is sent before any output is relayed, since the session reads it first
+        connection.send(
+            {
+                "status": "leased",
+                "pid": warm_keyshot.process.pid,
+                "server_path": warm_keyshot.server.server_path,
+            }
+        )
+        warm_keyshot.relay.relay_to(connection)
+        warm_keyshot.queue.enqueue_action(
+            Action("connect", {"server_path": request["server_path"]})
+        )
+        _logger.info(f"Leased KeyShot process {warm_keyshot.process.pid}")
+
+        try:
+            while True:
+                message = connection.recv()
+                if message.get("request") == "terminate":
+                    warm_keyshot.process.terminate(grace_time_s=message.get("grace_time_s", 60))
+                    break
+                if message.get("request") == "release":
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            warm_keyshot.relay.relay_to(None)
+            connection.close()
+        self._return(warm_keyshot)
+
+    def _return(self, warm_keyshot: _WarmKeyShot) -> None:
+        """
+        Resets a KeyShot process when its lease ends, or recycles it if it does not reconnect to
+        the pool or has served its maximum number of leases.
+
+        Args:
+            warm_keyshot (_WarmKeyShot): The KeyShot process whose lease ended.
+        """
+        warm_keyshot.queue.enqueue_action(Action("reset"))
+        reconnected = warm_keyshot.wait_until_connected(timeout=self._LEASE_RETURN_TIMEOUT_SECONDS)
+        if reconnected and not (self._max_leases and warm_keyshot.lease_count >= self._max_leases):
+            with self._ready_changed:
+                warm_keyshot.leased = False
+                self._ready_changed.notify_all()
+            _logger.info(f"KeyShot process {warm_keyshot.process.pid} returned to the pool")
+            return
+
+        _logger.info(f"Recycling KeyShot process {warm_keyshot.process.pid}")
+        with self._ready_changed:
+            # Sessions waiting for a lease keep waiting for the replacement
+            warm_keyshot.retiring = True
+            warm_keyshot.leased = False
+        warm_keyshot.stop(grace_time_s=self._KEYSHOT_END_TIMEOUT_SECONDS)
+        if not self._shutting_down.is_set():
+            self._spawn(replacing=warm_keyshot)
+
+
+class KeyShotPoolLease:
+    """
+    A warm KeyShot leased from the host's KeyShot pool. Provides the parts of the
+    LoggingSubprocess interface that the adaptor uses for a KeyShot it launched itself.
+    """
+
+    def __init__(
+        self,
+        connection_file: str,
+        server_path: str,
+        output_handler: logging.Handler,
+        logger: logging.Logger = _logger,
+    ):
+        """
+        Leases a KeyShot and connects its client to the given adaptor server.
+
+        Args:
+            connection_file (str): The connection file written by the KeyShot pool.
+            server_path (str): The path of the adaptor server the client should connect to.
+            output_handler (logging.Handler): The handler to pass KeyShot's output to.
+            logger (logging.Logger, optional): The logger to log KeyShot's output to. Defaults to
+                this module's logger.
+
+        Raises:
+            OSError: If the pool could not be reached.
+            KeyShotPoolUnavailableError: If the pool runs as another user or has no warm KeyShot to
+                lease, or on Windows.
+        """
+        _check_same_user(connection_file)
+        with open(connection_file) as f:
+            connection_info = json.load(f)
+        self._connection = Client(
+            connection_info["address"], authkey=bytes.fromhex(connection_info["authkey"])
+        )
+        self._connection.send({"request": "lease", "server_path": server_path})
+        response = self._connection.recv()
+        if response.get("status") == "wrong_user":
+            self._connection.close()
+            raise KeyShotPoolUnavailableError(
+                "The KeyShot pool only serves sessions of the user that runs it"
+            )
+        if response.get("status") != "leased":
+            self._connection.close()
+            raise KeyShotPoolUnavailableError("The KeyShot pool has no warm KeyShot available")
+
+        self.pid: int = response["pid"]
+        # The action that hands the client back to the pool
+        self.return_action = Action("connect", {"server_path": response["server_path"]})
+        self._output_handler = output_handler
+        self._logger = logger
+        self._returncode: int | None = None
+        self._ended = threading.Event()
+        self._send_lock = threading.Lock()
+        threading.Thread(
+            target=self._read_output, name="KeyShotPoolLeaseThread", daemon=True
+        ).start()
+
+    @property
+    def is_running(self) -> bool:
+        """True while the lease is held and the leased KeyShot is running"""
+        return not self._ended.is_set()
+
+    @property
+    def returncode(self) -> int | None:
+        """The exit code of the leased KeyShot if it exited during the lease"""
+        return self._returncode
+
+    def _read_output(self) -> None:
+        """
+        Logs the output relayed by the pool and passes it to the output handler until the lease
+        ends or the leased KeyShot exits.
+        """
+        try:
+            while True:
+                message = self._connection.recv()
+                if "output" in message:
+                    self._logger.info(message["output"])
+                    self._output_handler.handle(
+                        logging.makeLogRecord({"msg": message["output"], "levelno": logging.INFO})
+                    )
+                elif "exited" in message:
+                    self._returncode = message["exited"]
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._ended.set()
+
+    def _send(self, message: dict[str, Any]) -> None:
+        with self._send_lock:
+            try:
+                self._connection.send(message)
+            except (OSError, ValueError):
+                pass
+
+    def wait_for_exit(self, timeout: float | None = None) -> bool:
+        """
+        Waits for the lease to end.
+
+        Args:
+            timeout (float | None): The maximum time (in seconds) to wait. None waits forever.
+
+        Returns:
+            bool: True if the lease ended, False if the wait timed out.
+        """
+        return self._ended.wait(timeout)
+
+    def release(self) -> None:
+        """
+        Ends the lease. The client must already have been handed back with return_action, or have
+        exited.
+        """
+        self._send({"request": "release"})
+        self.wait_for_exit(timeout=KeyShotPool._LEASE_RETURN_TIMEOUT_SECONDS)
+        self._connection.close()
+
+    def terminate(self, grace_time_s: float = 60) -> None:
+        """
+        Asks the pool to terminate the leased KeyShot, which the pool then replaces.
+
+        Args:
+            grace_time_s (float): The time (in seconds) KeyShot is given to exit.
+        """
+        self._send({"request": "terminate", "grace_time_s": grace_time_s})
+        self.wait_for_exit(timeout=grace_time_s + KeyShotPool._KEYSHOT_END_TIMEOUT_SECONDS)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Entry point for the KeyShot pool
+    """
+    parser = argparse.ArgumentParser(
+        prog="keyshot-openjd-pool",
+        description="Keeps warm headless KeyShot processes that KeyShot adaptor sessions on this "
+        "host lease instead of launching KeyShot. Set DEADLINE_KEYSHOT_POOL_CONNECTION_FILE to "
+        "the connection file in the worker environment to use the pool.",
+    )
+    parser.add_argument(
+        "--connection-file",
+        required=True,
+        help="The file to write the pool's connection information to.",
+    )
+    parser.add_argument(
+        "--size", type=int, default=1, help="The number of warm KeyShot processes to keep."
+    )
+    parser.add_argument(
+        "--max-leases",
+        type=int,
+        default=0,
+        help="Recycle a KeyShot process after this many leases. 0 never recycles.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if sys.platform == "win32":
+        _logger.warning(f"{_WINDOWS_UNSUPPORTED_MESSAGE}. Not starting the pool.")
+        return
+    pool = KeyShotPool(args.size, max_leases=args.max_leases)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    pool.start(args.connection_file)
+    try:
+        stop.wait()
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
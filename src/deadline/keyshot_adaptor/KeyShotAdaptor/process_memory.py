@@ -0,0 +1,97 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Reads the memory use of a process, so the adaptor can restart a KeyShot whose memory has grown too
+large between tasks.
+"""
+from __future__ import annotations
+
+import logging
+import subprocess
+import sys
+from typing import Optional
+
+_logger = logging.getLogger(__name__)
+
+
+def get_process_rss(pid: int) -> Optional[int]:
+    """
+    Returns the resident set size of a process, the memory it has in RAM, in bytes
+
+    Args:
+        pid (int): The ID of the process.
+
+    Returns:
+        Optional[int]: The resident set size, or None if it could not be read.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            return _get_linux_rss(pid)
+        if sys.platform == "win32":
+            return _get_windows_rss(pid)
+        return _get_ps_rss(pid)
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        _logger.debug(f"Could not read the memory use of process {pid}: {e}")
+        return None
+
+
+def _get_linux_rss(pid: int) -> int:
+    """
+    Returns the resident set size of a process from /proc
+    """
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                # e.g. "VmRSS:    123456 kB"
+                return int(line.split()[1]) * 1024
+    raise ValueError(f"Process {pid} has no VmRSS")
+
+
+if sys.platform == "win32":
+
+    def _get_windows_rss(pid: int) -> int:
+        """
+        Returns the working set size of a process, the Windows equivalent of its resident set size
+        """
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        psapi = ctypes.WinDLL("psapi", use_last_error=True)
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            if not psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                raise ctypes.WinError(ctypes.get_last_error())
+            return counters.WorkingSetSize
+        finally:
+            kernel32.CloseHandle(handle)
+
+
+def _get_ps_rss(pid: int) -> int:
+    """
+    Returns the resident set size of a process as reported by ps, for macOS
+    """
+    result = subprocess.run(
+        ["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, check=True
+    )
+    # ps reports the resident set size in kilobytes
+    return int(result.stdout.strip()) * 1024
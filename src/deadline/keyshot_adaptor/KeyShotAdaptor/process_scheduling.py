@@ -0,0 +1,177 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Applies CPU affinity, scheduling priority and I/O priority to a launched KeyShot process on Linux,
+so that renders can be pinned to dedicated cores and kept ahead of, or behind, other work on a
+shared host.
+
+Linux schedules each thread on its own, so the settings are applied to every thread KeyShot has
+when it is scheduled. The threads it starts afterwards inherit them.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import platform
+import sys
+from typing import Any
+
+_logger = logging.getLogger(__name__)
+
+# The I/O scheduling classes of ioprio_set(2)
+IO_PRIORITY_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+
+def parse_cpu_list(cpus: str) -> set[int]:
+    """
+    Parses a list of CPUs in the format of /proc and taskset, such as "0-3,8,10-11"
+
+    Args:
+        cpus (str): The list of CPUs.
+
+    Raises:
+        ValueError: If the list is not valid.
+
+    Returns:
+        set[int]: The CPUs in the list.
+    """
+    result: set[int] = set()
+    for part in cpus.split(","):
+        first, _, last = part.strip().partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if end < start:
+            raise ValueError(f"The CPU range {part.strip()} is not valid")
+        result.update(range(start, end + 1))
+    return result
+
+
+def get_numa_node_cpus(node: int) -> set[int]:
+    """
+    Returns the CPUs of a NUMA node
+
+    Args:
+        node (int): The NUMA node.
+
+    Raises:
+        OSError: If the host has no such NUMA node.
+    """
+    with open(f"/sys/devices/system/node/node{node}/cpulist", encoding="utf-8") as f:
+        return parse_cpu_list(f.read())
+
+
+def get_scheduled_cpus(settings: dict[str, Any]) -> set[int] | None:
+    """
+    Returns the CPUs that scheduling settings pin a process to, limited to those of the NUMA node
+    if one is given
+
+    Args:
+        settings (dict[str, Any]): The scheduling settings.
+
+    Raises:
+        OSError: If the host has no such NUMA node.
+        ValueError: If the list of CPUs is not valid or has no CPU on the NUMA node.
+
+    Returns:
+        set[int] | None: The CPUs, or None if the settings do not pin the process.
+    """
+    cpus = parse_cpu_list(settings["cpus"]) if "cpus" in settings else None
+    if "numa_node" in settings:
+        node_cpus = get_numa_node_cpus(settings["numa_node"])
+        cpus = node_cpus if cpus is None else cpus & node_cpus
+        if not cpus:
+            raise ValueError(f"None of the CPUs are on NUMA node {settings['numa_node']}")
+    return cpus
+
+
+def apply_process_scheduling(pid: int, settings: dict[str, Any]) -> None:
+    """
+    Applies scheduling settings to a process and logs the settings it ended up with. Settings that
+    cannot be applied are logged as warnings, since the process can still run without them.
+
+    Args:
+        pid (int): The ID of the process.
+        settings (dict[str, Any]): The settings, any of "cpus", "numa_node", "nice",
+            "io_priority_class" and "io_priority_level".
+    """
+    if not settings:
+        return
+    if sys.platform.startswith("linux"):
+        _apply_linux_scheduling(pid, settings)
+    else:
+        _logger.warning(
+            f"KeyShot scheduling settings are only applied on Linux, not {sys.platform}"
+        )
+
+
+if sys.platform.startswith("linux"):
+
+    # The number of the ioprio_set system call, which the os module does not provide
+    _IOPRIO_SET_SYSCALLS = {"x86_64": 251, "aarch64": 30}
+    _IOPRIO_WHO_PROCESS = 1
+    _IOPRIO_CLASS_SHIFT = 13
+
+    def _apply_linux_scheduling(pid: int, settings: dict[str, Any]) -> None:
+        """
+        Applies scheduling settings to every thread of a process
+        """
+        try:
+            cpus = get_scheduled_cpus(settings)
+        except (OSError, ValueError) as e:
+            _logger.warning(f"Could not find the CPUs to run KeyShot on: {e}")
+            cpus = None
+        io_priority = None
+        if "io_priority_class" in settings:
+            io_priority = (
+                IO_PRIORITY_CLASSES[settings["io_priority_class"]] << _IOPRIO_CLASS_SHIFT
+            ) | settings.get("io_priority_level", 4)
+
+        try:
+            threads = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+        except OSError as e:
+            _logger.warning(f"Could not schedule KeyShot process {pid}: {e}")
+            return
+        # The main thread first, since the threads it starts inherit its settings
+        for tid in sorted(threads, key=lambda tid: tid != pid):
+            try:
+                if cpus is not None:
+                    os.sched_setaffinity(tid, cpus)
+                if "nice" in settings:
+                    os.setpriority(os.PRIO_PROCESS, tid, settings["nice"])
+                if io_priority is not None:
+                    _set_io_priority(tid, io_priority)
+            except ProcessLookupError:
+                # The thread exited
+                continue
+            except OSError as e:
+                _logger.warning(f"Could not schedule KeyShot process {pid}: {e}")
+                return
+        _logger.info(f"Scheduled KeyShot process {pid}: {_describe_scheduling(pid)}")
+
+    def _set_io_priority(tid: int, io_priority: int) -> None:
+        """
+        Sets the I/O priority of a thread with the ioprio_set system call
+        """
+        import ctypes
+
+        syscall = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+        if syscall is None:
+            raise OSError(f"Setting the I/O priority is not supported on {platform.machine()}")
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.syscall(syscall, _IOPRIO_WHO_PROCESS, tid, io_priority) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Could not set the I/O priority: {os.strerror(errno)}")
+
+    def _describe_scheduling(pid: int) -> str:
+        """
+        Returns the CPUs and nice level of a process as the kernel reports them
+        """
+        cpus = "unknown"
+        try:
+            with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("Cpus_allowed_list:"):
+                        cpus = line.split(":", 1)[1].strip()
+            nice = str(os.getpriority(os.PRIO_PROCESS, pid))
+        except OSError:
+            nice = "unknown"
+        return f"CPUs {cpus}, nice {nice}"
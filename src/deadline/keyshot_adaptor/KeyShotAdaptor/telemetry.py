@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Records telemetry events from a background thread so that neither building the Deadline telemetry
+client nor recording events adds to the latency of a session or its tasks.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Optional, Protocol
+
+_logger = logging.getLogger(__name__)
+
+
+class TelemetrySink(Protocol):
+    """
+    Where telemetry events end up, such as the Deadline Cloud client library's TelemetryClient
+    """
+
+    def record_event(self, event_type: str, event_details: dict[str, Any]) -> Any: ...
+
+
+class KeyShotTelemetry:
+    """
+    Queues telemetry events and hands them to the telemetry sink in batches from a background
+    thread. The queue is bounded and events are dropped when it is full, so recording an event
+    never blocks and never fails.
+    """
+
+    def __init__(
+        self,
+        get_sink: Callable[[], TelemetrySink],
+        max_queued_events: int = 100,
+        batch_size: int = 20,
+        batch_interval: float = 1.0,
+    ) -> None:
+        """
+        Args:
+            get_sink (Callable[[], TelemetrySink]): Returns the sink to record events to. Called
+                once, from the background thread, when the first batch of events is recorded.
+            max_queued_events (int, optional): The number of events that can wait to be recorded
+                before new events are dropped. Defaults to 100.
+            batch_size (int, optional): The most events recorded in one batch. Defaults to 20.
+            batch_interval (float, optional): How long in seconds to wait for more events to fill
+                a batch once the first one arrived. Defaults to 1.0.
+        """
+        self._get_sink = get_sink
+        self._sink: Optional[TelemetrySink] = None
+        self._max_queued_events = max_queued_events
+        self._batch_size = batch_size
+        self._batch_interval = batch_interval
+        self._condition = threading.Condition()
+        self._events: deque[tuple[str, dict[str, Any]]] = deque()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+        self.dropped_events = 0
+
+    def start(self) -> None:
+        """
+        Starts the thread that records the queued events
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="KeyShotTelemetry", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Records the events that are still queued and stops the recording thread
+
+        Args:
+            timeout (float, optional): The most time in seconds to wait for the queued events to
+                be recorded. Defaults to 5.0.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                _logger.warning("Stopped waiting for the telemetry events to be recorded")
+
+    def record(self, event_type: str, event_details: dict[str, Any]) -> None:
+        """
+        Queues a telemetry event to be recorded in the background. The event is dropped if too
+        many events are already waiting to be recorded.
+
+        Args:
+            event_type (str): The type of the event.
+            event_details (dict[str, Any]): The details of the event.
+        """
+        with self._condition:
+            if len(self._events) >= self._max_queued_events:
+                self.dropped_events += 1
+                return
+            self._events.append((event_type, event_details))
+            self._condition.notify_all()
+
+    def _record_batch(self, batch: list[tuple[str, dict[str, Any]]]) -> None:
+        try:
+            if self._sink is None:
+                self._sink = self._get_sink()
+            for event_type, event_details in batch:
+                self._sink.record_event(event_type=event_type, event_details=event_details)
+        except Exception as e:
+            # Telemetry must never fail a job
+            _logger.debug(f"Failed to record {len(batch)} telemetry event(s): {e}")
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._stopped or bool(self._events))
+                # Give a batch that has been started the batch interval to fill up
+                self._condition.wait_for(
+                    lambda: self._stopped or len(self._events) >= self._batch_size,
+                    timeout=self._batch_interval,
+                )
+                if not self._events:
+                    return
+                batch = [
+                    self._events.popleft() for _ in range(min(self._batch_size, len(self._events)))
+                ]
+            self._record_batch(batch)
@@ -0,0 +1,184 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Timings of the phases of a KeyShot adaptor session and of each of its tasks.
+
+All durations are measured with a monotonic clock and stored in seconds. They are written as JSON
+Lines, one line for the session and one for each task, so that launch, scene load, render and write
+times can be compared across a farm.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+class KeyShotTimings:
+    """
+    Accumulates the duration of named phases, and of each KeyShot action, for the session and
+    then for each task in turn. Phases and actions that occur more than once add up. Only the
+    timings of the session and of the current task are kept, earlier tasks are in the file.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        """
+        Args:
+            path (str | None, optional): The JSON Lines file to write the timings to. Nothing is
+                written if None. Defaults to None.
+        """
+        self._path = path
+        self._lock = threading.Lock()
+        self._file_started = False
+        self.session: dict[str, Any] = {}
+        self.task: dict[str, Any] | None = None
+        self._current = self.session
+
+    def start_task(self) -> None:
+        """
+        Starts collecting the timings of a new task
+        """
+        with self._lock:
+            self.task = {}
+            self._current = self.task
+
+    def add(self, phase: str, seconds: float) -> None:
+        """
+        Adds time to a phase of the current session or task
+
+        Args:
+            phase (str): The name of the phase.
+            seconds (float): The time spent in the phase.
+        """
+        with self._lock:
+            self._current[phase] = self._current.get(phase, 0.0) + seconds
+
+    def add_action(self, name: str, seconds: float) -> None:
+        """
+        Adds the time KeyShot spent performing an action to the current session or task
+
+        Args:
+            name (str): The name of the action.
+            seconds (float): The time spent performing the action.
+        """
+        with self._lock:
+            actions = self._current.setdefault("actions", {})
+            actions[name] = actions.get(name, 0.0) + seconds
+
+    def count(self, name: str) -> None:
+        """
+        Counts an event, such as a retry, of the current session or task
+
+        Args:
+            name (str): The name of the event.
+        """
+        with self._lock:
+            counts = self._current.setdefault("counts", {})
+            counts[name] = counts.get(name, 0) + 1
+
+    def get_count(self, name: str) -> int:
+        """
+        Returns how many times an event occurred in the current session or task so far
+        """
+        with self._lock:
+            return self._current.get("counts", {}).get(name, 0)
+
+    def get(self, phase: str) -> float:
+        """
+        Returns the time spent in a phase of the current session or task so far
+        """
+        with self._lock:
+            return self._current.get(phase, 0.0)
+
+    def get_action(self, name: str) -> float:
+        """
+        Returns the time KeyShot spent performing an action in the current session or task so far
+        """
+        with self._lock:
+            return self._current.get("actions", {}).get(name, 0.0)
+
+    def merge(self, timings: dict[str, Any]) -> None:
+        """
+        Adds the timings of another task, such as one rendered by a KeyShot instance of the
+        session, to those of the current session or task
+
+        Args:
+            timings (dict[str, Any]): The timings to add, in the format of KeyShotTimings.task.
+        """
+        with self._lock:
+            for name, value in timings.items():
+                if name in ("actions", "counts"):
+                    merged = self._current.setdefault(name, {})
+                    for key, amount in value.items():
+                        merged[key] = merged.get(key, 0) + amount
+                else:
+                    self._current[name] = self._current.get(name, 0.0) + value
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        """
+        Context manager that adds the time spent in its body to a phase
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(phase, time.monotonic() - start)
+
+    def summary(self) -> str:
+        """
+        Returns the timings of the current session or task on a single line
+        """
+        with self._lock:
+            timings = [
+                (name, seconds)
+                for name, seconds in self._current.items()
+                if name not in ("actions", "counts", "total")
+            ]
+            timings.extend(self._current.get("actions", {}).items())
+            counts = list(self._current.get("counts", {}).items())
+            total = self._current.get("total")
+        parts = [f"{name} {seconds:.3f}s" for name, seconds in timings]
+        parts.extend(f"{name} {count}" for name, count in counts)
+        if total is not None:
+            parts.insert(0, f"total {total:.3f}s")
+        return ", ".join(parts)
+
+    def write(self) -> None:
+        """
+        Appends the timings of the current session or task to the file as one JSON line. The
+        first write of the session replaces the file.
+        """
+        if not self._path:
+            return
+        with self._lock:
+            kind = "session" if self._current is self.session else "task"
+            line = json.dumps({kind: self._current}) + "\n"
+            mode = "a" if self._file_started else "w"
+            self._file_started = True
+        with open(self._path, mode, encoding="utf-8") as f:
+            f.write(line)
+
+    @staticmethod
+    def read(path: str) -> dict[str, Any]:
+        """
+        Reads a timings file written by KeyShotTimings
+
+        Args:
+            path (str): The JSON Lines file the timings were written to.
+
+        Returns:
+            dict[str, Any]: The timings in the format {"session": {...}, "tasks": [{...}, ...]}.
+        """
+        timings: dict[str, Any] = {"session": {}, "tasks": []}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "session" in record:
+                    timings["session"] = record["session"]
+                else:
+                    timings["tasks"].append(record["task"])
+        return timings
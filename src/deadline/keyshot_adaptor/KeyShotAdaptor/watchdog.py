@@ -0,0 +1,205 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Detects KeyShot renders that hang without exiting.
+
+A render is considered hung when KeyShot writes no output for longer than the stall timeout, or
+when a frame takes longer than the frame timeout. Either timeout can be scaled from the median time
+of the frames rendered so far in the session, so that a job of quick frames gets tight limits
+without every job having to be configured for its own frame times.
+"""
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from typing import Callable, Optional
+
+
+class KeyShotRenderWatchdog:
+    """
+    Tracks the output KeyShot writes and the frames it completes while it renders, and reports
+    when the render has gone on for longer than its limits allow.
+    """
+
+    def __init__(
+        self,
+        stall_timeout: Optional[float] = None,
+        frame_timeout: Optional[float] = None,
+        median_frame_time_multiplier: Optional[float] = None,
+        min_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Args:
+            stall_timeout (Optional[float], optional): The longest time in seconds KeyShot may
+                write no output while rendering. Defaults to None.
+            frame_timeout (Optional[float], optional): The longest time in seconds a single frame
+                may take to render. Defaults to None.
+            median_frame_time_multiplier (Optional[float], optional): Once a frame has rendered,
+                limits both timeouts to this multiple of the median frame time of the session.
+                Defaults to None.
+            min_timeout (float, optional): The shortest timeout in seconds the scaling may give.
+                Defaults to 60.0.
+            clock (Callable[[], float], optional): Returns the current time in seconds. Defaults
+                to time.monotonic.
+            on_change (Optional[Callable[[], None]], optional): Called whenever the time of the
+                next check may have moved, so that a wait for it can start over. Defaults to None.
+        """
+        self._stall_timeout = stall_timeout
+        self._frame_timeout = frame_timeout
+        self._multiplier = median_frame_time_multiplier
+        self._min_timeout = min_timeout
+        self._clock = clock
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._revision = 0
+        self._frame_seconds: list[float] = []
+        self._rendering = False
+        self._frames = 0
+        self._frames_done = 0
+        self._frame_started_at = 0.0
+        self._last_output_at = 0.0
+        self._last_output = ""
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any limit was configured"""
+        return bool(self._stall_timeout or self._frame_timeout or self._multiplier)
+
+    @property
+    def revision(self) -> int:
+        """Increases whenever the time of the next check may have moved"""
+        return self._revision
+
+    def _changed(self) -> None:
+        """
+        Records that the time of the next check may have moved and reports it
+        """
+        with self._lock:
+            self._revision += 1
+        if self._on_change is not None:
+            self._on_change()
+
+    def start(self, frames: int) -> None:
+        """
+        Starts watching a render
+
+        Args:
+            frames (int): The number of frames being rendered.
+        """
+        with self._lock:
+            now = self._clock()
+            self._rendering = True
+            self._frames = frames
+            self._frames_done = 0
+            self._frame_started_at = now
+            self._last_output_at = now
+        self._changed()
+
+    def stop(self) -> None:
+        """
+        Stops watching the render
+        """
+        with self._lock:
+            self._rendering = False
+        self._changed()
+
+    def output(self, line: str) -> None:
+        """
+        Records that KeyShot wrote a line of output
+
+        Args:
+            line (str): The line of output.
+        """
+        with self._lock:
+            self._last_output_at = self._clock()
+            self._last_output = line
+
+    def frames_done(self, count: int) -> None:
+        """
+        Records how many frames of the render have completed, timing the frames that completed
+        since the last call
+
+        Args:
+            count (int): The number of frames of the render that have completed.
+        """
+        with self._lock:
+            if not self._rendering or count <= self._frames_done:
+                return
+            now = self._clock()
+            seconds = (now - self._frame_started_at) / (count - self._frames_done)
+            self._frame_seconds.extend([seconds] * (count - self._frames_done))
+            self._frames_done = count
+            self._frame_started_at = now
+        self._changed()
+
+    def seconds_until_check(self) -> Optional[float]:
+        """
+        Returns how long to wait before the render could next go over one of its limits, or None
+        if no limit applies until the watchdog changes, such as before a render starts
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if not self._rendering:
+                return None
+            stall_limit, frame_limit = self._get_limits()
+            now = self._clock()
+            deadlines = []
+            if stall_limit is not None:
+                deadlines.append(self._last_output_at + stall_limit)
+            if frame_limit is not None:
+                deadlines.append(self._frame_started_at + frame_limit)
+            if not deadlines:
+                # Only scaled limits were configured and no frame has rendered yet
+                return None
+            return max(0.0, min(deadlines) - now)
+
+    def check(self) -> Optional[str]:
+        """
+        Returns a description of how the render went over one of its limits, or None if it has not
+        """
+        with self._lock:
+            if not self._rendering:
+                return None
+            stall_limit, frame_limit = self._get_limits()
+            now = self._clock()
+            frame = f"frame {min(self._frames_done + 1, self._frames)} of {self._frames}"
+            if stall_limit is not None and now - self._last_output_at >= stall_limit:
+                problem = (
+                    f"KeyShot wrote no output for {now - self._last_output_at:.0f}s while "
+                    f"rendering {frame}, over the limit of {self._describe(stall_limit)}."
+                )
+            elif frame_limit is not None and now - self._frame_started_at >= frame_limit:
+                problem = (
+                    f"KeyShot has been rendering {frame} for {now - self._frame_started_at:.0f}s, "
+                    f"over the limit of {self._describe(frame_limit)}."
+                )
+            else:
+                return None
+            return f"{problem} The last output was: {self._last_output or '(none)'}"
+
+    def _get_limits(self) -> tuple[Optional[float], Optional[float]]:
+        """
+        Returns the stall and frame timeouts, scaled from the median frame time when configured
+        """
+        if self._multiplier is None or not self._frame_seconds:
+            return self._stall_timeout, self._frame_timeout
+        scaled = max(self._multiplier * statistics.median(self._frame_seconds), self._min_timeout)
+        return (
+            min(self._stall_timeout or scaled, scaled),
+            min(self._frame_timeout or scaled, scaled),
+        )
+
+    def _describe(self, limit: float) -> str:
+        """
+        Returns a limit in seconds along with how it was scaled, if it was
+        """
+        if self._multiplier is not None and self._frame_seconds:
+            median = statistics.median(self._frame_seconds)
+            if limit == self._multiplier * median:
+                return f"{limit:.0f}s ({self._multiplier:g} times the median frame time)"
+            if limit == self._min_timeout:
+                return f"{limit:.0f}s (the minimum timeout)"
+        return f"{limit:.0f}s"
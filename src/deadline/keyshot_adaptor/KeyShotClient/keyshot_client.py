@@ -8,9 +8,20 @@ import lux
 
 print("KeyShot Python Version: %s" % sys.version)
 
+# The adaptor points this at a zip of precompiled copies of the pure Python modules the client
+# needs, built by scripts/deps_bundle.py. Importing them from one archive avoids searching every
+# DEADLINE_CLOUD_PYTHONPATH directory, which is slow when they are on a network mount.
+client_bundle = os.getenv("DEADLINE_KEYSHOT_CLIENT_BUNDLE", "")
+if client_bundle and os.path.isfile(client_bundle):
+    print("KeyShotClient: Loading modules from the dependency bundle %s" % client_bundle)
+    sys.path.insert(0, client_bundle)
+else:
+    client_bundle = ""
+
 # KeyShot doesn't use PYTHONPATH and has a limited standard library
-# we explicitly load modules here from DEADLINE_CLOUD_PYTHONPATH search path
-if "openjd" not in sys.modules.keys():
+# we explicitly load modules here from DEADLINE_CLOUD_PYTHONPATH search path.
+# With the bundle only Windows needs them, for pywin32's native modules.
+if "openjd" not in sys.modules.keys() and (not client_bundle or sys.platform == "win32"):
     python_path = os.getenv("DEADLINE_CLOUD_PYTHONPATH", "")
     python_paths = python_path.split(os.pathsep)
     for p in python_paths:
@@ -22,7 +33,8 @@ if "openjd" not in sys.modules.keys():
         sys.path.append(p)
 
 # Required for making pywin32 portable. See https://github.com/mhammond/pywin32/blob/main/win32/Lib/pywin32_bootstrap.py
-import pywin32_bootstrap  # type: ignore # noqa: F401 E402
+if sys.platform == "win32":
+    import pywin32_bootstrap  # type: ignore # noqa: F401 E402
 
 from types import FrameType  # noqa: E402
 from typing import Optional  # noqa: E402
@@ -46,6 +58,16 @@ class KeyShotClient(ClientInterface):
         major_version, minor_version = lux.getKeyShotDisplayVersion()
         print(f"KeyShotClient: KeyShot Version {major_version}.{minor_version}")
         self.actions.update(KeyShotHandler().action_dict)
+        self.actions["connect"] = self.connect
+
+    def connect(self, args: Optional[dict] = None) -> None:
+        """
+        Connects the client to another adaptor server. The KeyShot pool uses this to hand a warm
+        KeyShot to an adaptor session and to take it back when the session ends.
+        """
+        if args and args.get("server_path"):
+            print(f"KeyShotClient: Connecting to {args['server_path']}")
+            self.server_path = args["server_path"]
 
     def close(self, args: Optional[dict] = None) -> None:
         sys.exit(0)
@@ -64,9 +86,8 @@ def main():
 
     if not os.path.exists(server_path):
         raise OSError(
-            "KeyShotClient cannot connect to the Adaptor because the server path defined by "
-            "the environment variable KEYSHOT_ADAPTOR_SERVER_PATH does not exist. Got: "
-            f"{os.environ['KEYSHOT_ADAPTOR_SERVER_PATH']}"
+            f"KeyShotClient cannot connect to the Adaptor because the server path {server_path} "
+            "given by the environment variable KEYSHOT_ADAPTOR_SERVER_PATH does not exist"
         )
 
     client = KeyShotClient(server_path)
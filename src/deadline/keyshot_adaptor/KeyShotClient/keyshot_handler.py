@@ -2,14 +2,23 @@
 from __future__ import annotations
 
 import os as os
+import time
 from pprint import pprint
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 
 try:
     import lux  # type: ignore
 except ImportError:  # pragma: no cover
     raise OSError("Could not find the KeyShot module. Are you running this inside of KeyShot?")
 
+# The lux.RenderOptions method that applies each render mode, and the render_options setting it
+# takes its value from
+_RENDER_MODE_SETTERS = {
+    "MAX_SAMPLES": ("setMaxSamplesRendering", "max_samples"),
+    "MAX_TIME": ("setMaxTimeRendering", "max_time_seconds"),
+    "ADVANCED": ("setAdvancedRendering", "max_samples"),
+}
+
 
 class KeyShotHandler:
     action_dict: Dict[str, Callable[[Dict[str, Any]], None]] = {}
@@ -23,12 +32,85 @@ class KeyShotHandler:
             "scene_file": self.set_scene_file,
             "output_file_path": self.set_output_file_path,
             "output_format": self.set_output_format,
+            "frame_render_mode": self.set_frame_render_mode,
+            "render_threads": self.set_render_threads,
+            "render_options": self.set_render_options,
             "frame": self.set_frame,
+            "frames": self.set_frames,
             "start_render": self.start_render,
+            "reset": self.reset,
+            "batch": self.batch,
         }
         self.render_kwargs = {}
         self.output_path = ""
         self.output_format_code = lux.RENDER_OUTPUT_PNG  # Default to PNG
+        self.frame_render_mode = "PER_FRAME"
+        # The number of threads KeyShot renders with, or None for KeyShot's default
+        self.render_threads: Optional[int] = None
+        # The render settings of the job, applied over the ones saved in the scene
+        self.render_settings: Dict[str, Any] = {}
+        # (path, size, mtime) of the scene that is open, so that tasks of the same scene do not
+        # reopen it
+        self.loaded_scene: Optional[Tuple[str, int, int]] = None
+        # The render options of the open scene, fetched once and reused for every frame. Only the
+        # settings that differ from the ones last applied to it are set again.
+        self.render_options: Any = None
+        self.applied_render_settings: Dict[str, Any] = {}
+        # The render options last logged, so that after the first full dump only changes are logged
+        self.logged_render_options: Optional[Dict[str, Any]] = None
+
+    def reset(self, data: dict) -> None:
+        """
+        Clears the scene and the render settings so that a KeyShot kept warm by the KeyShot pool
+        starts its next session from a clean state.
+
+        Args:
+            data (dict): Unused
+        """
+        lux.newScene()
+        self.loaded_scene = None
+        self._clear_render_options()
+        self.logged_render_options = None
+        self.render_kwargs = {}
+        self.output_path = ""
+        self.output_format_code = lux.RENDER_OUTPUT_PNG
+        self.frame_render_mode = "PER_FRAME"
+        self.render_threads = None
+        self.render_settings = {}
+
+    def batch(self, data: dict) -> None:
+        """
+        Performs a list of actions in order, so that the adaptor can send every action of a task
+        in a single exchange. The result of each action is printed on its own line along with the
+        time it took. When an action fails the remaining ones are skipped and its error is raised.
+
+        Args:
+            data (dict): The data given from the Adaptor. Keys expected: ['actions'], a list of
+                dicts with the 'name' and 'args' of each action.
+
+        Raises:
+            RuntimeError: If one of the actions does not exist.
+        """
+        actions = data.get("actions", [])
+        for index, action in enumerate(actions, start=1):
+            name = action.get("name", "")
+            prefix = f"KeyShotClient: Batch action {index}/{len(actions)} {name}"
+            start = time.monotonic()
+            try:
+                action_func = self.action_dict.get(name)
+                if action_func is None:
+                    raise RuntimeError(f"The action {name} does not exist.")
+                action_func(action.get("args") or {})
+            except Exception as e:
+                print(f"{prefix} failed in {time.monotonic() - start:.3f}s: {e}", flush=True)
+                for skipped_index, skipped in enumerate(actions[index:], start=index + 1):
+                    print(
+                        f"KeyShotClient: Batch action {skipped_index}/{len(actions)} "
+                        f"{skipped.get('name', '')} skipped",
+                        flush=True,
+                    )
+                raise
+            print(f"{prefix} succeeded in {time.monotonic() - start:.3f}s", flush=True)
 
     def set_output_file_path(self, data: dict) -> None:
         """
@@ -43,25 +125,247 @@ class KeyShotHandler:
 
     def start_render(self, data: dict) -> None:
         """
-        Call the "Render Image" command
+        Call the "Render Image" command for every frame of the task. The render is aborted before
+        the next frame once the abort file exists, since the adaptor cannot send KeyShot an action
+        while it renders. KeyShot stays open with the scene loaded for the next task.
 
         Args:
-            data (dict):
+            data (dict): The data given from the Adaptor. Keys expected: ['abort_file'], the path
+                the adaptor creates to abort the render.
 
         Raises:
             RuntimeError: .
         """
-        print("Starting Render...")
-        frame = self.render_kwargs["frame"]
-        opts = lux.getRenderOptions()
-        opts.setAddToQueue(False)
+        frames = self.render_kwargs["frames"]
+        abort_file = data.get("abort_file", "")
+        print(f"Starting Render of {len(frames)} frame(s)...", flush=True)
+        if self.frame_render_mode == "SEQUENCE" and len(frames) > 1:
+            # The queued frames render in one call, so the render can only be aborted before it
+            if not self._abort_requested(abort_file, 0, len(frames)):
+                self._render_sequence(frames)
+        else:
+            for index, frame in enumerate(frames):
+                if self._abort_requested(abort_file, index, len(frames)):
+                    return
+                self._render_frame(frame)
+
+    def _abort_requested(self, abort_file: str, rendered: int, frames: int) -> bool:
+        """
+        Returns whether the adaptor asked for the render to be aborted, and confirms the abort to
+        the adaptor if it did
+
+        Args:
+            abort_file (str): The path the adaptor creates to abort the render.
+            rendered (int): The number of frames of the task that were rendered.
+            frames (int): The number of frames of the task.
+        """
+        if not abort_file or not os.path.exists(abort_file):
+            return False
+        print(f"KeyShotClient: Render aborted after {rendered} of {frames} frame(s)", flush=True)
+        return True
+
+    def _get_output_path(self, frame: int) -> str:
+        """
+        Returns the output path for a frame by substituting the frame number for %d
+        """
+        return self.output_path.replace("%d", str(frame))
+
+    def _clear_render_options(self) -> None:
+        """
+        Forgets the cached render options, which belong to the scene that was open
+        """
+        self.render_options = None
+        self.applied_render_settings = {}
+
+    def _get_render_options(self, add_to_queue: bool) -> Any:
+        """
+        Returns the render options of the open scene with the given settings applied. The options
+        are fetched from KeyShot once per scene, and a setting is only applied again when its value
+        differs from the one last applied. The options are logged in full the first time and after
+        that only the settings that changed are logged.
+
+        Args:
+            add_to_queue (bool): Whether renders are added to KeyShot's render queue
+
+        Returns:
+            Any: The lux.RenderOptions to render with
+        """
+        changed = self.render_options is None
+        if self.render_options is None:
+            self.render_options = lux.getRenderOptions()
+        for name, (method, value) in self._get_render_option_settings(add_to_queue).items():
+            if self.applied_render_settings.get(name) == (method, value):
+                continue
+            setter = getattr(self.render_options, method, None)
+            if callable(setter):
+                setter(value)
+            else:
+                # Not every KeyShot version lets scripts set every render option
+                print(f"KeyShot does not support RenderOptions.{method}, so {name} is not set")
+            self.applied_render_settings[name] = (method, value)
+            changed = True
+        # The output format is passed to renderImage rather than set on the options, but it is
+        # logged with them
+        if self.applied_render_settings.get("output_format") != self.output_format_code:
+            self.applied_render_settings["output_format"] = self.output_format_code
+            changed = True
+        if changed:
+            self._log_render_options()
+        return self.render_options
+
+    def _get_render_option_settings(self, add_to_queue: bool) -> Dict[str, Tuple[str, Any]]:
+        """
+        Returns the lux.RenderOptions method and value of each render setting to apply
+
+        Args:
+            add_to_queue (bool): Whether renders are added to KeyShot's render queue
+
+        Returns:
+            Dict[str, Tuple[str, Any]]: The method and value of each setting, by setting name
+        """
+        settings: Dict[str, Tuple[str, Any]] = {"add_to_queue": ("setAddToQueue", add_to_queue)}
+        threads = self.render_settings.get("threads") or self.render_threads
+        if threads:
+            settings["threads"] = ("setThreads", threads)
+        render_mode = self.render_settings.get("render_mode")
+        if render_mode in _RENDER_MODE_SETTERS:
+            method, value_name = _RENDER_MODE_SETTERS[render_mode]
+            settings["render_mode"] = (method, self.render_settings[value_name])
+        return settings
+
+    def _get_render_size(self) -> Dict[str, int]:
+        """
+        Returns the width and height arguments of lux.renderImage, which are left out to render at
+        the resolution of the scene
+        """
+        size = {}
+        for name in ("width", "height"):
+            if self.render_settings.get(name):
+                size[name] = self.render_settings[name]
+        return size
+
+    def _log_render_options(self) -> None:
+        """
+        Logs all of the render options the first time they are used, and then only the ones that
+        changed since they were last logged
+        """
+        options = _get_render_options_dict(self.render_options)
+        options["output_format"] = self.output_format_code
+        options.update(self._get_render_size())
+        previous = self.logged_render_options
+        self.logged_render_options = options
+        if previous is None:
+            pprint(f"KeyShot Render Options: {options}", indent=4)
+            return
+        changes = {
+            name: value
+            for name, value in options.items()
+            if name not in previous or previous[name] != value
+        }
+        if changes:
+            print(f"KeyShot Render Options changed: {changes}")
+
+    def _render_frame(self, frame: int) -> None:
+        """
+        Renders a single frame to the output path
+
+        Args:
+            frame (int): The animation frame to render
+        """
+        opts = self._get_render_options(add_to_queue=False)
         lux.setAnimationFrame(frame)
-        output_path = self.output_path.replace("%d", str(frame))
-        pprint(f"KeyShot Render Options: {opts}", indent=4)
-        print(f"KeyShot Render Output Format: {self.output_format_code}")
-        lux.renderImage(path=output_path, opts=opts, format=self.output_format_code)
+        output_path = self._get_output_path(frame)
+        lux.renderImage(
+            path=output_path, opts=opts, format=self.output_format_code, **self._get_render_size()
+        )
         print(f"Finished Rendering {output_path}")
 
+    def _render_sequence(self, frames: list[int]) -> None:
+        """
+        Adds every frame to KeyShot's render queue and renders the whole queue in one batch, so
+        the render state is set up once for the sequence instead of once per frame. KeyShot
+        reports progress for each queued frame as it renders. The queue is cleared first, since
+        processing it would also render any queue items saved in the scene.
+
+        Args:
+            frames (list[int]): The animation frames to render
+        """
+        lux.clearQueue()
+        opts = self._get_render_options(add_to_queue=True)
+        output_paths = []
+        for frame in frames:
+            lux.setAnimationFrame(frame)
+            output_path = self._get_output_path(frame)
+            lux.renderImage(
+                path=output_path,
+                opts=opts,
+                format=self.output_format_code,
+                **self._get_render_size(),
+            )
+            output_paths.append(output_path)
+        print(f"Rendering {len(frames)} queued frame(s) as a sequence")
+        lux.processQueue()
+        for output_path in output_paths:
+            print(f"Finished Rendering {output_path}")
+
+    def set_frame_render_mode(self, data: dict) -> None:
+        """
+        Sets whether the frames of a task are rendered one at a time or as a single sequence
+
+        Args:
+            data (dict): The data given from the Adaptor. Keys expected: ['frame_render_mode']
+
+        Raises:
+            RuntimeError: If the frame render mode is not PER_FRAME or SEQUENCE
+        """
+        frame_render_mode = data.get("frame_render_mode", "PER_FRAME")
+        if frame_render_mode not in ("PER_FRAME", "SEQUENCE"):
+            raise RuntimeError(f"The frame render mode {frame_render_mode} is not valid.")
+        self.frame_render_mode = frame_render_mode
+
+    def set_render_threads(self, data: dict) -> None:
+        """
+        Sets the number of threads KeyShot renders with
+
+        Args:
+            data (dict): The data given from the Adaptor. Keys expected: ['render_threads']
+        """
+        self.render_threads = int(data["render_threads"])
+
+    def set_render_options(self, data: dict) -> None:
+        """
+        Sets the render settings of the job, which are applied over the ones saved in the scene.
+        Settings that are 0 keep the value saved in the scene. Without a render_mode, max_samples
+        selects the MAX_SAMPLES mode and max_time_seconds the MAX_TIME mode.
+
+        Args:
+            data (dict): The data given from the Adaptor. Keys expected: ['render_options'], a
+                dict of any of 'threads', 'render_mode', 'max_samples', 'max_time_seconds',
+                'width' and 'height'.
+
+        Raises:
+            RuntimeError: If the render mode is not valid or the setting it takes its value from
+                is not set.
+        """
+        settings = {name: value for name, value in data["render_options"].items() if value}
+        render_mode = settings.get("render_mode")
+        if render_mode is None:
+            if "max_samples" in settings:
+                render_mode = "MAX_SAMPLES"
+            elif "max_time_seconds" in settings:
+                render_mode = "MAX_TIME"
+        if render_mode in _RENDER_MODE_SETTERS:
+            value_name = _RENDER_MODE_SETTERS[render_mode][1]
+            if value_name not in settings:
+                raise RuntimeError(
+                    f"The render mode {render_mode} requires {value_name} to be set."
+                )
+        elif render_mode not in (None, "SCENE"):
+            raise RuntimeError(f"The render mode {render_mode} is not valid.")
+        if render_mode is not None:
+            settings["render_mode"] = render_mode
+        self.render_settings = settings
+
     def set_output_format(self, data: dict) -> None:
         """
         Sets the output format for the render
@@ -92,11 +396,22 @@ class KeyShotHandler:
             data (dict):
 
         """
-        self.render_kwargs["frame"] = int(data.get("frame", ""))
+        self.render_kwargs["frames"] = [int(data.get("frame", ""))]
+
+    def set_frames(self, data: dict) -> None:
+        """
+        Sets the frames to render for a chunked task
+
+        Args:
+            data (dict): The data given from the Adaptor. Keys expected: ['frames']
+
+        """
+        self.render_kwargs["frames"] = [int(frame) for frame in data.get("frames", [])]
 
     def set_scene_file(self, data: dict) -> None:
         """
-        Opens the scene file in KeyShot.
+        Opens the scene file in KeyShot. Opening is skipped when the same file, unchanged since it
+        was opened, is already loaded.
 
         Args:
             data (dict): The data given from the Adaptor. Keys expected: ['scene_file']
@@ -108,4 +423,25 @@ class KeyShotHandler:
         print("scene_file", scene_file)
         if not os.path.isfile(scene_file):
             raise FileNotFoundError(f"The scene file '{scene_file}' does not exist")
+        stat = os.stat(scene_file)
+        scene = (os.path.normcase(os.path.abspath(scene_file)), stat.st_size, stat.st_mtime_ns)
+        if scene == self.loaded_scene:
+            print(f"Scene file '{scene_file}' is already loaded")
+            return
+        self.loaded_scene = None
+        # Opening a scene replaces its render options
+        self._clear_render_options()
         lux.openFile(scene_file)
+        self.loaded_scene = scene
+
+
+def _get_render_options_dict(opts: Any) -> Dict[str, Any]:
+    """
+    Returns the settings of a lux.RenderOptions as a dict. Falls back to the options' string form
+    when the KeyShot version does not provide RenderOptions.getDict.
+    """
+    get_dict = getattr(opts, "getDict", None)
+    options = get_dict() if callable(get_dict) else None
+    if isinstance(options, dict):
+        return dict(options)
+    return {"options": str(opts)}
@@ -3,12 +3,12 @@
 # Submit to AWS Deadline Cloud
 
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+import glob
 import json
 import os
 import platform
 import subprocess
 import tempfile
-import glob
 from dataclasses import dataclass
 from typing import Any, Optional, Tuple
 
@@ -16,8 +16,29 @@ import lux
 
 RENDER_SUBMITTER_SETTINGS_FILE_EXT = ".deadline_render_settings.json"
 SUBMISSION_MODE_KEY = "submission_mode"
+MULTI_SCENE_KEY = "multi_scene"
+CHUNK_FRAMES_KEY = "chunk_frames"
 # Unique ID required to allow KeyShot to save selections for a dialog
 DEADLINE_CLOUD_DIALOG_ID = "e309ce79-3ee8-446a-8308-10d16dfcbb42"
+# The render options of the init data, set from the job parameters in the "KeyShot Render Options"
+# group. Options that are 0 keep the value saved in the scene.
+RENDER_OPTIONS_INIT_DATA = (
+    "render_options:\n"
+    "  threads: {{Param.RenderThreads}}\n"
+    "  render_mode: '{{Param.RenderMode}}'\n"
+    "  max_samples: {{Param.MaxSamples}}\n"
+    "  max_time_seconds: {{Param.MaxRenderTimeSeconds}}\n"
+    "  width: {{Param.ResolutionWidth}}\n"
+    "  height: {{Param.ResolutionHeight}}\n"
+)
+# The render budget of the init data, which limits the render time of each frame so that the job
+# finishes by FinishBy. The adaptor ignores it when FinishBy is empty.
+RENDER_BUDGET_INIT_DATA = (
+    "render_budget:\n"
+    "  finish_by: '{{Param.FinishBy}}'\n"
+    "  frames: '{{Param.Frames}}'\n"
+    "  workers: {{Param.FinishByWorkers}}\n"
+)
 
 
 @dataclass
@@ -96,12 +117,14 @@ class Settings:
             self.referenced_paths = asset_references["referencedPaths"]
 
 
-def construct_job_template(filename: str) -> dict:
+def construct_job_template(filename: str, chunk_frames: bool = False) -> dict:
     """
     Constructs and returns a dict containing a valid job template for the KeyShot job.
+    When chunk_frames is set, the template uses the TASK_CHUNKING extension so that each task
+    renders ChunkSize frames. Otherwise each task renders one frame, which every farm supports.
     The return value is safe to convert/dump to JSON or YAML.
     """
-    return {
+    job_template: dict[str, Any] = {
         "specificationVersion": "jobtemplate-2023-09",
         "name": filename,
         "parameterDefinitions": [
@@ -129,6 +152,20 @@ def construct_job_template(filename: str) -> dict:
                 "description": "The frames to render. E.g. 1-3,8,11-15",
                 "minLength": 1,
             },
+            {
+                "name": "FrameRenderMode",
+                "type": "STRING",
+                "description": "Whether the frames of a task are rendered one at a time or "
+                "queued and rendered as a single sequence, which avoids setting up the render "
+                "for every frame.",
+                "allowedValues": ["PER_FRAME", "SEQUENCE"],
+                "default": "PER_FRAME",
+                "userInterface": {
+                    "control": "DROPDOWN_LIST",
+                    "label": "Frame Render Mode",
+                    "groupLabel": "KeyShot Settings",
+                },
+            },
             {
                 "name": "OutputFilePath",
                 "type": "PATH",
@@ -162,13 +199,123 @@ def construct_job_template(filename: str) -> dict:
                     "groupLabel": "KeyShot Settings",
                 },
             },
+            {
+                "name": "RenderThreads",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Render Threads",
+                    "groupLabel": "KeyShot Render Options",
+                },
+                "description": "The number of threads KeyShot renders with. 0 uses KeyShot's "
+                "default.",
+                "default": 0,
+                "minValue": 0,
+            },
+            {
+                "name": "RenderMode",
+                "type": "STRING",
+                "description": "How KeyShot decides a frame is done. SCENE keeps the mode saved "
+                "in the scene, MAX_SAMPLES and ADVANCED render Max Samples samples and MAX_TIME "
+                "renders for Max Render Time.",
+                "allowedValues": ["SCENE", "MAX_SAMPLES", "MAX_TIME", "ADVANCED"],
+                "default": "SCENE",
+                "userInterface": {
+                    "control": "DROPDOWN_LIST",
+                    "label": "Render Mode",
+                    "groupLabel": "KeyShot Render Options",
+                },
+            },
+            {
+                "name": "MaxSamples",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Max Samples",
+                    "groupLabel": "KeyShot Render Options",
+                },
+                "description": "The samples per pixel of the MAX_SAMPLES and ADVANCED render "
+                "modes.",
+                # At least 1, since the render modes that use it need a value of their own
+                "default": 128,
+                "minValue": 1,
+            },
+            {
+                "name": "MaxRenderTimeSeconds",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Max Render Time (seconds)",
+                    "groupLabel": "KeyShot Render Options",
+                },
+                "description": "The time each frame renders for in the MAX_TIME render mode.",
+                "default": 60,
+                "minValue": 1,
+            },
+            {
+                "name": "ResolutionWidth",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Width",
+                    "groupLabel": "KeyShot Render Options",
+                },
+                "description": "The width of the rendered images in pixels. 0 uses the "
+                "resolution of the scene.",
+                "default": 0,
+                "minValue": 0,
+            },
+            {
+                "name": "ResolutionHeight",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Height",
+                    "groupLabel": "KeyShot Render Options",
+                },
+                "description": "The height of the rendered images in pixels. 0 uses the "
+                "resolution of the scene.",
+                "default": 0,
+                "minValue": 0,
+            },
+            {
+                "name": "FinishBy",
+                "type": "STRING",
+                "userInterface": {
+                    "control": "LINE_EDIT",
+                    "label": "Finish By",
+                    "groupLabel": "KeyShot Render Budget",
+                },
+                "description": "The time every frame must be rendered by, in ISO 8601 format, "
+                "e.g. 2024-05-01T18:00:00+00:00. The render time of each frame is limited to "
+                "share out the time left among the frames left, replacing the render mode. "
+                "Leave empty to render with the render mode.",
+                "default": "",
+            },
+            {
+                "name": "FinishByWorkers",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Workers",
+                    "groupLabel": "KeyShot Render Budget",
+                },
+                "description": "The number of workers expected to render the job at once, which "
+                "share out its frames.",
+                "default": 1,
+                "minValue": 1,
+            },
         ],
         "steps": [
             {
                 "name": "Render",
                 "parameterSpace": {
                     "taskParameterDefinitions": [
-                        {"name": "Frame", "type": "INT", "range": "{{Param.Frames}}"}
+                        {
+                            "name": "Frame",
+                            "type": "INT",
+                            "range": "{{Param.Frames}}",
+                        }
                     ]
                 },
                 "stepEnvironments": [
@@ -185,6 +332,13 @@ def construct_job_template(filename: str) -> dict:
                                         "scene_file: '{{Param.KeyShotFile}}'\n"
                                         "output_file_path: '{{Param.OutputFilePath}}'\n"
                                         "output_format: 'RENDER_OUTPUT_{{Param.OutputFormat}}'\n"
+                                        "frame_render_mode: '{{Param.FrameRenderMode}}'\n"
+                                        "timings_file: "
+                                        "'{{Session.WorkingDirectory}}/keyshot_timings.jsonl'\n"
+                                        "output_log_file: "
+                                        "'{{Session.WorkingDirectory}}/keyshot_output.log'\n"
+                                        + RENDER_OPTIONS_INIT_DATA
+                                        + RENDER_BUDGET_INIT_DATA
                                     ),
                                 }
                             ],
@@ -223,7 +377,7 @@ def construct_job_template(filename: str) -> dict:
                             "name": "runData",
                             "filename": "run-data.yaml",
                             "type": "TEXT",
-                            "data": "frame: {{Task.Param.Frame}}\n",
+                            "data": "frames: '{{Task.Param.Frame}}'\n",
                         }
                     ],
                     "actions": {
@@ -244,6 +398,114 @@ def construct_job_template(filename: str) -> dict:
             }
         ],
     }
+    if chunk_frames:
+        job_template["extensions"] = ["TASK_CHUNKING"]
+        parameter_definitions = job_template["parameterDefinitions"]
+        frames_index = [param["name"] for param in parameter_definitions].index("Frames")
+        parameter_definitions.insert(
+            frames_index + 1,
+            {
+                "name": "ChunkSize",
+                "type": "INT",
+                "userInterface": {
+                    "control": "SPIN_BOX",
+                    "label": "Frames Per Task",
+                    "groupLabel": "KeyShot Settings",
+                },
+                "description": "The number of frames to render in each task. Rendering several "
+                "frames per task reduces the scheduling and job attachment overhead of quick "
+                "frames.",
+                "default": 1,
+                "minValue": 1,
+            },
+        )
+        frame_param = job_template["steps"][0]["parameterSpace"]["taskParameterDefinitions"][0]
+        frame_param["type"] = "CHUNK[INT]"
+        frame_param["chunks"] = {
+            "defaultTaskCount": "{{Param.ChunkSize}}",
+            "rangeConstraint": "NONCONTIGUOUS",
+        }
+    return job_template
+
+
+def construct_multi_scene_job_template(
+    name: str, scene_files: list[str], chunk_frames: bool = False
+) -> dict:
+    """
+    Constructs and returns a dict containing a valid job template that renders several KeyShot
+    scenes in one step. The scene is a task parameter, so the tasks of every scene share the
+    KeyShot sessions of the step instead of each scene paying for its own KeyShot startup.
+    Outputs are written to OutputDirectory as <scene name>.<frame>.<OutputFileExtension>.
+    The return value is safe to convert/dump to JSON or YAML.
+    """
+    job_template = construct_job_template(name, chunk_frames)
+    job_template["parameterDefinitions"] = [
+        param
+        for param in job_template["parameterDefinitions"]
+        if param["name"] not in ("KeyShotFile", "OutputFilePath")
+    ] + [
+        {
+            "name": "OutputDirectory",
+            "type": "PATH",
+            "objectType": "DIRECTORY",
+            "dataFlow": "OUT",
+            "userInterface": {
+                "control": "CHOOSE_DIRECTORY",
+                "label": "Output Directory",
+                "groupLabel": "KeyShot Settings",
+            },
+            "description": "The directory the renders of every scene are written to.",
+        },
+        {
+            "name": "OutputFileExtension",
+            "type": "STRING",
+            "userInterface": {
+                "control": "LINE_EDIT",
+                "label": "Output File Extension(Must match output format)",
+                "groupLabel": "KeyShot Settings",
+            },
+            "description": "The file extension of the render outputs.",
+            "default": "png",
+            "minLength": 1,
+        },
+    ]
+
+    step = job_template["steps"][0]
+    step["name"] = "RenderScenes"
+    parameter_space = step["parameterSpace"]
+    parameter_space["taskParameterDefinitions"] = [
+        {"name": "KeyShotFile", "type": "PATH", "range": list(scene_files)},
+        {
+            "name": "SceneName",
+            "type": "STRING",
+            "range": [
+                os.path.splitext(os.path.basename(scene_file))[0] for scene_file in scene_files
+            ],
+        },
+        *parameter_space["taskParameterDefinitions"],
+    ]
+    # Frames vary fastest, so the tasks of a scene run back to back and reuse the open scene.
+    parameter_space["combination"] = "(KeyShotFile, SceneName) * Frame"
+
+    init_data = step["stepEnvironments"][0]["script"]["embeddedFiles"][0]
+    init_data["data"] = (
+        "output_format: 'RENDER_OUTPUT_{{Param.OutputFormat}}'\n"
+        "frame_render_mode: '{{Param.FrameRenderMode}}'\n"
+        "timings_file: '{{Session.WorkingDirectory}}/keyshot_timings.jsonl'\n"
+        "output_log_file: '{{Session.WorkingDirectory}}/keyshot_output.log'\n"
+        + RENDER_OPTIONS_INIT_DATA
+        + RENDER_BUDGET_INIT_DATA
+        # Every scene renders the frames of the job
+        + f"  scenes: {len(scene_files)}\n"
+    )
+    run_data = step["script"]["embeddedFiles"][0]
+    run_data["data"] = (
+        "scene_file: '{{Task.Param.KeyShotFile}}'\n"
+        "output_file_path: "
+        "'{{Param.OutputDirectory}}/{{Task.Param.SceneName}}.%d.{{Param.OutputFileExtension}}'\n"
+        "frames: '{{Task.Param.Frame}}'\n"
+    )
+    return job_template
 
 
 def construct_asset_references(settings: Settings) -> dict:
@@ -362,8 +624,13 @@ def options_dialog() -> dict[str, Any]:
         Option 1: Dropdown to select whether to submit just the scene file itself
                   or all external file references as well by packing/unpacking a
                   KSP bundle before submission.
+        Option 2: Checkbox to render every scene BIP file in the scene's folder
+                  in one job. Only the BIP files are attached to a multi-scene job.
+        Option 3: Checkbox to render several frames in each task. The job then needs a
+                  farm that supports the TASK_CHUNKING job template extension.
     Returns a dictionary of the selected option values in the format:
-        {'SUBMISSION_MODE_KEY': [1, 'only the scene BIP file']}
+        {'SUBMISSION_MODE_KEY': [1, 'only the scene BIP file'], 'MULTI_SCENE_KEY': False,
+         'CHUNK_FRAMES_KEY': False}
     """
     dialog_items = [
         (
@@ -372,7 +639,19 @@ def options_dialog() -> dict[str, Any]:
             "What files would you like to attach to the job?",
             0,
             ["The scene BIP file and all external files references", "Only the scene BIP file"],
-        )
+        ),
+        (
+            MULTI_SCENE_KEY,
+            lux.DIALOG_CHECK,
+            "Render every scene BIP file in the scene's folder in one job",
+            False,
+        ),
+        (
+            CHUNK_FRAMES_KEY,
+            lux.DIALOG_CHECK,
+            "Render several frames in each task (the farm must support task chunking)",
+            False,
+        ),
     ]
     selections = lux.getInputDialog(
         title="AWS Deadline Cloud Submission Options",
@@ -483,6 +762,10 @@ def main(lux):
                 "name": "Frames",
                 "value": f"1-{frame_count}" if frame_count else f"{current_frame}",
             },
+            {
+                "name": "FrameRenderMode",
+                "value": "PER_FRAME",
+            },
             {
                 "name": "OutputFilePath",
                 "value": os.path.join(os.path.dirname(scene_file), f"{scene_name}.%d.png"),
@@ -503,9 +786,39 @@ def main(lux):
     if sticky_settings:
         settings.apply_sticky_settings(sticky_settings)
 
+    chunk_frames = bool(dialog_selections.get(CHUNK_FRAMES_KEY))
+    if chunk_frames:
+        if not any(param["name"] == "ChunkSize" for param in settings.parameter_values):
+            settings.parameter_values.append({"name": "ChunkSize", "value": 1})
+    else:
+        # Jobs without task chunking have no ChunkSize parameter
+        settings.parameter_values = [
+            param for param in settings.parameter_values if param["name"] != "ChunkSize"
+        ]
+
+    multi_scene = bool(dialog_selections.get(MULTI_SCENE_KEY))
+    if multi_scene:
+        # Each scene gets its own output file name, so only the output directory is a parameter
+        settings.parameter_values = [
+            param for param in settings.parameter_values if param["name"] != "OutputFilePath"
+        ]
+        if not any(param["name"] == "OutputDirectory" for param in settings.parameter_values):
+            settings.parameter_values.append(
+                {"name": "OutputDirectory", "value": os.path.dirname(scene_file)}
+            )
+    else:
+        settings.parameter_values = [
+            param
+            for param in settings.parameter_values
+            if param["name"] not in ("OutputDirectory", "OutputFileExtension")
+        ]
+
     with tempfile.TemporaryDirectory() as bundle_temp_dir:
+        if multi_scene:
+            scene_files = sorted(glob.glob(os.path.join(os.path.dirname(scene_file), "*.bip")))
+            settings.auto_detected_input_filenames = scene_files
         # {'submission_mode': [0, 'the scene BIP file and all external files references']}
-        if not dialog_selections[SUBMISSION_MODE_KEY][0]:
+        elif not dialog_selections[SUBMISSION_MODE_KEY][0]:
             temp_scene_file, input_filenames = get_ksp_bundle_files(bundle_temp_dir)
             settings.auto_detected_input_filenames = input_filenames
             settings.parameter_values.append({"name": "KeyShotFile", "value": temp_scene_file})
@@ -519,7 +832,12 @@ def main(lux):
         )
         settings.parameter_values.append({"name": "CondaChannels", "value": "deadline-cloud"})
 
-        job_template = construct_job_template(scene_name)
+        if multi_scene:
+            job_template = construct_multi_scene_job_template(
+                os.path.basename(os.path.dirname(scene_file)), scene_files, chunk_frames
+            )
+        else:
+            job_template = construct_job_template(scene_name, chunk_frames)
         asset_references = construct_asset_references(settings)
         parameter_values = construct_parameter_values(settings)
 
@@ -0,0 +1,70 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Iterator
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+
+
+@pytest.fixture
+def fake_keyshot_exe(tmp_path: Path) -> str:
+    """
+    Returns an executable that stands in for KeyShot by running the real keyshot_client.py against
+    the lux emulator. Set it as DEADLINE_KEYSHOT_EXE to drive the adaptor without KeyShot.
+    """
+    if sys.platform == "win32":
+        pytest.skip("The fake KeyShot executable is a POSIX shell wrapper")
+    fake_keyshot = Path(__file__).parent / "fake_keyshot.py"
+    exe = tmp_path / "keyshot"
+    # Run with this interpreter so the fake KeyShot can import the adaptor and openjd packages
+    exe.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{fake_keyshot}" "$@"\n')
+    exe.chmod(0o755)
+    return str(exe)
+
+
+@pytest.fixture
+def scene_file(tmp_path: Path) -> str:
+    """
+    Returns the path of a scene file for the fake KeyShot to open
+    """
+    scene_file = tmp_path / "scene.bip"
+    scene_file.write_bytes(b"scene")
+    return str(scene_file)
+
+
+@pytest.fixture
+def keyshot_session(
+    fake_keyshot_exe: str, scene_file: str
+) -> Callable[..., ContextManager[KeyShotAdaptor]]:
+    """
+    Returns a context manager that starts an adaptor session against the fake KeyShot, yields the
+    adaptor and cleans the session up on exit. It takes init data to add to the scene file, an
+    environment to add to DEADLINE_KEYSHOT_EXE and the telemetry client the adaptor sends to.
+    """
+
+    @contextmanager
+    def keyshot_session(
+        init_data: dict[str, Any] | None = None,
+        environment: dict[str, str] | None = None,
+        telemetry_client: Any = mock.DEFAULT,
+    ) -> Iterator[KeyShotAdaptor]:
+        adaptor = KeyShotAdaptor({"scene_file": scene_file, **(init_data or {})})
+        environment = {"DEADLINE_KEYSHOT_EXE": fake_keyshot_exe, **(environment or {})}
+        with mock.patch.dict(os.environ, environment):
+            with mock.patch.object(
+                adaptor, "_get_deadline_telemetry_client", return_value=telemetry_client
+            ):
+                try:
+                    adaptor.on_start()
+                    yield adaptor
+                finally:
+                    adaptor.on_cleanup()
+
+    return keyshot_session
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Stand-in for the headless KeyShot executable. It accepts KeyShot's command line, installs the lux
+emulator as the lux module and runs the -script file, which for the adaptor is the real
+keyshot_client.py. Set DEADLINE_KEYSHOT_EXE to this file to run the adaptor without KeyShot.
+
+Besides the variables read by the lux emulator, FAKE_KEYSHOT_STARTUP_SECONDS sets how long the
+emulated KeyShot takes to start, and FAKE_KEYSHOT_FAIL=startup makes it exit during startup like
+KeyShot does when it cannot check out a license.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import runpy
+import sys
+import time
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="keyshot")
+    parser.add_argument("-headless", action="store_true")
+    parser.add_argument("-progress", action="store_true")
+    parser.add_argument("-floating_feature")
+    parser.add_argument("-script", required=True)
+    args, _ = parser.parse_known_args(argv)
+
+    # KeyShot writes its output line by line
+    sys.stdout.reconfigure(line_buffering=True)  # type: ignore[union-attr]
+
+    time.sleep(float(os.environ.get("FAKE_KEYSHOT_STARTUP_SECONDS", 0)))
+    if os.environ.get("FAKE_KEYSHOT_FAIL") == "startup":
+        print("Error: Could not check out a KeyShot license", flush=True)
+        return 1
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import lux_emulator  # type: ignore[import-not-found]
+
+    lux_emulator.print_progress = args.progress
+    sys.modules["lux"] = lux_emulator
+
+    sys.argv = [args.script]
+    runpy.run_path(args.script, run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
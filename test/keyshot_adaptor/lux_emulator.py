@@ -0,0 +1,190 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Emulates the parts of KeyShot's lux scripting module that keyshot_client.py uses, so the real
+client can run outside of KeyShot. fake_keyshot.py installs it as the lux module.
+
+The emulated KeyShot is configured through environment variables:
+    FAKE_KEYSHOT_VERSION: The KeyShot display version. Defaults to 12.1.
+    FAKE_KEYSHOT_SCENE_LOAD_SECONDS: The time openFile takes. Defaults to 0.
+    FAKE_KEYSHOT_RENDER_SECONDS: The time rendering an image takes. Defaults to 0.
+    FAKE_KEYSHOT_PROGRESS_STEPS: The number of progress lines printed per image when KeyShot was
+        started with -progress. Defaults to 4.
+    FAKE_KEYSHOT_FAIL: Injects a failure: "open_file" raises from openFile, "render" prints a
+        render error, "crash" exits KeyShot half way through a render and "hang" stops a render
+        half way through without ever finishing it.
+    FAKE_KEYSHOT_FAIL_AFTER: The number of images rendered successfully before the failure is
+        injected. Defaults to 0.
+    FAKE_KEYSHOT_FAIL_ONCE: A file that is created when the failure is injected. The failure is
+        not injected once the file exists, so KeyShot processes started after it do not fail.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Optional
+
+RENDER_OUTPUT_PNG = 0
+RENDER_OUTPUT_JPEG = 1
+RENDER_OUTPUT_EXR = 2
+RENDER_OUTPUT_TIFF8 = 3
+RENDER_OUTPUT_TIFF32 = 4
+RENDER_OUTPUT_PSD8 = 5
+RENDER_OUTPUT_PSD16 = 6
+RENDER_OUTPUT_PSD32 = 7
+
+# Set by fake_keyshot.py when KeyShot is started with -progress
+print_progress = False
+
+_scene_file: Optional[str] = None
+_animation_frame = 0
+_rendered_images = 0
+_render_queue: list[tuple[str, str]] = []
+
+
+def _get_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+class RenderOptions:
+    """
+    The render options of the emulated scene
+    """
+
+    def __init__(self) -> None:
+        self.add_to_queue = False
+        self.threads = 0
+        self.render_mode = "MAX_SAMPLES"
+        self.max_samples = 16
+        self.max_time_seconds = 0.0
+
+    def setAddToQueue(self, add_to_queue: bool) -> None:
+        self.add_to_queue = add_to_queue
+
+    def setThreads(self, threads: int) -> None:
+        self.threads = threads
+
+    def setMaxSamplesRendering(self, samples: int) -> None:
+        self.render_mode, self.max_samples = "MAX_SAMPLES", samples
+
+    def setMaxTimeRendering(self, seconds: float) -> None:
+        self.render_mode, self.max_time_seconds = "MAX_TIME", seconds
+
+    def setAdvancedRendering(self, samples: int) -> None:
+        self.render_mode, self.max_samples = "ADVANCED", samples
+
+    def getDict(self) -> dict[str, Any]:
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return f"RenderOptions({vars(self)})"
+
+
+_render_options = RenderOptions()
+
+
+def getKeyShotDisplayVersion() -> tuple[int, int]:
+    major, minor = os.environ.get("FAKE_KEYSHOT_VERSION", "12.1").split(".")[:2]
+    return int(major), int(minor)
+
+
+def openFile(path: str, **kwargs: Any) -> bool:
+    global _scene_file
+    if os.environ.get("FAKE_KEYSHOT_FAIL") == "open_file":
+        raise RuntimeError(f"Could not open the scene {path}")
+    time.sleep(_get_float("FAKE_KEYSHOT_SCENE_LOAD_SECONDS", 0))
+    _scene_file = path
+    return True
+
+
+def newScene() -> None:
+    global _scene_file, _render_options
+    _scene_file = None
+    _render_options = RenderOptions()
+
+
+def getRenderOptions() -> RenderOptions:
+    return _render_options
+
+
+def setAnimationFrame(frame: int) -> None:
+    global _animation_frame
+    _animation_frame = frame
+
+
+def getAnimationFrame() -> int:
+    return _animation_frame
+
+
+def _should_fail(failure: str) -> bool:
+    """
+    Returns whether the failure is injected into the image being rendered
+    """
+    if os.environ.get("FAKE_KEYSHOT_FAIL") != failure:
+        return False
+    if _rendered_images < int(os.environ.get("FAKE_KEYSHOT_FAIL_AFTER", 0)):
+        return False
+    fail_once = os.environ.get("FAKE_KEYSHOT_FAIL_ONCE")
+    if fail_once:
+        try:
+            open(fail_once, "x").close()
+        except FileExistsError:
+            return False
+    return True
+
+
+def _inject_failure(progress: int) -> None:
+    """
+    Injects the configured failure half way through the render of an image
+    """
+    if progress < 50:
+        return
+    if _should_fail("crash"):
+        print("Fatal: KeyShot stopped unexpectedly", flush=True)
+        os._exit(3)
+    if _should_fail("hang"):
+        threading.Event().wait()
+
+
+def _render(path: str, image: str) -> bool:
+    global _rendered_images
+    steps = max(1, int(os.environ.get("FAKE_KEYSHOT_PROGRESS_STEPS", 4)))
+    step_seconds = _get_float("FAKE_KEYSHOT_RENDER_SECONDS", 0) / steps
+    for step in range(1, steps + 1):
+        time.sleep(step_seconds)
+        progress = 100 * step // steps
+        _inject_failure(progress)
+        if print_progress:
+            print(f"Rendering: {progress}%", flush=True)
+
+    if _should_fail("render"):
+        print(f"Error: Could not render {path}", flush=True)
+        return False
+    if path:
+        with open(path, "wb") as f:
+            f.write(image.encode())
+    _rendered_images += 1
+    return True
+
+
+def renderImage(
+    path: str, width: int = -1, height: int = -1, opts: Optional[RenderOptions] = None, **kwargs
+) -> bool:
+    format = kwargs.get("format", RENDER_OUTPUT_PNG)
+    # What the image was rendered from, written as its contents
+    image = f"{_scene_file}:{_animation_frame}:{format}:{width}x{height}:{opts!r}"
+    if opts is not None and opts.add_to_queue:
+        _render_queue.append((path, image))
+        return True
+    return _render(path, image)
+
+
+def clearQueue() -> None:
+    global _render_queue
+    _render_queue = []
+
+
+def processQueue() -> bool:
+    global _render_queue
+    queue, _render_queue = _render_queue, []
+    return all([_render(path, image) for path, image in queue])
@@ -0,0 +1,800 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, ContextManager, Optional
+from unittest import mock
+
+import jsonschema  # type: ignore[import-untyped]
+import pytest
+from openjd.adaptor_runtime.app_handlers import RegexCallback, RegexHandler
+from openjd.adaptor_runtime.process import LoggingSubprocess
+from openjd.adaptor_runtime_client import Action
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import (
+    KeyShotActionsQueue,
+    KeyShotAdaptor,
+    KeyShotOutputHandler,
+    KeyShotProgressReporter,
+    KeyShotNotRunningError,
+    KeyShotRegexCallback,
+    KeyShotRenderCanceledError,
+    KeyShotRenderError,
+    _get_keyshot_args,
+    _get_keyshot_client_path,
+    _get_keyshot_client_variables,
+    _parse_frames,
+    _write_keyshot_launch_script,
+)
+from deadline.keyshot_adaptor.KeyShotAdaptor.timings import KeyShotTimings
+
+
+@pytest.fixture
+def adaptor() -> KeyShotAdaptor:
+    return KeyShotAdaptor({"scene_file": "scene.bip"})
+
+
+class TestKeyShotActionsQueue:
+    def test_dequeue_notifies_waiters(self):
+        condition = threading.Condition()
+        queue = KeyShotActionsQueue(condition)
+        queue.enqueue_action(Action("frame", {"frame": 1}))
+
+        threading.Timer(0.05, queue.dequeue_action).start()
+        with condition:
+            drained = condition.wait_for(lambda: len(queue) == 0, timeout=5)
+
+        assert drained
+
+    def test_front_enqueue(self):
+        queue = KeyShotActionsQueue(threading.Condition())
+        queue.enqueue_action(Action("frame", {"frame": 1}))
+        queue.enqueue_action(Action("close"), front=True)
+
+        action = queue.dequeue_action()
+
+        assert action is not None and action.name == "close"
+
+    @pytest.mark.parametrize("wait_seconds", [0.0, 5.0])
+    def test_request_of_forgotten_client_does_not_take_the_next_action(self, wait_seconds: float):
+        queue = KeyShotActionsQueue(threading.Condition(), wait_seconds=wait_seconds)
+        results: list[Optional[Action]] = []
+
+        # The server keeps asking for an action for the request until it has one
+        def request() -> None:
+            action = None
+            while action is None:
+                action = queue.dequeue_action()
+            results.append(action)
+
+        waiting = threading.Thread(target=request)
+        waiting.start()
+        time.sleep(0.05)
+        queue.forget_client()
+        queue.enqueue_action(Action("scene_file", {"scene_file": "a.bip"}))
+        waiting.join(timeout=5)
+
+        assert [action.name for action in results if action is not None] == ["close"]
+        action = queue.dequeue_action()
+        assert action is not None and action.name == "scene_file"
+
+    def test_release_waiting_request(self):
+        queue = KeyShotActionsQueue(threading.Condition(), wait_seconds=60)
+        results: list[Optional[Action]] = []
+        waiting = threading.Thread(target=lambda: results.append(queue.dequeue_action()))
+        waiting.start()
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        queue.release_waiting_request()
+        waiting.join(timeout=5)
+
+        assert time.monotonic() - start < 5
+        assert [action.name for action in results if action is not None] == ["close"]
+        queue.enqueue_action(Action("scene_file", {"scene_file": "a.bip"}))
+        action = queue.dequeue_action()
+        assert action is not None and action.name == "scene_file"
+
+    def test_action_performed_when_client_asks_again(self):
+        on_action_performed = mock.Mock()
+        queue = KeyShotActionsQueue(threading.Condition(), on_action_performed)
+        queue.enqueue_action(Action("scene_file", {"scene_file": "a.bip"}))
+        queue.enqueue_action(Action("frames", {"frames": [1]}))
+
+        queue.dequeue_action()
+        assert not queue.is_idle
+        queue.dequeue_action()
+        queue.dequeue_action()
+
+        assert queue.is_idle
+        assert [call.args[0].name for call in on_action_performed.call_args_list] == [
+            "scene_file",
+            "frames",
+        ]
+        for call in on_action_performed.call_args_list:
+            latency, performed = call.args[1:]
+            assert latency >= 0 and performed >= 0
+
+    def test_dequeue_waits_for_an_action(self):
+        condition = threading.Condition()
+        queue = KeyShotActionsQueue(condition, wait_seconds=5)
+        on_idle = threading.Event()
+
+        def enqueue_when_idle() -> None:
+            with condition:
+                condition.wait_for(lambda: queue.is_idle, timeout=5)
+            on_idle.set()
+            queue.enqueue_action(Action("frame", {"frame": 1}))
+
+        threading.Thread(target=enqueue_when_idle).start()
+        start = time.monotonic()
+        action = queue.dequeue_action()
+
+        assert on_idle.is_set()
+        assert action is not None and action.name == "frame"
+        assert time.monotonic() - start < 5
+
+    def test_dequeue_wait_times_out(self):
+        queue = KeyShotActionsQueue(threading.Condition(), wait_seconds=0.01)
+
+        assert queue.dequeue_action() is None
+        assert queue.is_idle
+
+    def test_forget_client(self):
+        on_action_performed = mock.Mock()
+        queue = KeyShotActionsQueue(threading.Condition(), on_action_performed)
+        queue.enqueue_action(Action("close"))
+        queue.enqueue_action(Action("frames", {"frames": [1]}))
+        queue.dequeue_action()
+
+        queue.forget_client()
+
+        assert queue.is_idle and len(queue) == 0
+        assert queue.first_request_at is None
+        queue.dequeue_action()
+        on_action_performed.assert_not_called()
+
+
+class TestKeyShotOutputHandler:
+    LINES = [
+        "Loading texture wood.png",
+        "Rendering: 50%",
+        "Finished Rendering /renders/out.1.png",
+        "Finished Rendering: 100%",
+        "ERROR: license not found",
+        "[error] missing texture",
+        "KeyShotClient: KeyShot Version 12.1.1",
+        "",
+    ]
+
+    def _callbacks(self, calls: list) -> list[RegexCallback]:
+        def record(name):
+            return lambda match: calls.append((name, match.group(0), match.groups()))
+
+        return [
+            KeyShotRegexCallback(
+                [re.compile(".*Finished Rendering.*")],
+                record("complete"),
+                literals=["Finished Rendering"],
+            ),
+            KeyShotRegexCallback(
+                [re.compile(".*Rendering: ([0-9]+)%.*")],
+                record("progress"),
+                literals=["Rendering: "],
+            ),
+            KeyShotRegexCallback(
+                [re.compile(".*Error: .*|.*\\[Error\\].*", re.IGNORECASE)],
+                record("error"),
+                literals=["Error: ", "[Error]"],
+                ignore_case=True,
+            ),
+            RegexCallback([re.compile("texture")], record("no literals")),
+        ]
+
+    def _dispatch(self, handler_class: type[RegexHandler]) -> list:
+        calls: list = []
+        handler = handler_class(self._callbacks(calls))
+        for line in self.LINES:
+            handler.handle(logging.makeLogRecord({"msg": line}))
+        return calls
+
+    def test_same_callbacks_and_matches_as_regex_handler(self):
+        assert self._dispatch(KeyShotOutputHandler) == self._dispatch(RegexHandler)
+
+    def test_exit_if_matched(self):
+        calls: list = []
+        handler = KeyShotOutputHandler(
+            [
+                KeyShotRegexCallback(
+                    [re.compile("Rendering")],
+                    lambda match: calls.append("first"),
+                    literals=["Rendering"],
+                    exit_if_matched=True,
+                ),
+                KeyShotRegexCallback(
+                    [re.compile("Rendering")],
+                    lambda match: calls.append("second"),
+                    literals=["Rendering"],
+                ),
+            ]
+        )
+
+        handler.handle(logging.makeLogRecord({"msg": "Rendering: 5%"}))
+
+        assert calls == ["first"]
+
+
+class TestKeyShotProgressReporter:
+    @pytest.fixture
+    def sink(self):
+        reported: list[float] = []
+        condition = threading.Condition()
+
+        def report(progress: float) -> None:
+            with condition:
+                reported.append(progress)
+                condition.notify_all()
+
+        return reported, condition, report
+
+    def test_coalesces_updates_to_the_latest(self, sink):
+        values, condition, report = sink
+        reporter = KeyShotProgressReporter(report, interval=60, min_change=1)
+        reporter.update(1)
+        reporter.start()
+        try:
+            with condition:
+                assert condition.wait_for(lambda: values == [1], timeout=5)
+            # Reports are held back for the interval, and only the latest value is kept
+            for progress in range(2, 50):
+                reporter.update(progress)
+            reporter.flush(100)
+        finally:
+            reporter.stop()
+
+        assert values == [1, 100]
+
+    def test_reports_at_most_once_per_interval(self, sink):
+        values, condition, report = sink
+        reporter = KeyShotProgressReporter(report, interval=0.05, min_change=1)
+        reporter.start()
+        try:
+            reporter.update(10)
+            with condition:
+                assert condition.wait_for(lambda: values == [10], timeout=5)
+            reporter.update(20)
+            reporter.update(30)
+            with condition:
+                assert condition.wait_for(lambda: values == [10, 30], timeout=5)
+        finally:
+            reporter.stop()
+
+    def test_skips_changes_below_min_change(self, sink):
+        values, condition, report = sink
+        reporter = KeyShotProgressReporter(report, interval=0, min_change=5)
+        reporter.start()
+        try:
+            reporter.update(10)
+            with condition:
+                assert condition.wait_for(lambda: values == [10], timeout=5)
+            for progress in [12, 14, 16]:
+                reporter.update(progress)
+            with condition:
+                assert condition.wait_for(lambda: values == [10, 16], timeout=5)
+            # A flush is always reported
+            reporter.flush(16.5)
+        finally:
+            reporter.stop()
+
+        assert values == [10, 16, 16.5]
+
+
+class TestWaits:
+    def test_wait_for_state_wakes_on_complete(self, adaptor: KeyShotAdaptor):
+        adaptor._is_rendering = True
+        match = re.match(".*Finished Rendering.*", "Finished Rendering out.png")
+        assert match is not None
+
+        with mock.patch.object(KeyShotAdaptor, "update_status"):
+            threading.Timer(0.05, adaptor._handle_complete, args=(match,)).start()
+            finished = adaptor._wait_for_state(lambda: not adaptor._is_rendering, timeout=5)
+
+        assert finished
+
+    def test_wait_for_state_times_out(self, adaptor: KeyShotAdaptor):
+        assert not adaptor._wait_for_state(lambda: False, timeout=0.01)
+
+    def test_wait_for_state_raises_caught_exception(self, adaptor: KeyShotAdaptor):
+        adaptor._handle_error(re.match(".*", "Error: license"))  # type: ignore[arg-type]
+
+        with pytest.raises(RuntimeError, match="license"):
+            adaptor._wait_for_state(lambda: adaptor._has_exception, timeout=5)
+
+    def test_wait_for_server_times_out(self, adaptor: KeyShotAdaptor):
+        adaptor._SERVER_START_TIMEOUT_SECONDS = 0.01  # type: ignore[assignment]
+
+        with pytest.raises(RuntimeError, match="did not finish initializing"):
+            adaptor._wait_for_server()
+
+    def test_instances_do_not_share_queues(self):
+        first = KeyShotAdaptor({"scene_file": "a.bip"})
+        second = KeyShotAdaptor({"scene_file": "b.bip"})
+
+        first._populate_action_queue()
+
+        assert len(first._action_queue) == 1
+        assert len(second._action_queue) == 0
+
+
+class TestFrames:
+    @pytest.mark.parametrize(
+        "frames, expected",
+        [
+            (3, [3]),
+            ([1, 2, 5], [1, 2, 5]),
+            ("7", [7]),
+            ("1-3", [1, 2, 3]),
+            ("1-3,8,10-14:2", [1, 2, 3, 8, 10, 12, 14]),
+            ("-2-1", [-2, -1, 0, 1]),
+        ],
+    )
+    def test_parse_frames(self, frames, expected):
+        assert _parse_frames(frames) == expected
+
+    @pytest.mark.parametrize("frames", ["", "1-", "3-1", "1-5:0", "a"])
+    def test_parse_frames_invalid(self, frames):
+        with pytest.raises(ValueError):
+            _parse_frames(frames)
+
+    @pytest.mark.parametrize(
+        "run_data",
+        [
+            {"frame": 1},
+            {"frames": "1-5"},
+            {"frames": [1, 2]},
+            {"frames": 4},
+            {"frames": "1", "scene_file": "b.bip", "output_format": "RENDER_OUTPUT_EXR"},
+        ],
+    )
+    def test_run_data_schema_accepts(self, adaptor: KeyShotAdaptor, run_data: dict):
+        adaptor.validators.run_data.validate(run_data)
+
+    @pytest.mark.parametrize(
+        "run_data", [{}, {"frame": 1, "frames": "1-5"}, {"frames": "1-a"}, {"frames": []}]
+    )
+    def test_run_data_schema_rejects(self, adaptor: KeyShotAdaptor, run_data: dict):
+        with pytest.raises(jsonschema.ValidationError):
+            adaptor.validators.run_data.validate(run_data)
+
+    def test_progress_combined_across_chunk(self, adaptor: KeyShotAdaptor):
+        adaptor._expected_outputs = 4
+        adaptor._produced_outputs = 0
+        adaptor._is_rendering = True
+        progress_regex = re.compile(".*Rendering: ([0-9]+)%.*")
+        complete_regex = re.compile(".*Finished Rendering.*")
+
+        with mock.patch.object(adaptor._progress_reporter, "update") as update:
+            adaptor._handle_progress(progress_regex.match("Rendering: 50%"))  # type: ignore[arg-type]
+            adaptor._handle_complete(complete_regex.match("Finished Rendering 1.png"))  # type: ignore[arg-type]
+            adaptor._handle_progress(progress_regex.match("Rendering: 50%"))  # type: ignore[arg-type]
+
+        assert [call.args[0] for call in update.call_args_list] == [
+            12.5,
+            25,
+            37.5,
+        ]
+        assert adaptor._is_rendering
+
+    def test_render_complete_after_last_frame_of_chunk(self, adaptor: KeyShotAdaptor):
+        adaptor._expected_outputs = 2
+        adaptor._produced_outputs = 1
+        adaptor._is_rendering = True
+        complete_regex = re.compile(".*Finished Rendering.*")
+
+        with mock.patch.object(KeyShotAdaptor, "update_status") as update_status:
+            adaptor._handle_complete(complete_regex.match("Finished Rendering 2.png"))  # type: ignore[arg-type]
+
+        # The final progress is reported before the render is marked complete
+        update_status.assert_called_once_with(progress=100)
+        assert not adaptor._is_rendering
+
+    def test_progress_of_sequence_follows_frame_restarts(self, adaptor: KeyShotAdaptor):
+        adaptor._expected_outputs = 3
+        progress_regex = re.compile(".*Rendering: ([0-9]+)%.*")
+
+        with mock.patch.object(adaptor._progress_reporter, "update") as update:
+            for line in ["Rendering: 30%", "Rendering: 90%", "Rendering: 30%", "Rendering: 60%"]:
+                adaptor._handle_progress(progress_regex.match(line))  # type: ignore[arg-type]
+
+        assert [call.args[0] for call in update.call_args_list] == [
+            10,
+            30,
+            (100 + 30) / 3,
+            (100 + 60) / 3,
+        ]
+
+
+class TestMultiScene:
+    @pytest.fixture
+    def running(self):
+        with mock.patch.object(
+            KeyShotAdaptor, "_keyshot_is_running", new_callable=mock.PropertyMock
+        ) as running:
+            running.return_value = True
+            with mock.patch.object(KeyShotAdaptor, "_wait_for_state"):
+                yield running
+
+    def test_init_data_scene_file_is_optional(self):
+        KeyShotAdaptor({}).validators.init_data.validate({"output_format": "RENDER_OUTPUT_PNG"})
+
+    def test_run_data_scene_sent_before_render(self, running):
+        adaptor = KeyShotAdaptor({})
+
+        adaptor.on_run(
+            {"scene_file": "b.bip", "output_file_path": "/renders/b.%d.png", "frames": "1-2"}
+        )
+
+        (batch,) = [
+            adaptor._action_queue.dequeue_action() for _ in range(len(adaptor._action_queue))
+        ]
+        assert batch is not None and batch.name == "batch" and batch.args is not None
+        assert [action["name"] for action in batch.args["actions"]] == [
+            "scene_file",
+            "output_file_path",
+            "frames",
+            "start_render",
+        ]
+        assert batch.args["actions"][0]["args"] == {"scene_file": "b.bip"}
+        assert adaptor._pending_batch_results == 4
+
+    def test_run_without_any_scene_file(self, running):
+        with pytest.raises(ValueError):
+            KeyShotAdaptor({}).on_run({"frames": "1"})
+
+
+class TestBatchActions:
+    @staticmethod
+    def _output(handler: KeyShotOutputHandler, line: str) -> None:
+        handler.handle(logging.makeLogRecord({"msg": line}))
+
+    def test_results_record_action_timings(self, adaptor: KeyShotAdaptor):
+        adaptor._pending_batch_results = 3
+        adaptor._timings.add("write", 0.5)
+        handler = KeyShotOutputHandler(adaptor._get_regex_callbacks())
+
+        self._output(
+            handler, "KeyShotClient: Batch action 1/3 output_file_path succeeded in 0.010s"
+        )
+        self._output(handler, "KeyShotClient: Batch action 2/3 frames succeeded in 0.001s")
+        self._output(handler, "KeyShotClient: Batch action 3/3 start_render succeeded in 2.000s")
+
+        assert adaptor._timings.get_action("output_file_path") == pytest.approx(0.01)
+        assert adaptor._timings.get_action("frames") == pytest.approx(0.001)
+        assert adaptor._timings.get("render") == pytest.approx(1.5)
+        assert adaptor._pending_batch_results == 0
+        assert adaptor._exc_info is None
+
+    def test_failed_action_is_raised(self, adaptor: KeyShotAdaptor):
+        adaptor._pending_batch_results = 2
+        handler = KeyShotOutputHandler(adaptor._get_regex_callbacks())
+
+        self._output(
+            handler,
+            "KeyShotClient: Batch action 1/2 scene_file failed in 0.001s: "
+            "The scene file 'b.bip' does not exist",
+        )
+        self._output(handler, "KeyShotClient: Batch action 2/2 start_render skipped")
+
+        assert adaptor._pending_batch_results == 0
+        with pytest.raises(RuntimeError, match="failed to perform the scene_file action"):
+            adaptor._wait_for_state(lambda: adaptor._has_exception)
+
+    def test_session_fails_when_the_scene_cannot_be_opened(
+        self, keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]]
+    ):
+        with pytest.raises(RuntimeError, match="scene_file action"):
+            with keyshot_session(environment={"FAKE_KEYSHOT_FAIL": "open_file"}):
+                pass
+
+
+class TestKeyShotClientBundle:
+    def test_client_path_is_found_next_to_the_adaptor(self):
+        client_path = Path(_get_keyshot_client_path())
+
+        assert client_path.parts[-3:] == ("keyshot_adaptor", "KeyShotClient", "keyshot_client.py")
+        assert client_path.is_file()
+
+    def test_installed_bundle_is_passed_to_the_client(self, tmp_path: Path):
+        client_path = tmp_path / "keyshot_client.py"
+        with mock.patch.dict(os.environ, clear=True):
+            variables = _get_keyshot_client_variables(str(client_path), "x")
+            assert variables == {"KEYSHOT_ADAPTOR_SERVER_PATH": "x"}
+
+            (tmp_path / "keyshot_client_deps.zip").write_bytes(b"")
+            variables = _get_keyshot_client_variables(str(client_path), "x")
+            assert variables == {
+                "DEADLINE_KEYSHOT_CLIENT_BUNDLE": str(tmp_path / "keyshot_client_deps.zip"),
+                "KEYSHOT_ADAPTOR_SERVER_PATH": "x",
+            }
+
+    def test_bundle_from_the_worker_environment_is_kept(self, tmp_path: Path):
+        (tmp_path / "keyshot_client_deps.zip").write_bytes(b"")
+        with mock.patch.dict(os.environ, {"DEADLINE_KEYSHOT_CLIENT_BUNDLE": "/opt/deps.zip"}):
+            variables = _get_keyshot_client_variables(str(tmp_path / "keyshot_client.py"), "x")
+
+            assert "DEADLINE_KEYSHOT_CLIENT_BUNDLE" not in variables
+
+    def test_session_with_client_bundle(
+        self,
+        keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+        tmp_path: Path,
+        caplog: pytest.LogCaptureFixture,
+    ):
+        bundle = tmp_path / "keyshot_client_deps.zip"
+        scripts_dir = Path(__file__).parents[2] / "scripts"
+        subprocess.run(
+            [sys.executable, str(scripts_dir / "deps_bundle.py"), "--client-bundle", str(bundle)],
+            check=True,
+            capture_output=True,
+        )
+        environment = {"DEADLINE_KEYSHOT_CLIENT_BUNDLE": str(bundle)}
+        with caplog.at_level(logging.INFO):
+            with keyshot_session(environment=environment) as adaptor:
+                adaptor.on_run({"frames": "1", "output_file_path": str(tmp_path / "out.%d.png")})
+
+        assert f"Loading modules from the dependency bundle {bundle}" in caplog.text
+        assert (tmp_path / "out.1.png").exists()
+
+
+def test_launch_script_runs_the_client_with_its_variables(tmp_path: Path):
+    client_path = tmp_path / "keyshot_client.py"
+    client_path.write_text(
+        "import os\nprint(__name__, os.environ['KEYSHOT_ADAPTOR_SERVER_PATH'])\n"
+    )
+
+    script_path = _write_keyshot_launch_script(
+        str(client_path), {"KEYSHOT_ADAPTOR_SERVER_PATH": "/tmp/server"}
+    )
+    result = subprocess.run(
+        [sys.executable, script_path], capture_output=True, text=True, timeout=30
+    )
+
+    assert result.stdout == "__main__ /tmp/server\n"
+    # The variables are only set in the launched KeyShot, which removed the script
+    assert "KEYSHOT_ADAPTOR_SERVER_PATH" not in os.environ
+    assert not os.path.exists(script_path)
+
+
+def test_keyshot_client_reports_a_missing_server_path(fake_keyshot_exe: str, tmp_path: Path):
+    server_path = str(tmp_path / "missing")
+    with mock.patch.dict(os.environ, {"DEADLINE_KEYSHOT_EXE": fake_keyshot_exe}):
+        args = _get_keyshot_args(_get_keyshot_client_path())
+    result = subprocess.run(
+        args,
+        env={**os.environ, "KEYSHOT_ADAPTOR_SERVER_PATH": server_path},
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    assert result.returncode != 0
+    assert (
+        f"the server path {server_path} given by the environment variable "
+        "KEYSHOT_ADAPTOR_SERVER_PATH does not exist"
+    ) in result.stderr
+
+
+class TestRenderOptions:
+    def test_init_data_schema_rejects_unknown_options(self):
+        adaptor = KeyShotAdaptor({"render_options": {"samples": 64}})
+
+        with pytest.raises(jsonschema.ValidationError):
+            adaptor.validators.init_data.validate(adaptor.init_data)
+
+    @pytest.mark.parametrize(
+        "render_options",
+        [
+            {"render_mode": "MAX_SAMPLES", "max_samples": 0},
+            {"render_mode": "ADVANCED"},
+            {"render_mode": "MAX_TIME", "max_samples": 128, "max_time_seconds": 0},
+        ],
+    )
+    def test_init_data_schema_rejects_render_mode_without_its_value(self, render_options: dict):
+        adaptor = KeyShotAdaptor({"render_options": render_options})
+
+        with pytest.raises(jsonschema.ValidationError):
+            adaptor.validators.init_data.validate(adaptor.init_data)
+
+    def test_init_data_schema_accepts_unused_values_of_zero(self):
+        render_options = {"render_mode": "SCENE", "max_samples": 0, "max_time_seconds": 0}
+        adaptor = KeyShotAdaptor({"render_options": render_options})
+
+        adaptor.validators.init_data.validate(adaptor.init_data)
+
+    def test_session_renders_with_the_render_options(
+        self, keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+    ):
+        render_options = {
+            "threads": 2,
+            "render_mode": "ADVANCED",
+            "max_samples": 128,
+            "width": 640,
+            "height": 480,
+        }
+
+        with keyshot_session({"render_options": render_options}) as adaptor:
+            adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+        for frame in (1, 2):
+            image = (tmp_path / f"out.{frame}.png").read_text()
+            assert ":640x480:" in image
+            assert "'threads': 2" in image
+            assert "'render_mode': 'ADVANCED', 'max_samples': 128" in image
+
+
+class TestCancel:
+    def _run_canceled_task(
+        self, adaptor: KeyShotAdaptor, tmp_path: Path, cancel_after: float
+    ) -> KeyShotRenderCanceledError:
+        canceler = threading.Timer(cancel_after, adaptor.on_cancel)
+        canceler.start()
+        try:
+            with pytest.raises(KeyShotRenderCanceledError) as raised:
+                adaptor.on_run({"frames": "1-5", "output_file_path": str(tmp_path / "out.%d.png")})
+        finally:
+            canceler.join()
+        return raised.value
+
+    def test_render_canceled_without_stopping_keyshot(
+        self,
+        keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+        tmp_path: Path,
+        caplog: pytest.LogCaptureFixture,
+    ):
+        with keyshot_session(environment={"FAKE_KEYSHOT_RENDER_SECONDS": "0.5"}) as adaptor:
+            assert adaptor._keyshot_client is not None
+            pid = adaptor._keyshot_client.pid
+            with caplog.at_level(logging.INFO):
+                error = self._run_canceled_task(adaptor, tmp_path, cancel_after=0.2)
+            assert "kept running" in str(error)
+            assert "KeyShot aborted the render" in caplog.text
+
+            adaptor.on_run({"frame": 6, "output_file_path": str(tmp_path / "out.%d.png")})
+            assert adaptor._keyshot_client.pid == pid
+
+        assert (tmp_path / "out.1.png").exists()
+        assert not (tmp_path / "out.2.png").exists()
+        assert (tmp_path / "out.6.png").exists()
+
+    def test_keyshot_terminated_when_the_render_is_not_aborted_in_time(
+        self, keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+    ):
+        init_data = {"cancel_timeout_seconds": 0.2}
+        environment = {"FAKE_KEYSHOT_RENDER_SECONDS": "5"}
+        with keyshot_session(init_data, environment) as adaptor:
+            start = time.monotonic()
+            error = self._run_canceled_task(adaptor, tmp_path, cancel_after=0.2)
+            assert time.monotonic() - start < 4
+            assert "KeyShot was stopped" in str(error)
+            assert not adaptor._keyshot_is_running
+
+    def test_keyshot_terminated_when_rendering_a_sequence(
+        self, keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+    ):
+        init_data = {"frame_render_mode": "SEQUENCE"}
+        environment = {"FAKE_KEYSHOT_RENDER_SECONDS": "1"}
+        with keyshot_session(init_data, environment) as adaptor:
+            start = time.monotonic()
+            error = self._run_canceled_task(adaptor, tmp_path, cancel_after=0.2)
+            # Not left to render the rest of the sequence or to the cancel timeout
+            assert time.monotonic() - start < 4
+            assert "KeyShot was stopped" in str(error)
+
+
+@pytest.mark.filterwarnings("error::pytest.PytestUnhandledThreadExceptionWarning")
+def test_render_error_raised_by_the_task_not_the_output_reader(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    # KeyShot writes the progress and completion of the frame after the error
+    environment = {"FAKE_KEYSHOT_FAIL": "render"}
+    with keyshot_session({"strict_error_checking": True}, environment) as adaptor:
+        with pytest.raises(KeyShotRenderError):
+            adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+
+def test_keyshot_exit_releases_its_waiting_request(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]]
+):
+    with keyshot_session() as adaptor:
+        assert isinstance(adaptor._keyshot_client, LoggingSubprocess)
+        # The idle client is waiting for its next action when KeyShot is killed
+        adaptor._keyshot_client.terminate(grace_time_s=0)
+        assert adaptor._wait_for_state(
+            lambda: not adaptor._action_queue._request_waiting, timeout=5
+        )
+        action = Action("frames", {"frames": [1]})
+        adaptor._action_queue.enqueue_action(action)
+        time.sleep(0.1)
+        assert action in adaptor._action_queue
+        cleanup_start = time.monotonic()
+
+    assert time.monotonic() - cleanup_start < 5
+
+
+class TestRetry:
+    def _run_task(
+        self,
+        keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+        tmp_path: Path,
+        init_data: dict,
+        environment: dict,
+    ) -> dict:
+        """
+        Runs a task of three frames with the fake KeyShot and returns the session's timings
+        """
+        timings_file = tmp_path / "keyshot_timings.jsonl"
+        init_data = {"timings_file": str(timings_file), **init_data}
+        with keyshot_session(init_data, environment) as adaptor:
+            adaptor.on_run({"frames": "1-3", "output_file_path": str(tmp_path / "out.%d.png")})
+        return KeyShotTimings.read(str(timings_file))
+
+    @pytest.mark.parametrize(
+        "failure, init_data",
+        [("crash", {}), ("render", {"strict_error_checking": True})],
+    )
+    def test_frames_left_rendered_after_keyshot_fails(
+        self,
+        keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+        tmp_path: Path,
+        caplog: pytest.LogCaptureFixture,
+        failure: str,
+        init_data: dict,
+    ):
+        environment = {
+            "FAKE_KEYSHOT_FAIL": failure,
+            "FAKE_KEYSHOT_FAIL_AFTER": "1",
+            "FAKE_KEYSHOT_FAIL_ONCE": str(tmp_path / "failed"),
+        }
+        init_data = {**init_data, "render_retry": {"max_retries": 2, "backoff_seconds": 0}}
+
+        with caplog.at_level(logging.INFO):
+            timings = self._run_task(keyshot_session, tmp_path, init_data, environment)
+
+        assert "frame(s) left, starting with frame 2, in 0s (retry 1 of 2)" in caplog.text
+        assert timings["tasks"][0]["counts"] == {"retries": 1}
+        assert timings["tasks"][0]["keyshot_restart"] > 0
+        for frame in (1, 2, 3):
+            assert (tmp_path / f"out.{frame}.png").exists()
+
+    @pytest.mark.parametrize(
+        "failure, init_data, error",
+        [
+            ("crash", {}, KeyShotNotRunningError),
+            ("render", {"strict_error_checking": True}, KeyShotRenderError),
+        ],
+    )
+    def test_task_fails_when_retries_run_out(
+        self,
+        keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+        tmp_path: Path,
+        failure: str,
+        init_data: dict,
+        error: type,
+    ):
+        environment = {
+            "FAKE_KEYSHOT_FAIL": failure,
+            "FAKE_KEYSHOT_FAIL_AFTER": "1",
+        }
+
+        with pytest.raises(error):
+            self._run_task(keyshot_session, tmp_path, init_data, environment)
+
+        assert (tmp_path / "out.1.png").exists()
+        assert not (tmp_path / "out.2.png").exists()
@@ -0,0 +1,325 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+"""
+Benchmarks of the adaptor's own overhead:
+- sessions and tasks driven through KeyShotAdaptor end to end against the fake KeyShot, which
+  runs the real keyshot_client.py on the lux emulator
+- the latency of delivering an action to the client
+- the throughput of the KeyShot output dispatch
+- the cold import time of the adaptor
+
+pytest-benchmark is disabled when tests run in parallel. To see the timings, run:
+
+    pytest -n0 -s test/keyshot_adaptor/test_adaptor_benchmark.py
+
+The checks that compare timings only hold on an otherwise idle host, so they are skipped unless
+KEYSHOT_ADAPTOR_TIMING_CHECKS=1 is set. Run them with -n0 as well.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import queue
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, ContextManager, Iterator
+from unittest import mock
+
+import pytest
+
+from openjd.adaptor_runtime.app_handlers import RegexHandler
+from openjd.adaptor_runtime.application_ipc import AdaptorServer
+from openjd.adaptor_runtime_client import Action, ClientInterface
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import (
+    KeyShotActionsQueue,
+    KeyShotAdaptor,
+    KeyShotOutputHandler,
+)
+
+_TASK_COUNT = 20
+_RENDER_SECONDS = 0.01
+_LOG_FRAMES = 20
+_ACTION_COUNT = 50
+
+# Modules that every adaptor process, down to the short lived "daemon run" and "daemon stop"
+# frontends, would pay for if the adaptor imported them at module level: the deadline client that
+# telemetry uses, and the adaptor's modules that only a running session or an opt-in feature uses
+_DAEMON_ONLY_MODULES = [
+    "deadline.client.api",
+    "boto3",
+    "botocore",
+    *(
+        f"deadline.keyshot_adaptor.KeyShotAdaptor.{name}"
+        for name in [
+            "budget",
+            "instances",
+            "output_log",
+            "pool",
+            "process_memory",
+            "process_scheduling",
+            "telemetry",
+            "timings",
+            "watchdog",
+        ]
+    ),
+]
+
+
+def _keyshot_render_log() -> list[str]:
+    """
+    Returns the output of a verbose KeyShot animation render run with -progress: scene loading
+    chatter and a progress line per percent for every frame.
+    """
+    lines = [
+        "KeyShotClient: KeyShot Version 12.1.1",
+        "KeyShotClient: Connected to the adaptor server",
+    ]
+    for frame in range(1, _LOG_FRAMES + 1):
+        lines.append(f"KeyShotClient: Performing action: frames {{'frames': [{frame}]}}")
+        lines.extend(
+            f"[{frame:04d}:{index:04d}] Loading texture /assets/materials/wood_{index}.png "
+            "into render memory (2048x2048, 4 channels)"
+            for index in range(200)
+        )
+        lines.append("Starting Render of 1 frame(s)...")
+        lines.extend(f"Rendering: {percent}%" for percent in range(101))
+        lines.append(f"Finished Rendering /renders/catalog.{frame}.png")
+    return lines
+
+
+_TIMING_CHECKS = os.environ.get("KEYSHOT_ADAPTOR_TIMING_CHECKS") == "1"
+_timing_check = pytest.mark.skipif(
+    not _TIMING_CHECKS,
+    reason="Compares timings, which needs KEYSHOT_ADAPTOR_TIMING_CHECKS=1 and an idle host",
+)
+
+
+_FAKE_KEYSHOT_ENV = {
+    "FAKE_KEYSHOT_RENDER_SECONDS": str(_RENDER_SECONDS),
+    "FAKE_KEYSHOT_PROGRESS_STEPS": "10",
+}
+
+
+@pytest.fixture
+def started_session(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+) -> Iterator[KeyShotAdaptor]:
+    """
+    Yields an adaptor whose session was started against the fake KeyShot, and cleans it up after
+    """
+    init_data = {"output_file_path": str(tmp_path / "out.%d.png")}
+    with keyshot_session(init_data, _FAKE_KEYSHOT_ENV) as adaptor:
+        yield adaptor
+    assert not adaptor._keyshot_is_running
+
+
+@pytest.mark.parametrize("frames_per_task", [1, 4])
+def test_adaptor_overhead_per_task(
+    benchmark, started_session: KeyShotAdaptor, frames_per_task: int
+):
+    turnaround: list[float] = []
+    frames = itertools.count(step=frames_per_task)
+
+    def run_task() -> None:
+        first_frame = next(frames)
+        start = time.monotonic()
+        started_session.on_run({"frames": f"{first_frame}-{first_frame + frames_per_task - 1}"})
+        turnaround.append(time.monotonic() - start)
+
+    benchmark.pedantic(run_task, rounds=_TASK_COUNT, iterations=1)
+
+    # Everything but the emulated render time is overhead of the adaptor and client
+    overhead = [seconds - frames_per_task * _RENDER_SECONDS for seconds in turnaround]
+    mean = statistics.mean(overhead)
+    benchmark.extra_info["mean_overhead_ms"] = mean * 1000
+    print(
+        f"\nKeyShotAdaptor overhead per task of {frames_per_task} frame(s) over "
+        f"{len(overhead)} tasks: mean {mean * 1000:.1f} ms, max {max(overhead) * 1000:.1f} ms"
+    )
+    if _TIMING_CHECKS:
+        # The sleep-polling loops the adaptor used to have added up to 100 ms per task on their own
+        assert mean < 0.1
+
+
+def test_session_overhead(
+    benchmark, keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]]
+):
+    def run_session() -> None:
+        with keyshot_session(environment=_FAKE_KEYSHOT_ENV) as adaptor:
+            adaptor.on_run({"frame": 1})
+
+    benchmark.pedantic(run_session, rounds=3, iterations=1)
+
+
+class _PingClient(ClientInterface):
+    """
+    Client that records when its handler for the "ping" action is invoked
+    """
+
+    def __init__(self, server_path: str) -> None:
+        super().__init__(server_path)
+        self.actions["ping"] = self.ping
+        self.pinged: queue.Queue[float] = queue.Queue()
+
+    def ping(self, args: dict | None) -> None:
+        self.pinged.put(time.monotonic())
+
+    def close(self, args: dict | None) -> None:
+        pass
+
+    def graceful_shutdown(self, signum: int, frame) -> None:
+        pass
+
+
+class _CountingActionsQueue(KeyShotActionsQueue):
+    """
+    KeyShotActionsQueue that counts the requests for an action it answered without one, after
+    which the adaptor server sleeps before it asks the queue again
+    """
+
+    def __init__(self, condition: threading.Condition, wait_seconds: float) -> None:
+        super().__init__(condition, wait_seconds=wait_seconds)
+        self.empty_answers = 0
+
+    def dequeue_action(self) -> Action | None:
+        action = super().dequeue_action()
+        if action is None:
+            self.empty_answers += 1
+        return action
+
+
+def _action_latencies(wait_seconds: float) -> tuple[list[float], int]:
+    """
+    Returns the times from enqueueing an action to the client invoking its handler, with the
+    client waiting for its next action each time as it does between tasks, and how often the
+    adaptor server was answered without an action
+    """
+    actions = _CountingActionsQueue(threading.Condition(), wait_seconds=wait_seconds)
+    server = AdaptorServer(actions, None)  # type: ignore[arg-type]
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+    # Created on its own thread so that it does not install signal handlers
+    clients: queue.Queue[_PingClient] = queue.Queue()
+
+    def run_client() -> None:
+        client = _PingClient(server.server_path)
+        clients.put(client)
+        client.poll()
+
+    client_thread = threading.Thread(target=run_client, daemon=True)
+    client_thread.start()
+    client = clients.get(timeout=5)
+    latencies = []
+    try:
+        for _ in range(_ACTION_COUNT):
+            time.sleep(random.uniform(0, 0.01))
+            enqueued = time.monotonic()
+            actions.enqueue_action(Action("ping"))
+            latencies.append(client.pinged.get(timeout=5) - enqueued)
+    finally:
+        actions.enqueue_action(Action("close"))
+        client_thread.join(timeout=5)
+        server.shutdown()
+        server_thread.join(timeout=5)
+    return latencies, actions.empty_answers
+
+
+def test_action_delivery_latency():
+    polled, _ = _action_latencies(wait_seconds=0)
+    pushed, empty_answers = _action_latencies(wait_seconds=60)
+
+    def describe(latencies: list[float]) -> str:
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        return f"mean {statistics.mean(latencies) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms"
+
+    print(
+        f"\nEnqueue to handler invocation over {_ACTION_COUNT} actions: "
+        f"polled {describe(polled)}, pushed {describe(pushed)}"
+    )
+    # Every action was handed to the request the client was waiting on, without the adaptor
+    # server sleeping until it asked the queue again
+    assert empty_answers == 0
+
+
+def _output_dispatch_rates() -> tuple[KeyShotAdaptor, float, float]:
+    """
+    Dispatches the output of a KeyShot render with RegexHandler and then with
+    KeyShotOutputHandler, and returns the adaptor and the lines per second of each
+    """
+    records = [logging.makeLogRecord({"msg": line}) for line in _keyshot_render_log()]
+    adaptor = KeyShotAdaptor({"scene_file": "scene.bip", "strict_error_checking": True})
+    adaptor._expected_outputs = _LOG_FRAMES
+
+    def lines_per_second(handler: RegexHandler) -> float:
+        adaptor._produced_outputs = 0
+        adaptor._progressed_outputs = 0
+        adaptor._last_frame_progress = 0
+        # Keep the cost of reporting progress out of the measurement
+        with mock.patch.object(KeyShotAdaptor, "update_status", lambda *args, **kwargs: None):
+            start = time.perf_counter()
+            for record in records:
+                handler.handle(record)
+            return len(records) / (time.perf_counter() - start)
+
+    callbacks = adaptor._get_regex_callbacks()
+    before = lines_per_second(RegexHandler(callbacks))
+    after = lines_per_second(KeyShotOutputHandler(callbacks))
+    print(
+        f"\nKeyShot output dispatch over {len(records)} lines: "
+        f"RegexHandler {before:,.0f} lines/s, KeyShotOutputHandler {after:,.0f} lines/s"
+    )
+    return adaptor, before, after
+
+
+def test_output_dispatch_throughput():
+    adaptor, _, _ = _output_dispatch_rates()
+
+    assert adaptor._produced_outputs == _LOG_FRAMES
+    assert not adaptor._has_exception
+
+
+@_timing_check
+def test_output_dispatch_is_faster_than_regex_handler():
+    _, before, after = _output_dispatch_rates()
+
+    assert after > 3 * before
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """
+    Imports a module in a new Python process and returns the cumulative import time of every module
+    it loaded, in microseconds, as reported by -X importtime
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_adaptor_import_time(benchmark):
+    module = "deadline.keyshot_adaptor.KeyShotAdaptor"
+    times = benchmark.pedantic(_import_times, args=(module,), rounds=3, iterations=1)
+
+    benchmark.extra_info["import_ms"] = times[module] / 1000
+    print(f"\n{module} import time: {times[module] / 1000:.1f} ms")
+
+
+def test_adaptor_import_loads_no_daemon_only_modules():
+    times = _import_times("deadline.keyshot_adaptor.KeyShotAdaptor")
+
+    assert [name for name in _DAEMON_ONLY_MODULES if name in times] == []
@@ -0,0 +1,103 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, ContextManager
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.budget import KeyShotRenderBudget, parse_finish_by
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.mark.parametrize(
+    "finish_by, expected",
+    [
+        ("2024-05-01T18:00:00+00:00", 1714586400.0),
+        ("2024-05-01T18:00:00Z", 1714586400.0),
+        ("2024-05-01T20:00:00+02:00", 1714586400.0),
+    ],
+)
+def test_parse_finish_by(finish_by: str, expected: float):
+    assert parse_finish_by(finish_by) == expected
+
+
+def test_parse_finish_by_invalid():
+    with pytest.raises(ValueError):
+        parse_finish_by("tomorrow")
+
+
+class TestKeyShotRenderBudget:
+    def test_time_left_shared_among_frames_left(self, clock: FakeClock):
+        budget = KeyShotRenderBudget(clock.now + 1000, 10, clock=clock)
+
+        assert budget.frame_time_limit(2) == 100
+
+    def test_time_beyond_the_limit_is_taken_off(self, clock: FakeClock):
+        budget = KeyShotRenderBudget(clock.now + 1000, 10, clock=clock)
+        limit = budget.frame_time_limit(2)
+        # Each frame took 20s longer than its limit
+        clock.now += 2 * (limit + 20)
+        budget.frames_rendered(2, 2 * (limit + 20), limit)
+
+        # 760s left for 8 frames, less the 20s each frame takes beyond its limit
+        assert budget.frame_time_limit(2) == 75
+
+    def test_frames_left_are_at_least_those_of_the_task(self, clock: FakeClock):
+        budget = KeyShotRenderBudget(clock.now + 1000, 2, clock=clock)
+        budget.frames_rendered(2, 0, 0)
+
+        assert budget.frames_left(4) == 4
+        assert budget.frame_time_limit(4) == 250
+
+    def test_minimum_once_the_deadline_passed(self, clock: FakeClock):
+        budget = KeyShotRenderBudget(clock.now - 10, 5, min_frame_seconds=3, clock=clock)
+
+        assert budget.frame_time_limit(1) == 3
+
+
+def test_session_frames_limited_to_the_budget(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    finish_by = datetime.now(timezone.utc) + timedelta(hours=1)
+    init_data = {
+        "render_options": {"width": 640},
+        "render_budget": {"finish_by": finish_by.isoformat(), "frames": "1-8", "workers": 2},
+    }
+    with caplog.at_level(logging.INFO):
+        with keyshot_session(init_data) as adaptor:
+            for frames in ("1-2", "3-4"):
+                adaptor.on_run({"frames": frames, "output_file_path": str(tmp_path / "out.%d.png")})
+
+    assert "Rendering 4 of the 8 frame(s) of the job by" in caplog.text
+    assert "to render 4 frame(s) in the" in caplog.text
+    assert "to render 2 frame(s) in the" in caplog.text
+    image = (tmp_path / "out.1.png").read_text()
+    assert ":640x-1:" in image
+    assert "'render_mode': 'MAX_TIME'" in image
+
+
+def test_no_budget_without_a_finish_by_time(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]]
+):
+    with keyshot_session({"render_budget": {"finish_by": "", "frames": "1-8"}}) as adaptor:
+        pass
+
+    assert adaptor._render_budget is None
@@ -0,0 +1,139 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, ContextManager
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import (
+    KeyShotAdaptor,
+    KeyShotRenderCanceledError,
+)
+from deadline.keyshot_adaptor.KeyShotAdaptor.instances import (
+    KeyShotFrameScheduler,
+    get_instance_init_data,
+)
+from deadline.keyshot_adaptor.KeyShotAdaptor.timings import KeyShotTimings
+
+
+class TestKeyShotFrameScheduler:
+    def test_instances_render_their_own_blocks_in_order(self):
+        scheduler = KeyShotFrameScheduler([1, 2, 3, 4, 5], 2)
+
+        assert [scheduler.next_frame(0), scheduler.next_frame(0)] == [1, 2]
+        assert [scheduler.next_frame(1), scheduler.next_frame(1)] == [3, 4]
+        assert scheduler.stolen_frames == 0
+
+    def test_idle_instance_steals_from_the_longest_block(self):
+        scheduler = KeyShotFrameScheduler(list(range(1, 10)), 3)
+        for _ in range(3):
+            scheduler.next_frame(0)
+        scheduler.next_frame(2)
+
+        # Frames 4-6 are left for the second instance and 8-9 for the third
+        assert scheduler.next_frame(0) == 6
+        assert scheduler.next_frame(0) == 5
+        assert scheduler.next_frame(0) == 9
+        assert scheduler.stolen_frames == 3
+
+    def test_no_frames_after_stop(self):
+        scheduler = KeyShotFrameScheduler([1, 2], 2)
+        scheduler.stop()
+
+        assert scheduler.next_frame(0) is None
+
+    def test_more_instances_than_frames(self):
+        scheduler = KeyShotFrameScheduler([1], 3)
+
+        assert scheduler.next_frame(2) == 1
+        assert scheduler.next_frame(0) is None
+
+
+class TestGetInstanceInitData:
+    def test_session_settings_are_not_passed_on(self):
+        init_data = {
+            "scene_file": "scene.bip",
+            "keyshot_instances": 2,
+            "timings_file": "timings.jsonl",
+            "output_log_file": "/logs/keyshot_output.log",
+            "render_threads": 3,
+        }
+
+        assert get_instance_init_data(init_data, {}, 1, 2) == {
+            "scene_file": "scene.bip",
+            "output_log_file": "/logs/keyshot_output_2.log",
+            "render_threads": 3,
+        }
+
+    def test_cpus_are_shared_out(self):
+        scheduling = {"cpus": "0-3,8-9", "nice": 5}
+
+        instance_init_data = [
+            get_instance_init_data({}, scheduling, index, 2) for index in range(2)
+        ]
+
+        assert [data["keyshot_scheduling"] for data in instance_init_data] == [
+            {"cpus": "0,1,2", "nice": 5},
+            {"cpus": "3,8,9", "nice": 5},
+        ]
+        assert [data["render_threads"] for data in instance_init_data] == [3, 3]
+
+    def test_render_budget_shared_out(self):
+        init_data = {"render_budget": {"finish_by": "2024-05-01T18:00:00Z", "frames": "1-8"}}
+
+        assert get_instance_init_data(init_data, {}, 0, 4)["render_budget"]["workers"] == 4
+
+    def test_render_threads_without_cpus(self):
+        with mock.patch.object(os, "cpu_count", return_value=16):
+            assert get_instance_init_data({}, {}, 0, 4)["render_threads"] == 4
+
+
+def test_frames_rendered_on_instances(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    environment = {"FAKE_KEYSHOT_RENDER_SECONDS": "0.05"}
+    timings_file = tmp_path / "keyshot_timings.jsonl"
+    init_data = {"keyshot_instances": 2, "timings_file": str(timings_file)}
+    with caplog.at_level(logging.INFO):
+        with keyshot_session(init_data, environment) as adaptor:
+            pids = {instance._keyshot_client.pid for instance in adaptor._instances}  # type: ignore[union-attr]
+            adaptor.on_run({"frames": "1-6", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    assert len(pids) == 2
+    assert all((tmp_path / f"out.{frame}.png").exists() for frame in range(1, 7))
+    assert "Rendered 6 frame(s) on 2 KeyShot instances" in caplog.text
+    assert "[KeyShot 1] " in caplog.text and "[KeyShot 2] " in caplog.text
+
+    # The timings of the frames each instance rendered add up to those of the task
+    (task,) = KeyShotTimings.read(str(timings_file))["tasks"]
+    assert task["render"] > 0
+    assert "frames" in task["actions"]
+
+
+def test_cancel_keeps_the_instances_running(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    environment = {"FAKE_KEYSHOT_RENDER_SECONDS": "1"}
+    with keyshot_session({"keyshot_instances": 2}, environment) as adaptor:
+        pids = [instance._keyshot_client.pid for instance in adaptor._instances]  # type: ignore[union-attr]
+        # The second instance has no frame to render when the task is canceled
+        canceler = threading.Timer(0.3, adaptor.on_cancel)
+        canceler.start()
+        try:
+            with pytest.raises(KeyShotRenderCanceledError, match="kept running"):
+                adaptor.on_run({"frame": 1, "output_file_path": str(tmp_path / "out.%d.png")})
+        finally:
+            canceler.join()
+
+        # No instance was stopped, and the next task renders on the same instances
+        adaptor.on_run({"frames": "2-3", "output_file_path": str(tmp_path / "out.%d.png")})
+        assert [instance._keyshot_client.pid for instance in adaptor._instances] == pids  # type: ignore[union-attr]
+
+    assert (tmp_path / "out.2.png").exists() and (tmp_path / "out.3.png").exists()
@@ -0,0 +1,318 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+# keyshot_handler can only be imported inside KeyShot, where the lux module exists
+sys.modules.setdefault("lux", types.ModuleType("lux"))
+
+from deadline.keyshot_adaptor.KeyShotClient import keyshot_handler  # noqa: E402
+from deadline.keyshot_adaptor.KeyShotClient.keyshot_handler import KeyShotHandler  # noqa: E402
+
+
+@pytest.fixture
+def lux():
+    with mock.patch.object(keyshot_handler, "lux") as lux:
+        yield lux
+
+
+@pytest.fixture
+def handler(lux) -> KeyShotHandler:
+    handler = KeyShotHandler()
+    handler.set_output_file_path({"output_file_path": "/renders/out.%d.png"})
+    return handler
+
+
+def test_start_render_single_frame(handler: KeyShotHandler, lux):
+    handler.set_frame({"frame": 3})
+
+    handler.start_render({})
+
+    lux.setAnimationFrame.assert_called_once_with(3)
+    lux.renderImage.assert_called_once_with(
+        path="/renders/out.3.png", opts=mock.ANY, format=handler.output_format_code
+    )
+
+
+def test_start_render_chunk(handler: KeyShotHandler, lux, capsys):
+    handler.set_frames({"frames": [1, 2, 5]})
+
+    handler.start_render({})
+
+    assert [call.args[0] for call in lux.setAnimationFrame.call_args_list] == [1, 2, 5]
+    assert [call.kwargs["path"] for call in lux.renderImage.call_args_list] == [
+        "/renders/out.1.png",
+        "/renders/out.2.png",
+        "/renders/out.5.png",
+    ]
+    assert capsys.readouterr().out.count("Finished Rendering") == 3
+
+
+def test_start_render_sequence(handler: KeyShotHandler, lux, capsys):
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.set_frames({"frames": [4, 5, 6]})
+
+    handler.start_render({})
+
+    lux.getRenderOptions.return_value.setAddToQueue.assert_called_once_with(True)
+    assert lux.renderImage.call_count == 3
+    lux.processQueue.assert_called_once_with()
+    assert capsys.readouterr().out.count("Finished Rendering") == 3
+
+
+def test_start_render_sequence_clears_the_scene_queue(handler: KeyShotHandler, lux):
+    calls = mock.Mock()
+    calls.attach_mock(lux.clearQueue, "clearQueue")
+    calls.attach_mock(lux.renderImage, "renderImage")
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.set_frames({"frames": [4, 5]})
+
+    handler.start_render({})
+
+    assert [name for name, _args, _kwargs in calls.mock_calls] == [
+        "clearQueue",
+        "renderImage",
+        "renderImage",
+    ]
+
+
+def test_start_render_aborted_before_the_next_frame(handler: KeyShotHandler, lux, capsys, tmp_path):
+    abort_file = tmp_path / "abort"
+    lux.renderImage.side_effect = lambda **kwargs: abort_file.touch()
+    handler.set_frames({"frames": [1, 2, 3]})
+
+    handler.start_render({"abort_file": str(abort_file)})
+
+    lux.renderImage.assert_called_once()
+    assert "KeyShotClient: Render aborted after 1 of 3 frame(s)" in capsys.readouterr().out
+
+
+def test_start_render_sequence_aborted_before_it_starts(
+    handler: KeyShotHandler, lux, capsys, tmp_path
+):
+    abort_file = tmp_path / "abort"
+    abort_file.touch()
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.set_frames({"frames": [1, 2]})
+
+    handler.start_render({"abort_file": str(abort_file)})
+
+    lux.processQueue.assert_not_called()
+    assert "KeyShotClient: Render aborted after 0 of 2 frame(s)" in capsys.readouterr().out
+
+
+def test_start_render_sequence_single_frame_renders_directly(handler: KeyShotHandler, lux):
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.set_frames({"frames": [4]})
+
+    handler.start_render({})
+
+    lux.processQueue.assert_not_called()
+    lux.getRenderOptions.return_value.setAddToQueue.assert_called_once_with(False)
+
+
+def test_set_frame_render_mode_invalid(handler: KeyShotHandler):
+    with pytest.raises(RuntimeError):
+        handler.set_frame_render_mode({"frame_render_mode": "ANIMATION"})
+
+
+def test_set_scene_file_skips_reopening_loaded_scene(handler: KeyShotHandler, lux, tmp_path):
+    scene_file = tmp_path / "scene.bip"
+    scene_file.write_bytes(b"scene")
+
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    handler.set_scene_file({"scene_file": str(scene_file)})
+
+    lux.openFile.assert_called_once_with(str(scene_file))
+
+
+def test_set_scene_file_reopens_changed_or_other_scene(handler: KeyShotHandler, lux, tmp_path):
+    scene_file = tmp_path / "scene.bip"
+    scene_file.write_bytes(b"scene")
+    other_scene_file = tmp_path / "other.bip"
+    other_scene_file.write_bytes(b"other")
+
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    handler.set_scene_file({"scene_file": str(other_scene_file)})
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    scene_file.write_bytes(b"changed scene")
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    handler.reset({})
+    handler.set_scene_file({"scene_file": str(scene_file)})
+
+    assert lux.openFile.call_count == 5
+
+
+def test_render_options_fetched_once_and_only_changes_applied(handler: KeyShotHandler, lux):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {"add_to_queue": False}
+
+    for frame in (1, 2, 3):
+        handler.set_frame({"frame": frame})
+        handler.start_render({})
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.set_frames({"frames": [4, 5]})
+    handler.start_render({})
+
+    lux.getRenderOptions.assert_called_once_with()
+    assert [call.args[0] for call in opts.setAddToQueue.call_args_list] == [False, True]
+
+
+def test_render_threads_set_once_on_render_options(handler: KeyShotHandler, lux):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {}
+
+    handler.set_render_threads({"render_threads": 8})
+    for frame in (1, 2):
+        handler.set_frame({"frame": frame})
+        handler.start_render({})
+
+    opts.setThreads.assert_called_once_with(8)
+
+
+def test_render_options_applied_once_over_the_scene(handler: KeyShotHandler, lux):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {}
+
+    handler.set_render_threads({"render_threads": 8})
+    handler.set_render_options(
+        {"render_options": {"threads": 4, "max_samples": 128, "width": 640, "height": 0}}
+    )
+    for frame in (1, 2):
+        handler.set_frame({"frame": frame})
+        handler.start_render({})
+
+    opts.setThreads.assert_called_once_with(4)
+    opts.setMaxSamplesRendering.assert_called_once_with(128)
+    opts.setMaxTimeRendering.assert_not_called()
+    assert [call.kwargs.get("width") for call in lux.renderImage.call_args_list] == [640, 640]
+    assert "height" not in lux.renderImage.call_args.kwargs
+
+
+@pytest.mark.parametrize(
+    "render_options, method, value",
+    [
+        (
+            {"render_mode": "MAX_TIME", "max_samples": 64, "max_time_seconds": 30},
+            "setMaxTimeRendering",
+            30,
+        ),
+        ({"max_time_seconds": 30}, "setMaxTimeRendering", 30),
+        ({"render_mode": "ADVANCED", "max_samples": 64}, "setAdvancedRendering", 64),
+    ],
+)
+def test_render_mode(handler: KeyShotHandler, lux, render_options: dict, method: str, value: int):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {}
+
+    handler.set_render_options({"render_options": render_options})
+    handler.set_frame({"frame": 1})
+    handler.start_render({})
+
+    getattr(opts, method).assert_called_once_with(value)
+
+
+def test_scene_render_mode_is_kept(handler: KeyShotHandler, lux):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {}
+
+    handler.set_render_options({"render_options": {"render_mode": "SCENE", "max_samples": 64}})
+    handler.set_frame({"frame": 1})
+    handler.start_render({})
+
+    opts.setMaxSamplesRendering.assert_not_called()
+    opts.setAdvancedRendering.assert_not_called()
+
+
+def test_render_mode_without_its_value(handler: KeyShotHandler):
+    with pytest.raises(RuntimeError, match="ADVANCED requires max_samples"):
+        handler.set_render_options(
+            {"render_options": {"render_mode": "ADVANCED", "max_samples": 0}}
+        )
+
+
+def test_render_options_logged_in_full_once_then_as_changes(handler: KeyShotHandler, lux, capsys):
+    opts = lux.getRenderOptions.return_value
+    opts.getDict.return_value = {"add_to_queue": False, "max_samples": 64}
+
+    handler.set_frames({"frames": [1, 2]})
+    handler.start_render({})
+    opts.getDict.return_value = {"add_to_queue": True, "max_samples": 64}
+    handler.set_frame_render_mode({"frame_render_mode": "SEQUENCE"})
+    handler.start_render({})
+
+    out = capsys.readouterr().out
+    assert out.count("KeyShot Render Options:") == 1
+    assert "max_samples" in out.split("KeyShot Render Options:")[1].splitlines()[0]
+    assert "KeyShot Render Options changed: {'add_to_queue': True}" in out
+
+
+def test_render_options_fetched_again_for_a_new_scene(handler: KeyShotHandler, lux, tmp_path):
+    scene_file = tmp_path / "scene.bip"
+    scene_file.write_bytes(b"scene")
+    other_scene_file = tmp_path / "other.bip"
+    other_scene_file.write_bytes(b"other")
+    handler.set_frame({"frame": 1})
+
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    handler.start_render({})
+    handler.set_scene_file({"scene_file": str(scene_file)})
+    handler.start_render({})
+    handler.set_scene_file({"scene_file": str(other_scene_file)})
+    handler.start_render({})
+
+    assert lux.getRenderOptions.call_count == 2
+
+
+def test_batch_performs_actions_in_order(handler: KeyShotHandler, lux, capsys):
+    handler.batch(
+        {
+            "actions": [
+                {"name": "output_file_path", "args": {"output_file_path": "/renders/b.%d.png"}},
+                {"name": "frames", "args": {"frames": [1, 2]}},
+                {"name": "start_render", "args": {"frames": [1, 2]}},
+            ]
+        }
+    )
+
+    assert [call.kwargs["path"] for call in lux.renderImage.call_args_list] == [
+        "/renders/b.1.png",
+        "/renders/b.2.png",
+    ]
+    results = [line for line in capsys.readouterr().out.splitlines() if "Batch action" in line]
+    assert [line.split(" in ")[0] for line in results] == [
+        "KeyShotClient: Batch action 1/3 output_file_path succeeded",
+        "KeyShotClient: Batch action 2/3 frames succeeded",
+        "KeyShotClient: Batch action 3/3 start_render succeeded",
+    ]
+
+
+def test_batch_skips_the_actions_after_a_failure(handler: KeyShotHandler, lux, capsys):
+    with pytest.raises(FileNotFoundError):
+        handler.batch(
+            {
+                "actions": [
+                    {"name": "scene_file", "args": {"scene_file": "/missing.bip"}},
+                    {"name": "frames", "args": {"frames": [1]}},
+                    {"name": "start_render", "args": {"frames": [1]}},
+                ]
+            }
+        )
+
+    lux.renderImage.assert_not_called()
+    out = capsys.readouterr().out
+    assert "Batch action 1/3 scene_file failed in " in out
+    assert "does not exist" in out
+    assert "Batch action 2/3 frames skipped" in out
+    assert "Batch action 3/3 start_render skipped" in out
+
+
+def test_batch_fails_on_an_unknown_action(handler: KeyShotHandler, capsys):
+    with pytest.raises(RuntimeError):
+        handler.batch({"actions": [{"name": "render_everything", "args": {}}]})
+
+    assert "Batch action 1/1 render_everything failed" in capsys.readouterr().out
@@ -0,0 +1,170 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Callable, ContextManager
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.output_log import KeyShotOutputLog
+
+
+class _Records(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.messages: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def records():
+    return _Records()
+
+
+def _log_lines(output_log: KeyShotOutputLog, records: _Records, lines: list[str]) -> None:
+    output_log.logger.addHandler(records)
+    output_log.logger.propagate = False
+    for line in lines:
+        output_log.logger.log(logging.ERROR + 1, line)
+    output_log.flush()
+
+
+class TestKeyShotOutputLog:
+    def test_collapses_progress(self, records: _Records):
+        progress = [f"Rendering: {percent}%" for percent in range(5, 101, 5)]
+
+        _log_lines(
+            KeyShotOutputLog(), records, [*progress, "Finished Rendering /renders/out.1.png"]
+        )
+
+        assert records.messages == [
+            "Rendering: 5%",
+            "Rendering: 100% [18 similar line(s) collapsed]",
+            "Finished Rendering /renders/out.1.png",
+        ]
+
+    def test_logs_a_collapsed_line_at_least_every_interval(self, records: _Records):
+        _log_lines(
+            KeyShotOutputLog(compact_interval=0),
+            records,
+            ["Rendering: 10%", "Rendering: 20%", "Rendering: 30%"],
+        )
+
+        assert records.messages == ["Rendering: 10%", "Rendering: 20%", "Rendering: 30%"]
+
+    def test_verbosity_per_category(self, records: _Records):
+        _log_lines(
+            KeyShotOutputLog({"progress": "all", "client": "none", "output": "compact"}),
+            records,
+            [
+                "KeyShotClient: Batch action 1/2 frames succeeded in 0.001s",
+                "Rendering: 50%",
+                "Rendering: 60%",
+                "KeyShotClient: Batch action 2/2 start_render succeeded in 1.000s",
+                "Loading texture 1 of 3",
+                "Loading texture 2 of 3",
+                "Loading texture 3 of 3",
+            ],
+        )
+
+        assert records.messages == [
+            "Rendering: 50%",
+            "Rendering: 60%",
+            "Loading texture 1 of 3",
+            "Loading texture 3 of 3 [1 similar line(s) collapsed]",
+        ]
+
+    def test_writes_the_most_recent_lines_including_unlogged_ones(
+        self, records: _Records, tmp_path: Path
+    ):
+        output_log = KeyShotOutputLog({"output": "none"}, max_lines=3)
+        _log_lines(output_log, records, [f"line {index}" for index in range(5)])
+
+        path = tmp_path / "keyshot_output.log"
+        assert output_log.write(str(path)) == 3
+
+        assert records.messages == []
+        lines = path.read_text().splitlines()
+        assert [line.split("] ", 1)[1] for line in lines] == ["line 2", "line 3", "line 4"]
+
+    def test_prefix(self, records: _Records):
+        _log_lines(
+            KeyShotOutputLog(prefix="[KeyShot 2] "),
+            records,
+            ["Rendering: 10%", "Rendering: 20%", "Rendering: 30%"],
+        )
+
+        assert records.messages == [
+            "[KeyShot 2] Rendering: 10%",
+            "[KeyShot 2] Rendering: 30% [1 similar line(s) collapsed]",
+        ]
+
+
+def _keyshot_output(caplog: pytest.LogCaptureFixture) -> list[str]:
+    """
+    Returns the KeyShot output that was logged, leaving out the copy of each line passed to the
+    output handler
+    """
+    return [
+        record.getMessage()
+        for record in caplog.records
+        if record.name.startswith("deadline.keyshot_adaptor.KeyShotAdaptor.output_log.")
+    ]
+
+
+def test_session_progress_is_compacted(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    environment = {"FAKE_KEYSHOT_PROGRESS_STEPS": "50"}
+    output_log_file = tmp_path / "keyshot_output.log"
+
+    with caplog.at_level(logging.INFO):
+        with keyshot_session({"output_log_file": str(output_log_file)}, environment) as adaptor:
+            adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    progress = [message for message in _keyshot_output(caplog) if "Rendering: " in message]
+    assert (
+        progress
+        == [
+            "Rendering: 2%",
+            "Rendering: 100% [48 similar line(s) collapsed]",
+        ]
+        * 2
+    )
+    assert sum("Finished Rendering" in message for message in _keyshot_output(caplog)) == 2
+    assert not output_log_file.exists()
+
+
+def test_session_output_is_written_on_failure(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    environment = {
+        "FAKE_KEYSHOT_FAIL": "render",
+        "FAKE_KEYSHOT_PROGRESS_STEPS": "10",
+    }
+    output_log_file = tmp_path / "keyshot_output.log"
+    init_data = {
+        "strict_error_checking": True,
+        "output_log_file": str(output_log_file),
+        "log_verbosity": {"progress": "none"},
+    }
+
+    with caplog.at_level(logging.INFO):
+        with pytest.raises(RuntimeError, match="KeyShot Encountered an Error"):
+            with keyshot_session(init_data, environment) as adaptor:
+                # A single frame, since KeyShot goes on to the next frame while the task fails
+                adaptor.on_run({"frames": "1", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    assert not any("Rendering: " in message for message in _keyshot_output(caplog))
+    output = output_log_file.read_text()
+    assert output.count("Rendering: ") == 10
+    assert "Error: Could not render" in output
+    assert f"KeyShot output to {output_log_file}" in caplog.text
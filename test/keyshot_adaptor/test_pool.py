@@ -0,0 +1,122 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+from typing import Callable, ContextManager, Iterator
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor import pool
+from deadline.keyshot_adaptor.KeyShotAdaptor.pool import (
+    KeyShotPool,
+    KeyShotPoolLease,
+    KeyShotPoolUnavailableError,
+)
+
+
+@pytest.fixture
+def pool_connection_file(fake_keyshot_exe: str, tmp_path: Path) -> Iterator[str]:
+    connection_file = str(tmp_path / "keyshot_pool.json")
+    with mock.patch.dict(os.environ, {"DEADLINE_KEYSHOT_EXE": fake_keyshot_exe}):
+        pool = KeyShotPool(size=1, max_leases=2)
+        pool.start(connection_file)
+        try:
+            yield connection_file
+        finally:
+            pool.shutdown()
+
+
+def _run_session(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], connection_file: str
+) -> KeyShotAdaptor:
+    environment = {"DEADLINE_KEYSHOT_POOL_CONNECTION_FILE": connection_file}
+    with keyshot_session(environment=environment) as adaptor:
+        adaptor.on_run({"frames": "1-2"})
+    return adaptor
+
+
+def _leased_pid(adaptor: KeyShotAdaptor) -> int:
+    assert isinstance(adaptor._keyshot_client, KeyShotPoolLease)
+    assert not adaptor._keyshot_client.is_running
+    return adaptor._keyshot_client.pid
+
+
+def test_sessions_reuse_warm_keyshot(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], pool_connection_file: str
+):
+    first = _run_session(keyshot_session, pool_connection_file)
+    second = _run_session(keyshot_session, pool_connection_file)
+
+    assert _leased_pid(first) == _leased_pid(second)
+
+
+def test_pool_recycles_after_max_leases(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], pool_connection_file: str
+):
+    pids = [_leased_pid(_run_session(keyshot_session, pool_connection_file)) for _ in range(3)]
+
+    assert pids[0] == pids[1]
+    assert pids[2] != pids[1]
+
+
+def test_lease_unavailable_when_all_leased(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], pool_connection_file: str
+):
+    environment = {"DEADLINE_KEYSHOT_POOL_CONNECTION_FILE": pool_connection_file}
+    with keyshot_session(environment=environment):
+        with pytest.raises(KeyShotPoolUnavailableError):
+            KeyShotPoolLease(pool_connection_file, "unused", output_handler=mock.Mock())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="User IDs are POSIX only")
+def test_lease_refused_to_another_user(pool_connection_file: str):
+    with mock.patch.object(pool.os, "getuid", return_value=os.getuid() + 1):
+        with pytest.raises(KeyShotPoolUnavailableError, match="serves sessions of the user"):
+            KeyShotPoolLease(pool_connection_file, "unused", output_handler=mock.Mock())
+
+
+def test_pool_refuses_a_lease_to_another_user(pool_connection_file: str):
+    with mock.patch.object(pool, "_is_other_user", return_value=True):
+        with pytest.raises(KeyShotPoolUnavailableError, match="serves sessions of the user"):
+            KeyShotPoolLease(pool_connection_file, "unused", output_handler=mock.Mock())
+
+
+def test_lease_unavailable_on_windows(tmp_path: Path):
+    with mock.patch.object(pool.sys, "platform", "win32"):
+        with pytest.raises(KeyShotPoolUnavailableError, match="not supported on Windows"):
+            KeyShotPoolLease(
+                str(tmp_path / "keyshot_pool.json"), "unused", output_handler=mock.Mock()
+            )
+
+
+def test_pool_does_not_start_on_windows(tmp_path: Path):
+    connection_file = tmp_path / "keyshot_pool.json"
+    with mock.patch.object(pool.sys, "platform", "win32"):
+        with mock.patch.object(pool, "KeyShotPool") as keyshot_pool:
+            pool.main(["--connection-file", str(connection_file)])
+
+    keyshot_pool.assert_not_called()
+    assert not connection_file.exists()
+
+
+def test_session_falls_back_to_launching_without_pool(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    adaptor = _run_session(keyshot_session, str(tmp_path / "missing.json"))
+
+    assert not isinstance(adaptor._keyshot_client, KeyShotPoolLease)
+
+
+def test_pool_launches_no_replacement_after_shutdown(tmp_path: Path):
+    pool = KeyShotPool(size=0)
+    pool.start(str(tmp_path / "keyshot_pool.json"))
+    pool.shutdown()
+
+    with mock.patch("deadline.keyshot_adaptor.KeyShotAdaptor.pool._WarmKeyShot") as warm_keyshot:
+        pool._spawn()
+
+    warm_keyshot.assert_not_called()
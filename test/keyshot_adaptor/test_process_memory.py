@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, ContextManager
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.pool import KeyShotPool
+from deadline.keyshot_adaptor.KeyShotAdaptor.process_memory import get_process_rss
+from deadline.keyshot_adaptor.KeyShotAdaptor.timings import KeyShotTimings
+
+
+class TestGetProcessRss:
+    def test_rss_of_running_process(self):
+        rss = get_process_rss(os.getpid())
+
+        assert rss is not None and rss > 1024 * 1024
+
+    def test_rss_of_exited_process(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+
+        assert get_process_rss(process.pid) is None
+
+
+def _run_tasks(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    memory_limit_mb: float,
+    environment: dict | None = None,
+) -> tuple[list[int], dict]:
+    """
+    Runs two tasks in a session and returns the KeyShot process ID each task rendered with and
+    the session's timings
+    """
+    timings_file = tmp_path / "keyshot_timings.jsonl"
+    init_data = {"keyshot_memory_limit_mb": memory_limit_mb, "timings_file": str(timings_file)}
+    pids = []
+    with keyshot_session(init_data, environment) as adaptor:
+        for frame in (1, 2):
+            adaptor.on_run({"frame": frame, "output_file_path": str(tmp_path / "out.%d.png")})
+            assert adaptor._keyshot_client is not None
+            pids.append(adaptor._keyshot_client.pid)
+    return pids, KeyShotTimings.read(str(timings_file))
+
+
+def test_keyshot_restarted_between_tasks_over_memory_limit(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    with caplog.at_level(logging.INFO):
+        pids, timings = _run_tasks(keyshot_session, tmp_path, 1)
+
+    assert len(set(pids)) == 2
+    assert caplog.text.count("Restarting KeyShot because it is using") == 2
+    for task in timings["tasks"]:
+        assert task["keyshot_restart"] > 0
+        # The init data actions were replayed to the restarted KeyShot
+        assert task["actions"]["scene_file"] >= 0
+    assert (tmp_path / "out.1.png").exists() and (tmp_path / "out.2.png").exists()
+
+
+def test_keyshot_kept_under_memory_limit(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    pids, timings = _run_tasks(keyshot_session, tmp_path, 1024 * 1024)
+
+    assert len(set(pids)) == 1
+    assert all("keyshot_restart" not in task for task in timings["tasks"])
+
+
+def test_leased_keyshot_restarted_over_memory_limit(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    fake_keyshot_exe: str,
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    connection_file = str(tmp_path / "keyshot_pool.json")
+    with mock.patch.dict(os.environ, {"DEADLINE_KEYSHOT_EXE": fake_keyshot_exe}):
+        pool = KeyShotPool(size=2)
+        pool.start(connection_file)
+        try:
+            with caplog.at_level(logging.INFO):
+                pids, _ = _run_tasks(
+                    keyshot_session,
+                    tmp_path,
+                    1,
+                    {"DEADLINE_KEYSHOT_POOL_CONNECTION_FILE": connection_file},
+                )
+        finally:
+            pool.shutdown()
+
+    assert len(set(pids)) == 2
+    # The session start and both restarts leased a warm KeyShot
+    assert caplog.text.count("from the KeyShot pool") == 3
+    assert "Could not lease KeyShot" not in caplog.text
+    assert (tmp_path / "out.2.png").exists()
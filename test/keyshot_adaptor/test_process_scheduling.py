@@ -0,0 +1,106 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable, ContextManager
+
+import pytest
+from openjd.adaptor_runtime.adaptors.configuration import AdaptorConfiguration
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.process_scheduling import (
+    apply_process_scheduling,
+    get_numa_node_cpus,
+    parse_cpu_list,
+)
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="Scheduling settings are only applied on Linux"
+)
+
+
+def _get_status(pid: int, name: str) -> str:
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(f"{name}:"):
+                return line.split(":", 1)[1].strip()
+    raise KeyError(name)
+
+
+@pytest.mark.parametrize(
+    "cpus, expected",
+    [("0", {0}), ("0-3", {0, 1, 2, 3}), (" 0-1, 8,10 - 11 ", {0, 1, 8, 10, 11})],
+)
+def test_parse_cpu_list(cpus: str, expected: set[int]):
+    assert parse_cpu_list(cpus) == expected
+
+
+@pytest.mark.parametrize("cpus", ["", "a", "3-1", "0,,1"])
+def test_parse_cpu_list_invalid(cpus: str):
+    with pytest.raises(ValueError):
+        parse_cpu_list(cpus)
+
+
+@linux_only
+def test_apply_process_scheduling(caplog: pytest.LogCaptureFixture):
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        with caplog.at_level(logging.INFO):
+            apply_process_scheduling(
+                process.pid,
+                {"cpus": "0", "numa_node": 0, "nice": 5, "io_priority_class": "idle"},
+            )
+
+        assert _get_status(process.pid, "Cpus_allowed_list") == "0"
+        for tid in os.listdir(f"/proc/{process.pid}/task"):
+            assert os.getpriority(os.PRIO_PROCESS, int(tid)) == 5
+        assert f"Scheduled KeyShot process {process.pid}: CPUs 0, nice 5" in caplog.text
+        assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+    finally:
+        process.kill()
+        process.wait()
+
+
+@linux_only
+def test_cpus_outside_the_numa_node_are_not_applied(caplog: pytest.LogCaptureFixture):
+    outside_cpu = max(get_numa_node_cpus(0)) + 1
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        allowed_cpus = _get_status(process.pid, "Cpus_allowed_list")
+        apply_process_scheduling(process.pid, {"cpus": str(outside_cpu), "numa_node": 0})
+
+        assert _get_status(process.pid, "Cpus_allowed_list") == allowed_cpus
+        assert "None of the CPUs are on NUMA node 0" in caplog.text
+    finally:
+        process.kill()
+        process.wait()
+
+
+def test_init_data_overrides_adaptor_configuration():
+    adaptor = KeyShotAdaptor({"keyshot_scheduling": {"nice": 5}})
+    adaptor._config = AdaptorConfiguration(
+        {"log_level": "INFO", "keyshot_scheduling": {"cpus": "0-3", "nice": 10}}
+    )
+
+    assert adaptor._get_scheduling_settings() == {"cpus": "0-3", "nice": 5}
+
+
+@linux_only
+def test_session_keyshot_is_scheduled(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    with keyshot_session({"keyshot_scheduling": {"cpus": "0", "nice": 7}}) as adaptor:
+        assert adaptor._keyshot_client is not None
+        pid = adaptor._keyshot_client.pid
+
+        assert _get_status(pid, "Cpus_allowed_list") == "0"
+        # Including the threads KeyShot started after it was scheduled
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            assert os.getpriority(os.PRIO_PROCESS, int(tid)) == 7
+        adaptor.on_run({"frame": 1, "output_file_path": str(tmp_path / "out.%d.png")})
+
+    assert (tmp_path / "out.1.png").exists()
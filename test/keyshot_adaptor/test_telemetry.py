@@ -0,0 +1,119 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, ContextManager
+from unittest import mock
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.telemetry import KeyShotTelemetry
+
+
+class FakeTelemetrySink:
+    """
+    Stands in for the Deadline telemetry client and remembers what it was asked to record
+    """
+
+    def __init__(self, block: threading.Event | None = None, fail: bool = False) -> None:
+        self.events: list[tuple[str, dict[str, Any]]] = []
+        self.threads: set[str] = set()
+        self.recorded = threading.Event()
+        self._block = block
+        self._fail = fail
+
+    def record_event(self, event_type: str, event_details: dict[str, Any]) -> None:
+        self.threads.add(threading.current_thread().name)
+        if self._block is not None:
+            self._block.wait()
+        if self._fail:
+            raise RuntimeError("The telemetry service is unavailable")
+        self.events.append((event_type, event_details))
+        self.recorded.set()
+
+
+class TestKeyShotTelemetry:
+    def test_records_events_in_the_background(self):
+        sink = FakeTelemetrySink()
+        get_sink = mock.Mock(return_value=sink)
+        telemetry = KeyShotTelemetry(get_sink, batch_interval=0)
+
+        telemetry.start()
+        telemetry.record("start", {"a": 1})
+        telemetry.record("task", {"frames": 2})
+        telemetry.stop()
+
+        assert sink.events == [("start", {"a": 1}), ("task", {"frames": 2})]
+        assert sink.threads == {"KeyShotTelemetry"}
+        get_sink.assert_called_once_with()
+
+    def test_full_batch_is_recorded_without_waiting_for_the_interval(self):
+        sink = FakeTelemetrySink()
+        telemetry = KeyShotTelemetry(lambda: sink, batch_size=3, batch_interval=60)
+        telemetry.start()
+        try:
+            for index in range(3):
+                telemetry.record("task", {"index": index})
+
+            assert sink.recorded.wait(timeout=5)
+        finally:
+            telemetry.stop()
+
+        assert [details["index"] for _, details in sink.events] == [0, 1, 2]
+
+    def test_drops_events_instead_of_blocking_when_full(self):
+        unblock = threading.Event()
+        sink = FakeTelemetrySink(block=unblock)
+        telemetry = KeyShotTelemetry(
+            lambda: sink, max_queued_events=10, batch_size=1, batch_interval=0
+        )
+        telemetry.start()
+        try:
+            start = time.monotonic()
+            for index in range(100):
+                telemetry.record("task", {"index": index})
+            elapsed = time.monotonic() - start
+        finally:
+            unblock.set()
+            telemetry.stop()
+
+        assert elapsed < 1
+        assert telemetry.dropped_events >= 100 - 10 - 1
+        assert len(sink.events) + telemetry.dropped_events == 100
+
+    def test_sink_errors_are_not_raised(self):
+        get_sink = mock.Mock(side_effect=RuntimeError("No credentials"))
+        telemetry = KeyShotTelemetry(get_sink, batch_interval=0)
+
+        telemetry.start()
+        telemetry.record("start", {})
+        telemetry.stop()
+
+        failing_sink = FakeTelemetrySink(fail=True)
+        telemetry = KeyShotTelemetry(lambda: failing_sink, batch_interval=0)
+        telemetry.start()
+        telemetry.record("start", {})
+        telemetry.stop()
+
+        assert failing_sink.events == []
+
+
+def test_session_telemetry(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    sink = FakeTelemetrySink()
+
+    with keyshot_session(telemetry_client=sink) as adaptor:
+        adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    assert [event_type for event_type, _ in sink.events] == [
+        "com.amazon.rum.deadline.adaptor.runtime.start",
+        "com.amazon.rum.deadline.adaptor.runtime.task",
+    ]
+    task = sink.events[1][1]
+    assert task["frames"] == 2
+    assert task["succeeded"] is True
+    for name in ["total_seconds", "scene_load_seconds", "render_seconds", "write_seconds"]:
+        assert task[name] >= 0
+    assert sink.threads == {"KeyShotTelemetry"}
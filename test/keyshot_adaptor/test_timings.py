@@ -0,0 +1,166 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, ContextManager
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import KeyShotAdaptor
+from deadline.keyshot_adaptor.KeyShotAdaptor.timings import KeyShotTimings
+
+
+class TestKeyShotTimings:
+    def test_phases_and_actions_add_up_per_task(self):
+        timings = KeyShotTimings()
+        timings.add("server_start", 0.5)
+        timings.start_task()
+        timings.add("render", 1.0)
+        timings.add("render", 2.0)
+        timings.add_action("scene_file", 0.25)
+        timings.add_action("scene_file", 0.25)
+
+        assert timings.session == {"server_start": 0.5}
+        assert timings.task == {"render": 3.0, "actions": {"scene_file": 0.5}}
+        assert timings.get("render") == 3.0
+
+    def test_summary(self):
+        timings = KeyShotTimings()
+        timings.add("render", 1.5)
+        timings.add_action("frames", 0.001)
+        timings.add("total", 2)
+
+        assert timings.summary() == "total 2.000s, render 1.500s, frames 0.001s"
+
+    def test_counts(self):
+        timings = KeyShotTimings()
+        timings.start_task()
+        timings.add("render", 1.5)
+        timings.count("retries")
+        timings.count("retries")
+
+        assert timings.get_count("retries") == 2
+        assert timings.get_count("restarts") == 0
+        assert timings.task == {"render": 1.5, "counts": {"retries": 2}}
+        assert timings.summary() == "render 1.500s, retries 2"
+
+    def test_merge(self):
+        timings = KeyShotTimings()
+        timings.start_task()
+        timings.add("render", 1.0)
+        timings.count("retries")
+
+        timings.merge(
+            {"render": 2.0, "write": 0.5, "actions": {"frames": 0.25}, "counts": {"retries": 1}}
+        )
+
+        assert timings.task == {
+            "render": 3.0,
+            "write": 0.5,
+            "actions": {"frames": 0.25},
+            "counts": {"retries": 2},
+        }
+
+    def test_write(self, tmp_path: Path):
+        path = tmp_path / "timings.jsonl"
+        path.write_text("stale\n")
+        timings = KeyShotTimings(str(path))
+        timings.add("server_start", 0.5)
+        timings.write()
+        for seconds in (1.0, 2.0):
+            timings.start_task()
+            timings.add("render", seconds)
+            timings.write()
+
+        assert [json.loads(line) for line in path.read_text().splitlines()] == [
+            {"session": {"server_start": 0.5}},
+            {"task": {"render": 1.0}},
+            {"task": {"render": 2.0}},
+        ]
+        assert KeyShotTimings.read(str(path)) == {
+            "session": {"server_start": 0.5},
+            "tasks": [{"render": 1.0}, {"render": 2.0}],
+        }
+
+
+def test_session_and_task_timings(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    timings_file = tmp_path / "keyshot_timings.jsonl"
+
+    with caplog.at_level(logging.INFO):
+        with keyshot_session({"timings_file": str(timings_file)}) as adaptor:
+            adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    timings = KeyShotTimings.read(str(timings_file))
+    session = timings["session"]
+    for phase in ["server_start", "process_spawn", "client_handshake", "total"]:
+        assert session[phase] >= 0
+    assert list(session["actions"]) == ["scene_file"]
+    (task,) = timings["tasks"]
+    for phase in ["action_delivery", "render", "write", "total"]:
+        assert task[phase] >= 0
+    assert list(task["actions"]) == ["output_file_path", "frames"]
+    assert (tmp_path / "out.2.png").exists()
+    assert any(
+        record.getMessage().startswith("KeyShot task timings: total ") for record in caplog.records
+    )
+
+
+def test_actions_are_queued_while_the_server_starts(
+    fake_keyshot_exe: str, scene_file: str, tmp_path: Path
+):
+    timings_file = tmp_path / "keyshot_timings.jsonl"
+    adaptor = KeyShotAdaptor({"scene_file": scene_file, "timings_file": str(timings_file)})
+    start_keyshot_server = adaptor._start_keyshot_server
+    queued: list[int] = []
+
+    def start_slow_keyshot_server() -> None:
+        time.sleep(0.2)
+        queued.append(len(adaptor._action_queue))
+        start_keyshot_server()
+
+    with mock.patch.dict(os.environ, {"DEADLINE_KEYSHOT_EXE": fake_keyshot_exe}):
+        with mock.patch.object(adaptor, "_get_deadline_telemetry_client"):
+            with mock.patch.object(adaptor, "_start_keyshot_server", start_slow_keyshot_server):
+                try:
+                    adaptor.on_start()
+                    adaptor.on_run({"frame": 1, "output_file_path": str(tmp_path / "out.%d.png")})
+                finally:
+                    adaptor.on_cleanup()
+
+    assert queued and queued[0] > 0
+    timings = KeyShotTimings.read(str(timings_file))
+    assert timings["session"]["server_wait"] > 0
+    (task,) = timings["tasks"]
+    assert task["time_to_first_render"] > timings["session"]["server_wait"]
+    assert (tmp_path / "out.1.png").exists()
+
+
+def test_cleanup_after_failing_before_the_server_is_ready(scene_file: str, tmp_path: Path):
+    adaptor = KeyShotAdaptor({"scene_file": scene_file})
+    start_keyshot_server = adaptor._start_keyshot_server
+
+    def start_slow_keyshot_server() -> None:
+        time.sleep(0.2)
+        start_keyshot_server()
+
+    with mock.patch.object(adaptor, "_get_deadline_telemetry_client"):
+        with mock.patch.object(adaptor, "_start_keyshot_server", start_slow_keyshot_server):
+            with mock.patch.object(
+                adaptor, "_get_keyshot_client_path", side_effect=FileNotFoundError
+            ):
+                try:
+                    with pytest.raises(FileNotFoundError):
+                        adaptor.on_start()
+                finally:
+                    adaptor.on_cleanup()
+
+    assert adaptor._server_thread is not None and not adaptor._server_thread.is_alive()
@@ -0,0 +1,233 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+from typing import Callable, ContextManager
+from unittest import mock
+
+import pytest
+
+from deadline.keyshot_adaptor.KeyShotAdaptor.adaptor import (
+    KeyShotAdaptor,
+    KeyShotRenderHungError,
+)
+from deadline.keyshot_adaptor.KeyShotAdaptor.timings import KeyShotTimings
+from deadline.keyshot_adaptor.KeyShotAdaptor.watchdog import KeyShotRenderWatchdog
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+class TestKeyShotRenderWatchdog:
+    def test_disabled_without_limits(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(clock=clock)
+        watchdog.start(1)
+        clock.now += 1e6
+
+        assert not watchdog.enabled
+        assert watchdog.seconds_until_check() is None
+        assert watchdog.check() is None
+
+    def test_stall(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(stall_timeout=30, clock=clock)
+        watchdog.start(2)
+        clock.now += 20
+        watchdog.output("Rendering: 50%")
+
+        clock.now += 20
+        assert watchdog.check() is None
+        assert watchdog.seconds_until_check() == 10
+
+        clock.now += 10
+        assert watchdog.check() == (
+            "KeyShot wrote no output for 30s while rendering frame 1 of 2, over the limit of 30s. "
+            "The last output was: Rendering: 50%"
+        )
+
+    def test_frame_timeout(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(frame_timeout=100, clock=clock)
+        watchdog.start(3)
+        clock.now += 90
+        watchdog.frames_done(1)
+        for _ in range(9):
+            clock.now += 10
+            watchdog.output("Rendering: 10%")
+            assert watchdog.check() is None
+
+        clock.now += 10
+        assert watchdog.check() == (
+            "KeyShot has been rendering frame 2 of 3 for 100s, over the limit of 100s. "
+            "The last output was: Rendering: 10%"
+        )
+
+    def test_limits_scaled_from_median_frame_time(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(
+            stall_timeout=600,
+            frame_timeout=3600,
+            median_frame_time_multiplier=3,
+            min_timeout=1,
+            clock=clock,
+        )
+        watchdog.start(4)
+        for frames_done, seconds in enumerate((10, 30, 20), start=1):
+            clock.now += seconds
+            watchdog.output("Finished Rendering")
+            watchdog.frames_done(frames_done)
+
+        # Three times the median frame time of 20s
+        assert watchdog.seconds_until_check() == 60
+        clock.now += 60
+        assert "over the limit of 60s (3 times the median frame time)" in (watchdog.check() or "")
+
+    def test_scaled_limits_are_not_below_the_minimum(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(
+            median_frame_time_multiplier=3, min_timeout=60, clock=clock
+        )
+        watchdog.start(2)
+        clock.now += 1
+        watchdog.output("Finished Rendering")
+        watchdog.frames_done(1)
+
+        assert watchdog.seconds_until_check() == 60
+
+    def test_frames_completed_together_share_the_time(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(median_frame_time_multiplier=1, min_timeout=0, clock=clock)
+        watchdog.start(4)
+        clock.now += 40
+        watchdog.frames_done(4)
+        watchdog.start(1)
+
+        assert watchdog.seconds_until_check() == 10
+
+    def test_not_checked_after_render_stops(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(stall_timeout=1, clock=clock)
+        watchdog.start(1)
+        watchdog.stop()
+        clock.now += 10
+
+        assert watchdog.check() is None
+
+    def test_no_check_until_a_limit_applies(self, clock: FakeClock):
+        watchdog = KeyShotRenderWatchdog(median_frame_time_multiplier=3, clock=clock)
+
+        # No limit applies before the render starts or before the first frame completes
+        assert watchdog.seconds_until_check() is None
+        watchdog.start(2)
+        assert watchdog.seconds_until_check() is None
+
+    def test_changes_are_reported(self, clock: FakeClock):
+        on_change = mock.Mock()
+        watchdog = KeyShotRenderWatchdog(stall_timeout=30, clock=clock, on_change=on_change)
+        revision = watchdog.revision
+
+        watchdog.start(2)
+        watchdog.output("Rendering: 50%")
+        watchdog.frames_done(1)
+        watchdog.frames_done(1)
+        watchdog.stop()
+
+        # Output only moves the stall limit, which is checked late rather than early
+        assert watchdog.revision == revision + 3
+        assert on_change.call_count == 3
+
+
+def _run_task(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    init_data: dict,
+    environment: dict,
+) -> dict:
+    """
+    Runs a task of two frames with the fake KeyShot and returns the session's timings
+    """
+    timings_file = tmp_path / "keyshot_timings.jsonl"
+    with keyshot_session({"timings_file": str(timings_file), **init_data}, environment) as adaptor:
+        adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+    return KeyShotTimings.read(str(timings_file))
+
+
+def test_hung_render_fails_early(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    environment = {
+        "FAKE_KEYSHOT_FAIL": "hang",
+        "FAKE_KEYSHOT_FAIL_AFTER": "1",
+    }
+    init_data = {"render_watchdog": {"stall_timeout_seconds": 0.5}}
+
+    start = time.monotonic()
+    with pytest.raises(KeyShotRenderHungError, match="wrote no output .* frame 2 of 2"):
+        _run_task(keyshot_session, tmp_path, init_data, environment)
+
+    # The hung KeyShot is terminated instead of being waited on to close
+    assert time.monotonic() - start < 10
+    assert (tmp_path / "out.1.png").exists()
+
+
+def test_hung_render_restarted(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    environment = {
+        "FAKE_KEYSHOT_FAIL": "hang",
+        "FAKE_KEYSHOT_FAIL_AFTER": "1",
+        "FAKE_KEYSHOT_FAIL_ONCE": str(tmp_path / "hung"),
+    }
+    init_data = {"render_watchdog": {"stall_timeout_seconds": 0.5, "on_hang": "restart"}}
+
+    with caplog.at_level(logging.INFO):
+        timings = _run_task(keyshot_session, tmp_path, init_data, environment)
+
+    assert "The KeyShot render hung. KeyShot wrote no output" in caplog.text
+    assert "to render the task again" in caplog.text
+    assert timings["tasks"][0]["keyshot_restart"] > 0
+    assert (tmp_path / "out.1.png").exists() and (tmp_path / "out.2.png").exists()
+
+
+def test_render_within_limits(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    environment = {
+        "FAKE_KEYSHOT_RENDER_SECONDS": "0.2",
+        "FAKE_KEYSHOT_PROGRESS_STEPS": "4",
+    }
+    init_data = {
+        "render_watchdog": {
+            "stall_timeout_seconds": 5,
+            "frame_timeout_seconds": 10,
+            "median_frame_time_multiplier": 20,
+            "min_timeout_seconds": 5,
+        }
+    }
+
+    timings = _run_task(keyshot_session, tmp_path, init_data, environment)
+
+    assert "keyshot_restart" not in timings["tasks"][0]
+    assert (tmp_path / "out.1.png").exists() and (tmp_path / "out.2.png").exists()
+
+
+def test_watchdog_not_polled_before_a_limit_applies(
+    keyshot_session: Callable[..., ContextManager[KeyShotAdaptor]], tmp_path: Path
+):
+    environment = {"FAKE_KEYSHOT_RENDER_SECONDS": "1.5"}
+    init_data = {"render_watchdog": {"median_frame_time_multiplier": 3}}
+
+    with keyshot_session(init_data, environment) as adaptor:
+        with mock.patch.object(adaptor._watchdog, "check", wraps=adaptor._watchdog.check) as check:
+            adaptor.on_run({"frames": "1-2", "output_file_path": str(tmp_path / "out.%d.png")})
+
+    # The scaled limits are at least a minute, so the render finishes before any is reached
+    check.assert_not_called()
@@ -20,6 +20,92 @@ def test_construct_job_template():
     assert job_template["name"] == filename
 
 
+def test_construct_job_template_renders_a_frame_per_task():
+    job_template = submitter.construct_job_template("test_filename")
+
+    assert "extensions" not in job_template
+    parameter_names = [param["name"] for param in job_template["parameterDefinitions"]]
+    assert "ChunkSize" not in parameter_names
+    frame_param = job_template["steps"][0]["parameterSpace"]["taskParameterDefinitions"][0]
+    assert frame_param["type"] == "INT"
+    assert "chunks" not in frame_param
+
+
+def test_construct_job_template_chunks_frames():
+    job_template = submitter.construct_job_template("test_filename", chunk_frames=True)
+
+    assert "TASK_CHUNKING" in job_template["extensions"]
+    parameter_names = [param["name"] for param in job_template["parameterDefinitions"]]
+    assert "ChunkSize" in parameter_names
+    step = job_template["steps"][0]
+    frame_param = step["parameterSpace"]["taskParameterDefinitions"][0]
+    assert frame_param["type"] == "CHUNK[INT]"
+    assert frame_param["chunks"]["defaultTaskCount"] == "{{Param.ChunkSize}}"
+    assert step["script"]["embeddedFiles"][0]["data"] == "frames: '{{Task.Param.Frame}}'\n"
+
+
+def test_construct_job_template_render_options():
+    job_template = submitter.construct_job_template("test_filename")
+
+    parameters = {param["name"]: param for param in job_template["parameterDefinitions"]}
+    init_data = job_template["steps"][0]["stepEnvironments"][0]["script"]["embeddedFiles"][0]
+    for name in (
+        "RenderThreads",
+        "RenderMode",
+        "MaxSamples",
+        "MaxRenderTimeSeconds",
+        "ResolutionWidth",
+        "ResolutionHeight",
+    ):
+        assert parameters[name]["userInterface"]["groupLabel"] == "KeyShot Render Options"
+        assert f"{{{{Param.{name}}}}}" in init_data["data"]
+    assert parameters["RenderMode"]["default"] == "SCENE"
+    # The render modes that take these values cannot be submitted without them
+    assert parameters["MaxSamples"]["minValue"] == 1
+    assert parameters["MaxRenderTimeSeconds"]["minValue"] == 1
+    assert parameters["FinishBy"]["default"] == ""
+    assert "finish_by: '{{Param.FinishBy}}'\n" in init_data["data"]
+
+
+def test_construct_multi_scene_job_template():
+    scene_files = ["/scenes/chair.bip", "/scenes/table.bip"]
+
+    job_template = submitter.construct_multi_scene_job_template("catalog", scene_files)
+
+    parameter_names = [param["name"] for param in job_template["parameterDefinitions"]]
+    assert "KeyShotFile" not in parameter_names
+    assert "OutputFilePath" not in parameter_names
+    assert "OutputDirectory" in parameter_names
+    step = job_template["steps"][0]
+    task_params = {
+        param["name"]: param for param in step["parameterSpace"]["taskParameterDefinitions"]
+    }
+    assert task_params["KeyShotFile"]["range"] == scene_files
+    assert task_params["SceneName"]["range"] == ["chair", "table"]
+    assert task_params["Frame"]["type"] == "INT"
+    assert step["parameterSpace"]["combination"] == "(KeyShotFile, SceneName) * Frame"
+    init_data = step["stepEnvironments"][0]["script"]["embeddedFiles"][0]["data"]
+    assert "scene_file" not in init_data
+    assert "render_options:" in init_data
+    assert init_data.endswith("  scenes: 2\n")
+    run_data = step["script"]["embeddedFiles"][0]["data"]
+    assert "scene_file: '{{Task.Param.KeyShotFile}}'\n" in run_data
+    assert "{{Task.Param.SceneName}}" in run_data
+
+
+def test_construct_multi_scene_job_template_chunks_frames():
+    job_template = submitter.construct_multi_scene_job_template(
+        "catalog", ["/scenes/chair.bip"], chunk_frames=True
+    )
+
+    assert job_template["extensions"] == ["TASK_CHUNKING"]
+    task_params = {
+        param["name"]: param
+        for param in job_template["steps"][0]["parameterSpace"]["taskParameterDefinitions"]
+    }
+    assert task_params["Frame"]["type"] == "CHUNK[INT]"
+
+
 def test_construct_asset_references():
     settings = submitter.Settings(
         parameter_values=[